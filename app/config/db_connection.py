@@ -1,20 +1,37 @@
+import os
+import threading
 import pymysql
+from app.config.db_pool import ConnectionPool
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            # re-check: another thread may have built it while we waited
+            if _pool is None:
+                _pool = ConnectionPool(
+                    host=os.getenv("DB_HOST", "localhost"),
+                    user=os.getenv("DB_USER", "root"),
+                    password=os.getenv("DB_PASSWORD", "root"),
+                    database=os.getenv("DB_NAME", "movie_recommendation_db"),
+                    local_infile=os.getenv("DB_LOCAL_INFILE", "False").lower() == "true",
+                    cursorclass=pymysql.cursors.DictCursor
+                )
+    return _pool
+
 
 def connecting_db():
 
-    """DB connection setup"""
+    """DB connection setup (borrowed from the pool; conn.close() returns it)"""
 
     try:
-        conn = pymysql.connect(
-            host="localhost",
-            user="root",         
-            password="root",     
-            database="movie_recommendation_db",
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        return conn
+        return get_pool().acquire()
 
     except Exception as e:
         print(" Database connection failed:", e)
         return None
- 
\ No newline at end of file
@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+import pymysql
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled connection. Behaves like the pymysql connection,
+    except close() hands it back to the pool instead of disconnecting.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise pymysql.err.InterfaceError("Connection already returned to the pool")
+        return getattr(raw, name)
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)."""
+        raw = self.__dict__.get("_raw")
+        self._raw = None
+        if raw is not None:
+            self._pool._release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # callers that forget close() (or raise before it) still give the slot back
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of pymysql connections.
+
+    - at most `size` connections are open (idle + in use); acquire() waits up to
+      `timeout` seconds for one to be returned
+    - connections idle longer than `ping_interval` are pinged before reuse
+    - connections older than `max_lifetime` are closed and replaced
+    - open transactions are rolled back on release so the next user starts clean
+    """
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, max_lifetime=DB_POOL_MAX_LIFETIME,
+                 ping_interval=DB_POOL_PING_INTERVAL, connect=None, **connect_kwargs):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._connect = connect or (lambda: pymysql.connect(**connect_kwargs))
+        self._idle = []  # (raw, created_at, last_used), most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one if the pool has room."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                self._reset_after_fork()
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    raw, created_at, last_used = self._idle.pop()
+                else:
+                    raw, created_at, last_used = None, None, None
+                    self._open += 1
+
+            if raw is None:
+                return self._new_connection()
+            if self._is_usable(raw, created_at, last_used):
+                return PooledConnection(self, raw, created_at)
+            self._discard(raw)
+
+    @contextmanager
+    def connection(self):
+        """Context manager: `with pool.connection() as conn:` returns it on exit."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Close every idle connection (in-use ones close when released)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        """Return current pool occupancy."""
+        with self._cond:
+            return {"size": self.size, "open": self._open, "idle": len(self._idle)}
+
+    # internals
+    def _new_connection(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _is_usable(self, raw, created_at, last_used):
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            return False
+        if now - last_used > self.ping_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _release(self, raw, created_at):
+        if os.getpid() != self._pid:
+            return
+        try:
+            if raw.open:
+                raw.rollback()
+                reusable = time.monotonic() - created_at <= self.max_lifetime
+            else:
+                reusable = False
+        except Exception:
+            reusable = False
+
+        if not reusable:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _reset_after_fork(self):
+        # connections can't be shared with a forked child; start the child empty
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._open = 0
@@ -0,0 +1,26 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(BASE_DIR, "recommend_model", "trained_models"))
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", os.path.join(MODEL_DIR, "item_neighbors"))
+LEGACY_SIMILARITY_PKL = os.getenv("LEGACY_SIMILARITY_PKL", os.path.join(MODEL_DIR, "item_similarity.pkl"))
+NEIGHBOR_TOP_N = int(os.getenv("NEIGHBOR_TOP_N", "50"))
+# seconds between checks of SIMILARITY_INDEX_DIR/CURRENT for a newly published model
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+# published model versions kept on disk
+MODEL_KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+# seconds a missing rating_events id is waited for (an uncommitted write) before the
+# incremental updater treats it as rolled back and moves its cursor past it
+EVENT_GAP_GRACE = float(os.getenv("EVENT_GAP_GRACE", "300"))
+# home page Trending Now: rank by recent rating activity (a 30-day GROUP BY over ratings)
+# instead of the index-served newest-releases list
+TRENDING_BY_ACTIVITY = os.getenv("TRENDING_BY_ACTIVITY", "False").lower() == "true"
+# serving engine: "neighbors" (item-item top-N index) or "als" (matrix factorization)
+RECOMMENDER_ENGINE = os.getenv("RECOMMENDER_ENGINE", "neighbors")
+ALS_MODEL_DIR = os.getenv("ALS_MODEL_DIR", os.path.join(MODEL_DIR, "als"))
+ALS_FACTORS = int(os.getenv("ALS_FACTORS", "64"))
+# ALS approximate nearest-neighbor search: clusters probed per query (higher = better recall, slower),
+# and the catalog size below which every search is exact
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+ANN_MIN_ITEMS = int(os.getenv("ANN_MIN_ITEMS", "20000"))
@@ -3,6 +3,7 @@ from app.templates.auth import auth_home
 from app.templates.user_dashboard import user_dashboard
 from app.templates.admin_dashboard import admin_dashboard
 from app.view.auth import AuthService
+from app.templates.caching import warm_resources
 
 def _ensure_role_in_session():
     """
@@ -45,6 +46,7 @@ def _sidebar_session_panel():
 
 def main():
     st.set_page_config(page_title=" Movie Recommendation System", layout="wide")
+    warm_resources()
     _ensure_role_in_session()
     _sidebar_session_panel()
 
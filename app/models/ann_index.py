@@ -0,0 +1,113 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbor index over item vectors.
+
+Items are partitioned by spherical k-means into n_lists clusters; positions
+are stored grouped by cluster (order / offsets, CSR style) next to the
+centroids. A query is routed to the nprobe clusters whose centroids score
+highest against it, and only the items in those clusters are scored exactly,
+so a lookup costs O(n_lists * k + n * nprobe / n_lists * k) instead of O(n * k).
+nprobe is the recall/latency knob: nprobe = n_lists is an exact search.
+
+The index only holds the partition; the caller passes the vectors to score
+(raw factors for inner-product recommendations, unit factors for cosine
+neighbors), so one partition serves both.
+"""
+
+import os
+import numpy as np
+import scipy.sparse as sp
+
+
+class IVFIndex:
+    def __init__(self, centroids, offsets, order):
+        """centroids (n_lists x k); items of list l are order[offsets[l]:offsets[l+1]]."""
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.order = np.asarray(order, dtype=np.int32)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    # Building
+    @staticmethod
+    def build(vectors, n_lists=None, iterations=10, seed=0):
+        """
+        Partition the rows of `vectors` with spherical k-means (cosine on unit
+        vectors). n_lists defaults to ~sqrt(n).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        if n == 0:
+            return IVFIndex(np.zeros((0, vectors.shape[1])), np.zeros(1), np.zeros(0))
+        n_lists = max(1, min(n_lists or int(round(np.sqrt(n))), n))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        unit = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        rng = np.random.default_rng(seed)
+        centroids = unit[rng.choice(n, size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(unit @ centroids.T, axis=1)
+            members = sp.csr_matrix((np.ones(n, dtype=np.float32), (assign, np.arange(n))), shape=(n_lists, n))
+            sums = np.asarray(members @ unit)
+            lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = lengths.ravel() == 0
+            # re-seed empty clusters with random items so every list stays useful
+            sums[empty] = unit[rng.choice(n, size=int(empty.sum()), replace=False)]
+            lengths[empty] = 1.0
+            centroids = sums / lengths
+        assign = np.argmax(unit @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+        return IVFIndex(centroids, offsets, order)
+
+    # Searching
+    def candidates(self, query, nprobe):
+        """Positions in the nprobe lists whose centroids score highest against query."""
+        if nprobe >= self.n_lists:
+            return self.order
+        routed = self.centroids @ np.asarray(query, dtype=np.float32)
+        lists = np.argpartition(-routed, nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+    def search(self, query, vectors, k, nprobe=8, exclude=None):
+        """
+        Approximate top-k rows of `vectors` by inner product with query, best first.
+        Returns (positions, scores); positions in `exclude` are skipped.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if nprobe >= self.n_lists:
+            positions, scores = None, vectors @ query
+        else:
+            positions = self.candidates(query, nprobe)
+            scores = vectors[positions] @ query
+        # take extra results instead of filtering every candidate, then drop the excluded ones
+        excluded = set() if exclude is None else {int(p) for p in exclude}
+        k_all = min(k + len(excluded), len(scores))
+        if k_all <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k_all - 1)[:k_all]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        found = top if positions is None else positions[top]
+        keep = np.fromiter((int(p) not in excluded for p in found), dtype=bool, count=len(found))
+        return found[keep][:k].astype(np.int64), scores[top][keep][:k]
+
+    # Persistence
+    ARRAYS = ("centroids", "offsets", "order")
+
+    def save(self, directory, prefix="ivf_"):
+        """Write the arrays as <prefix><name>.npy; returns the manifest entry describing them."""
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{prefix}{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        return {"prefix": prefix, "n_lists": self.n_lists}
+
+    @staticmethod
+    def load(directory, entry, mmap=True):
+        arrays = [np.load(os.path.join(directory, f"{entry['prefix']}{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in IVFIndex.ARRAYS]
+        index = IVFIndex(*arrays)
+        if index.n_lists != entry["n_lists"] or len(index.offsets) != index.n_lists + 1:
+            raise ValueError(f"IVF arrays in {directory} do not match the manifest")
+        return index
@@ -0,0 +1,192 @@
+"""
+Streaming bulk loader for seeding tables from CSV files.
+
+The CSV is read in chunks of BULK_CHUNK_ROWS rows. A caller-supplied prepare()
+turns each chunk into one or more (table, DataFrame) pairs whose columns are
+the table's. Those pairs are written with multi-row INSERTs (executemany,
+BULK_BATCH_SIZE rows per statement) or, when enabled, with LOAD DATA LOCAL
+INFILE. Every chunk is one transaction.
+
+Progress is kept in bulk_load_checkpoints: the number of CSV rows done is
+updated in the same transaction as the chunk it covers. A load that fails
+part way resumes after the last committed chunk, and no chunk is written
+twice. A finished load is skipped on re-runs until the CSV changes or
+resume=False is passed.
+"""
+
+import os
+import csv
+import time
+import tempfile
+import pandas as pd
+import pymysql
+import pymysql.cursors
+
+from app.config.db_connection import connecting_db
+from app.config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", "20000"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+# needs local_infile on the server and DB_LOCAL_INFILE=true for the client
+BULK_LOAD_DATA = os.getenv("BULK_LOAD_DATA", "False").lower() == "true"
+
+# server refused LOAD DATA LOCAL (disabled on client or server); fall back to INSERTs
+_LOAD_DATA_REFUSED = {1148, 2068, 3948}
+
+
+def frame_rows(frame):
+    """DataFrame rows as tuples of Python values, NaN/NaT as None."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return list(frame.itertuples(index=False, name=None))
+
+
+class BulkLoader:
+    # Table setup
+    @staticmethod
+    def create_table():
+        """Create bulk_load_checkpoints table if not exists."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            sql = """
+            CREATE TABLE IF NOT EXISTS bulk_load_checkpoints (
+                name VARCHAR(100) PRIMARY KEY,
+                source VARCHAR(500) NOT NULL,
+                signature VARCHAR(100) NOT NULL,
+                rows_done BIGINT NOT NULL DEFAULT 0,
+                completed BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+            """
+            cursor.execute(sql)
+            conn.commit()
+            return {"success": True, "message": "Bulk load checkpoints table ready in database"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def signature(csv_path):
+        """Identifies one version of a CSV file; a changed file restarts its load."""
+        stat = os.stat(csv_path)
+        return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+    # Writing
+    @staticmethod
+    def insert_rows(cursor, table, frame, batch_size=BULK_BATCH_SIZE, ignore=True):
+        """INSERT [IGNORE] the frame's rows in batches of batch_size; returns affected rows."""
+        columns = list(frame.columns)
+        sql = (f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        rows = frame_rows(frame)
+        affected = 0
+        for start in range(0, len(rows), batch_size):
+            # pymysql rewrites executemany of INSERT ... VALUES into one multi-row statement
+            affected += cursor.executemany(sql, rows[start:start + batch_size]) or 0
+        return affected
+
+    @staticmethod
+    def load_data_rows(cursor, table, frame, ignore=True):
+        """Write the frame through a temporary CSV and LOAD DATA LOCAL INFILE; returns affected rows."""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="", encoding="utf-8") as f:
+            frame.to_csv(f, index=False, header=False, na_rep="NULL", quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+            path = f.name
+        try:
+            return cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s {'IGNORE ' if ignore else ''}INTO TABLE {table} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(frame.columns)})",
+                (path,),
+            ) or 0
+        finally:
+            os.remove(path)
+
+    # Loading
+    @staticmethod
+    def load(name, csv_path, prepare, chunk_rows=BULK_CHUNK_ROWS, batch_size=BULK_BATCH_SIZE,
+             load_data=BULK_LOAD_DATA, ignore=True, resume=True, usecols=None):
+        """
+        Stream csv_path into the database.
+        prepare(chunk) returns [(table, frame), ...] written in order within the chunk's transaction;
+        usecols limits the CSV columns parsed.
+        Returns {"success", "message", "data": {"rows", "written", "resumed_from", "seconds", "rows_per_sec"}}.
+        """
+        conn = None
+        started = time.perf_counter()
+        try:
+            signature = BulkLoader.signature(csv_path)
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT signature, rows_done, completed FROM bulk_load_checkpoints WHERE name=%s", (name,))
+            checkpoint = cursor.fetchone()
+            done = 0
+            if resume and checkpoint and checkpoint["signature"] == signature:
+                if checkpoint["completed"]:
+                    return {"success": True, "message": f"{name}: already loaded from {csv_path}",
+                            "data": {"rows": 0, "written": 0, "resumed_from": checkpoint["rows_done"],
+                                     "seconds": 0.0, "rows_per_sec": 0.0}}
+                done = checkpoint["rows_done"]
+            resumed_from = done
+            if done:
+                logger.info("%s: resuming after %s rows", name, done)
+
+            rows = written = 0
+            reader = pd.read_csv(csv_path, chunksize=chunk_rows, skiprows=range(1, done + 1),
+                                 usecols=usecols)
+            for chunk in reader:
+                for table, frame in prepare(chunk):
+                    if frame.empty:
+                        continue
+                    if load_data:
+                        try:
+                            written += BulkLoader.load_data_rows(cursor, table, frame, ignore)
+                            continue
+                        except pymysql.err.MySQLError as e:
+                            if not e.args or e.args[0] not in _LOAD_DATA_REFUSED:
+                                raise
+                            logger.warning("%s: LOAD DATA LOCAL refused (%s), using INSERT batches", name, e)
+                            load_data = False
+                    written += BulkLoader.insert_rows(cursor, table, frame, batch_size, ignore)
+                rows += len(chunk)
+                done += len(chunk)
+                cursor.execute(
+                    """
+                    INSERT INTO bulk_load_checkpoints (name, source, signature, rows_done, completed)
+                    VALUES (%s, %s, %s, %s, FALSE)
+                    ON DUPLICATE KEY UPDATE source=VALUES(source), signature=VALUES(signature),
+                        rows_done=VALUES(rows_done), completed=FALSE
+                    """,
+                    (name, csv_path, signature, done),
+                )
+                conn.commit()
+                elapsed = time.perf_counter() - started
+                logger.info("%s: %s rows committed (%.0f rows/sec)", name, done, rows / elapsed if elapsed else 0)
+
+            cursor.execute(
+                """
+                INSERT INTO bulk_load_checkpoints (name, source, signature, rows_done, completed)
+                VALUES (%s, %s, %s, %s, TRUE)
+                ON DUPLICATE KEY UPDATE source=VALUES(source), signature=VALUES(signature),
+                    rows_done=VALUES(rows_done), completed=TRUE
+                """,
+                (name, csv_path, signature, done),
+            )
+            conn.commit()
+            seconds = time.perf_counter() - started
+            rate = rows / seconds if seconds else 0.0
+            return {
+                "success": True,
+                "message": f"{name}: {rows} rows loaded from {csv_path} ({rate:.0f} rows/sec)",
+                "data": {"rows": rows, "written": written, "resumed_from": resumed_from,
+                         "seconds": round(seconds, 2), "rows_per_sec": round(rate, 1)},
+            }
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            return {"success": False, "error": str(e)}
+        finally:
+            if conn:
+                conn.close()
@@ -0,0 +1,220 @@
+"""
+Matrix-factorization (ALS) model used for serving recommendations.
+
+Only the item factors are kept: an (n_items x k) float32 matrix, so memory is
+linear in the catalog. A user is folded in at request time by solving one
+k x k system from their current ratings, then every movie is scored with a
+single matrix-vector product, so new ratings count immediately and scoring
+cost does not grow with how many movies the user rated beyond that solve.
+
+Two training modes are supported (see recommend_model/scripts/train_als.py):
+explicit ALS fits ratings minus the global mean with weighted-lambda
+regularization; implicit ALS treats every rating as a positive preference
+with confidence 1 + alpha * rating.
+
+Catalogs of ANN_MIN_ITEMS movies or more are searched through an IVF index
+(app.models.ann_index) built at training time, probing ANN_NPROBE clusters;
+smaller catalogs, or models without one, are scored exactly.
+
+On disk a model is item_factors.npy (plus the IVF arrays, if built) and a
+manifest.json with the movieId mapping and training parameters, published as
+versions through VersionedModel.
+"""
+
+import os
+import json
+from datetime import datetime
+import numpy as np
+from app.models.model_versions import VersionedModel
+from app.models.ann_index import IVFIndex
+from app.config.model_config import ANN_NPROBE, ANN_MIN_ITEMS
+
+FORMAT_VERSION = 1
+MODES = ("explicit", "implicit")
+
+
+class FactorModel(VersionedModel):
+    def __init__(self, item_ids, item_factors, mode="explicit", reg=0.1, alpha=40.0, global_mean=0.0):
+        """Wrap an item-factor matrix; item_ids maps row position -> movieId."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown ALS mode: {mode}")
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_factors = np.asarray(item_factors, dtype=np.float32)
+        self.mode = mode
+        self.reg = float(reg)
+        self.alpha = float(alpha)
+        self.global_mean = float(global_mean)
+        self.manifest = None
+        self.version = None
+        self._positions = None
+        self._gram = None
+        self._unit = None
+        self.ann = None
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    @property
+    def factors(self):
+        return self.item_factors.shape[1]
+
+    @property
+    def positions(self):
+        """movieId -> position lookup, built on first use."""
+        if self._positions is None:
+            self._positions = {mid: pos for pos, mid in enumerate(self.item_ids.tolist())}
+        return self._positions
+
+    @property
+    def gram(self):
+        """Y^T Y over all items (implicit fold-in), computed once."""
+        if self._gram is None:
+            Y = self.item_factors.astype(np.float64)
+            self._gram = Y.T @ Y
+        return self._gram
+
+    @property
+    def unit_factors(self):
+        """Item factors scaled to unit length (cosine neighbors), computed once."""
+        if self._unit is None:
+            norms = np.linalg.norm(self.item_factors, axis=1, keepdims=True)
+            self._unit = np.divide(self.item_factors, norms, out=np.zeros_like(self.item_factors), where=norms > 0)
+        return self._unit
+
+    def build_ann(self, n_lists=None, iterations=10):
+        """Partition the items for approximate search (saved with the model)."""
+        self.ann = IVFIndex.build(self.item_factors, n_lists=n_lists, iterations=iterations)
+        return self.ann
+
+    def use_ann(self):
+        return self.ann is not None and len(self) >= ANN_MIN_ITEMS
+
+    def warm(self):
+        """Fault the factors into the page cache and build the lookups used while serving."""
+        _ = self.positions
+        if self.ann is not None:
+            for array in (self.ann.centroids, self.ann.offsets, self.ann.order):
+                np.add.reduce(array, dtype=np.float64)
+        _ = self.unit_factors
+        if self.mode == "implicit":
+            _ = self.gram
+        return self
+
+    # Scoring
+    def fold_in(self, movieIds, ratings):
+        """
+        Solve for the user factor that best explains the given ratings with the
+        item factors fixed (the same update training applies to users).
+        Returns None if none of the movies are in the model.
+        """
+        known = [(self.positions[m], float(r)) for m, r in zip(movieIds, ratings) if m in self.positions]
+        if not known:
+            return None
+        rows = np.fromiter((p for p, _ in known), dtype=np.int64, count=len(known))
+        values = np.fromiter((r for _, r in known), dtype=np.float64, count=len(known))
+        Y = self.item_factors[rows].astype(np.float64)
+        eye = np.eye(self.factors)
+
+        if self.mode == "explicit":
+            A = Y.T @ Y + self.reg * len(rows) * eye
+            b = Y.T @ (values - self.global_mean)
+        else:
+            confidence = 1.0 + self.alpha * values
+            A = self.gram + (Y.T * (confidence - 1.0)) @ Y + self.reg * eye
+            b = Y.T @ confidence
+        return np.linalg.solve(A, b)
+
+    def score(self, movieIds, ratings):
+        """
+        Predicted preference of a user with these ratings for every position
+        (float64); all -inf if none of the rated movies are in the model.
+        """
+        user = self.fold_in(movieIds, ratings)
+        if user is None:
+            return np.full(len(self), -np.inf)
+        scores = (self.item_factors @ user.astype(np.float32)).astype(np.float64)
+        return scores + self.global_mean if self.mode == "explicit" else scores
+
+    def recommend(self, movieIds, ratings, k=10, exclude=None, nprobe=ANN_NPROBE):
+        """
+        Positions of the k highest scoring movies for a user with these ratings,
+        best first, skipping `exclude`; empty if none of the rated movies are known.
+        """
+        user = self.fold_in(movieIds, ratings)
+        if user is None:
+            return np.empty(0, dtype=np.int64)
+        return self._search(user, self.item_factors, k, exclude, nprobe)[0]
+
+    def neighbors(self, movieId, top_n=50, nprobe=ANN_NPROBE):
+        """Return (positions, cosine similarities) of the top_n positively similar movies, best first."""
+        pos = self.positions.get(movieId)
+        if pos is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        unit = self.unit_factors
+        top, sims = self._search(unit[pos], unit, top_n, [pos], nprobe)
+        positive = sims > 0
+        return top[positive], sims[positive]
+
+    def _search(self, query, vectors, k, exclude, nprobe):
+        """Top-k rows of vectors by inner product with query: IVF when enabled, otherwise exact."""
+        if self.use_ann():
+            return self.ann.search(query, vectors, k, nprobe=nprobe, exclude=exclude)
+        scores = vectors @ np.asarray(query, dtype=np.float32)
+        if exclude is not None and len(exclude):
+            scores[np.asarray(exclude, dtype=np.int64)] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+    # Persistence
+    def save(self, directory, metadata=None):
+        """Write item_factors.npy (and the IVF arrays) plus a JSON manifest (written last)."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "item_factors.npy"), np.ascontiguousarray(self.item_factors))
+        manifest = {
+            "format": "item_factors",
+            "format_version": FORMAT_VERSION,
+            "n_items": len(self),
+            "factors": self.factors,
+            "mode": self.mode,
+            "reg": self.reg,
+            "alpha": self.alpha,
+            "global_mean": self.global_mean,
+            "item_ids": self.item_ids.tolist(),
+            "ann": self.ann.save(directory) if self.ann is not None else None,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "metadata": metadata or {},
+        }
+        tmp_path = os.path.join(directory, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+        return manifest
+
+    @staticmethod
+    def read_manifest(directory):
+        """Return the parsed manifest of a factor model directory."""
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != "item_factors":
+            raise ValueError(f"{directory} does not contain an item factor model")
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported factor model format version: {manifest.get('format_version')}")
+        return manifest
+
+    @staticmethod
+    def load(directory, mmap=True):
+        """Open a model written by save(); with mmap=True the factors are shared through the page cache."""
+        manifest = FactorModel.read_manifest(directory)
+        factors = np.load(os.path.join(directory, "item_factors.npy"), mmap_mode="r" if mmap else None)
+        if factors.shape != (manifest["n_items"], manifest["factors"]):
+            raise ValueError(f"item_factors.npy in {directory} does not match the manifest")
+        model = FactorModel(manifest["item_ids"], factors, mode=manifest["mode"], reg=manifest["reg"],
+                            alpha=manifest["alpha"], global_mean=manifest["global_mean"])
+        if manifest.get("ann"):
+            model.ann = IVFIndex.load(directory, manifest["ann"], mmap=mmap)
+        model.manifest = manifest
+        return model
@@ -0,0 +1,192 @@
+"""
+Versioned schema migrations (indexes for the hot query paths, ratings triggers).
+
+Each migration is (version, description, apply(cursor)); applied versions are
+recorded in schema_migrations and pending ones run in version order. MySQL
+commits DDL implicitly, so every step is written to be safe to re-run:
+add_index() checks information_schema first, and a migration that failed part
+way is simply applied again.
+
+Run from the project root:
+    python -m app.models.migrations            # apply pending migrations
+    python -m app.models.migrations --status   # list applied / pending
+"""
+
+import sys
+from app.config.db_connection import connecting_db
+import pymysql.cursors
+from app.models.rating_stats import MovieRatingStats
+from app.models.rating_events import RatingEvent
+from app.models.ratings_data import Rating
+
+
+def index_exists(cursor, table, name):
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, name),
+    )
+    return cursor.fetchone() is not None
+
+
+def add_index(cursor, table, name, columns, unique=False):
+    """CREATE [UNIQUE] INDEX unless an index with that name exists; returns True if created."""
+    if index_exists(cursor, table, name):
+        return False
+    cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({columns})")
+    return True
+
+
+# -------------------- Migrations --------------------
+def _ratings_user_movie_unique(cursor):
+    """One rating per (user, movie): Rating.save's lookup becomes a unique-key probe and upserts become possible."""
+    if index_exists(cursor, "ratings", "uq_ratings_user_movie"):
+        return
+    # keep the newest of any duplicated (user, movie) ratings so the unique key can be built
+    cursor.execute(
+        """
+        SELECT older.rating_id, older.user_email, older.movieId, older.rating, newest.rating AS kept_rating
+        FROM ratings older
+        JOIN (
+            SELECT user_email, movieId, MAX(rating_id) AS keep_id
+            FROM ratings
+            GROUP BY user_email, movieId
+            HAVING COUNT(*) > 1
+        ) dup ON dup.user_email = older.user_email AND dup.movieId = older.movieId AND older.rating_id < dup.keep_id
+        JOIN ratings newest ON newest.rating_id = dup.keep_id
+        FOR UPDATE
+        """
+    )
+    removed = cursor.fetchall()
+    for start in range(0, len(removed), 1000):
+        ids = [row["rating_id"] for row in removed[start:start + 1000]]
+        cursor.execute(f"DELETE FROM ratings WHERE rating_id IN ({', '.join(['%s'] * len(ids))})", ids)
+    # one event per removed row, old -> surviving rating, so the incremental neighbor
+    # updater drops the duplicate from its sums like any other rating change
+    RatingEvent.record_many(
+        cursor, [(row["user_email"], row["movieId"], row["rating"], row["kept_rating"]) for row in removed]
+    )
+    cursor.connection.commit()
+    if removed:
+        MovieRatingStats.rebuild()
+    add_index(cursor, "ratings", "uq_ratings_user_movie", "user_email, movieId", unique=True)
+
+
+def _ratings_recent_activity(cursor):
+    """Trending by activity scans a recent timestamp range grouped by movie; (timestamp, movieId) covers it."""
+    add_index(cursor, "ratings", "idx_ratings_timestamp_movie", "timestamp, movieId")
+
+
+def _watchlist_by_added(cursor):
+    """A user's watchlist and the admin list are both ordered by added_at DESC."""
+    add_index(cursor, "watchlist", "idx_watchlist_user_added", "user_email, added_at")
+    add_index(cursor, "watchlist", "idx_watchlist_added", "added_at")
+
+
+def _movies_active_release(cursor):
+    """
+    Active-movie lists read (is_active, release_date) in release order; MAX(updated_at)
+    is the popularity snapshot fingerprint. genres/title LIKE '%...%' cannot use a
+    b-tree index and are left to scan.
+    """
+    add_index(cursor, "movies", "idx_movies_active_release", "is_active, release_date")
+    add_index(cursor, "movies", "idx_movies_updated", "updated_at")
+
+
+def _ratings_triggers(cursor):
+    """
+    Stats and event rows are written by triggers on ratings instead of by each
+    caller, so Rating.save is one statement. The aggregates were kept by the
+    application until now, so they are already current.
+    """
+    Rating.install_triggers(cursor)
+
+
+MIGRATIONS = [
+    (1, "ratings: unique (user_email, movieId)", _ratings_user_movie_unique),
+    (2, "ratings: (timestamp, movieId) for trending activity", _ratings_recent_activity),
+    (3, "watchlist: (user_email, added_at) and (added_at)", _watchlist_by_added),
+    (4, "movies: (is_active, release_date) and (updated_at)", _movies_active_release),
+    (5, "ratings: stats/event triggers", _ratings_triggers),
+]
+
+
+class Migrations:
+    # Table setup
+    @staticmethod
+    def create_table():
+        """Create schema_migrations table if not exists."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            sql = """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+            cursor.execute(sql)
+            conn.commit()
+            return {"success": True, "message": "Schema migrations table ready in database"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def applied():
+        """Applied migration versions."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+            return {"success": True, "data": [row["version"] for row in cursor.fetchall()]}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def apply(target=None, migrations=MIGRATIONS):
+        """Apply pending migrations up to target (default: all), in version order."""
+        done = Migrations.applied()
+        if not done["success"]:
+            return done
+        pending = [m for m in sorted(migrations, key=lambda m: m[0])
+                   if m[0] not in done["data"] and (target is None or m[0] <= target)]
+        applied, version = [], None
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            for version, description, migrate in pending:
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description),
+                )
+                conn.commit()
+                applied.append(version)
+            return {"success": True, "message": f"{len(applied)} migrations applied", "data": applied}
+        except Exception as e:
+            conn.rollback()
+            return {"success": False, "error": f"migration {version} failed: {e}", "data": applied}
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    Migrations.create_table()
+    if "--status" in sys.argv:
+        res = Migrations.applied()
+        if not res["success"]:
+            print(res["error"])
+        else:
+            for version, description, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in res['data'] else 'pending'}  {description}")
+    else:
+        res = Migrations.apply()
+        print(res.get("message") or res.get("error"))
@@ -0,0 +1,80 @@
+"""
+Versioned on-disk publishing shared by the serving models.
+
+Published models live under <root>/versions/<version>/ with <root>/CURRENT
+naming the live one; replacing CURRENT is the atomic switch readers poll.
+Subclasses provide save(directory, metadata) and load(directory, mmap) and
+write manifest.json last, so a version directory without one is incomplete.
+"""
+
+import os
+import shutil
+from datetime import datetime
+
+
+class VersionedModel:
+    version = None
+
+    def publish(self, root, metadata=None, keep=3):
+        """
+        Save as a new version under root/versions/ and make it current by
+        atomically replacing root/CURRENT. Keeps the newest `keep` versions.
+        Returns the version name.
+        """
+        versions_dir = os.path.join(root, "versions")
+        os.makedirs(versions_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        seq = 0
+        while os.path.exists(os.path.join(versions_dir, f"{stamp}-{seq:03d}")):
+            seq += 1
+        version = f"{stamp}-{seq:03d}"
+        self.save(os.path.join(versions_dir, version), metadata=dict(metadata or {}, version=version))
+
+        type(self).activate(root, version)
+        self.version = version
+
+        # old versions may still be mapped by readers; on POSIX unlinking is safe,
+        # elsewhere a failed delete is retried on the next publish
+        for old in sorted(os.listdir(versions_dir))[:-keep] if keep else []:
+            if old != version:
+                shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+        return version
+
+    @classmethod
+    def activate(cls, root, version):
+        """Point root/CURRENT at an existing version (publishing, or rolling back)."""
+        if not os.path.exists(os.path.join(root, "versions", version, "manifest.json")):
+            raise ValueError(f"No published {cls.__name__} version {version!r} in {root}")
+        tmp_path = os.path.join(root, f"CURRENT.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(root, "CURRENT"))
+
+    @staticmethod
+    def versions(root):
+        """Published version names under root, oldest first."""
+        try:
+            return sorted(os.listdir(os.path.join(root, "versions")))
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def current_version(root):
+        """Name of the live version under root, or None for an unversioned (legacy) directory."""
+        try:
+            with open(os.path.join(root, "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load_current(cls, root, mmap=True):
+        """Open the live version under root, falling back to a model saved directly in root."""
+        version = cls.current_version(root)
+        model = cls.load(os.path.join(root, "versions", version) if version else root, mmap=mmap)
+        model.version = version
+        return model
+
+    @classmethod
+    def exists(cls, root):
+        return cls.current_version(root) is not None or os.path.exists(os.path.join(root, "manifest.json"))
@@ -2,6 +2,8 @@ from app.config.db_connection import connecting_db
 import pandas as pd
 import pymysql.cursors
 from app.utils.logging_decorator import log_call
+from app.models.bulk_loader import BulkLoader
+from app.utils.pagination import paginate
 
 class Movie:
     # Table setup
@@ -39,53 +41,52 @@ class Movie:
 
     # Bulk insert
     @staticmethod
-    def bulk_insert_from_csv(csv_path):
-        """Insert multiple movies from CSV; use in setup only."""
-        try:
-            df = pd.read_csv(csv_path)
-            conn = connecting_db()
-            cursor = conn.cursor()
+    def bulk_insert_from_csv(csv_path, **options):
+        """
+        Load movies from CSV in committed chunks (resumable); use in setup only.
+        options are passed to BulkLoader.load (chunk_rows, batch_size, load_data, resume).
+        """
+        def prepare(chunk):
+            language = chunk["original_language"] if "original_language" in chunk else pd.Series("en", index=chunk.index)
+            poster = chunk["poster_path"] if "poster_path" in chunk else pd.Series(None, index=chunk.index, dtype=object)
+            movies = pd.DataFrame({
+                "movieId": chunk["movieId"],
+                "title": chunk.get("title"), "genres": chunk.get("genres"), "overview": chunk.get("overview"),
+                "release_date": chunk.get("release_date"), "runtime": chunk.get("runtime"),
+                "popularity": chunk.get("popularity"), "vote_average": chunk.get("vote_average"),
+                "vote_count": chunk.get("vote_count"),
+                "language": language.fillna("en"),
+                "poster_path": poster.fillna("https://via.placeholder.com/500x750?text=No+Image"),
+            })
+            return [("movies", movies)]
 
-            sql = """
-            INSERT INTO movies (
-                movieId, title, genres, overview, release_date, runtime,
-                popularity, vote_average, vote_count, language,
-                poster_path, is_active, created_at, updated_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, TRUE, NOW(), NOW())
-            """
-            for _, row in df.iterrows():
-                poster = row.get("poster_path") if pd.notna(row.get("poster_path")) else "https://via.placeholder.com/500x750?text=No+Image"
-                cursor.execute(sql, (
-                    row.get("movieId"),
-                    row.get("title"), row.get("genres"), row.get("overview"), row.get("release_date"), row.get("runtime"),
-                    row.get("popularity"), row.get("vote_average"), row.get("vote_count"),
-                    row.get("original_language", "en"), poster,
-                ))
+        return BulkLoader.load("movies", csv_path, prepare, **options)
 
-            conn.commit()
-            return {"success": True, "message": f"{len(df)} movies inserted from {csv_path}"}
+    # User CRUD
+    @staticmethod
+    @log_call(log_args=True, log_result=False)
+    def fetch_all(active_only=True, limit=50, page_token=None):
+        """Fetch a page of movies in movieId order (optionally only active); keyset-paginated by page_token."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            where = ["is_active=TRUE"] if active_only else []
+            page = paginate(cursor, "SELECT * FROM movies", where, [], ["movieId"], limit, page_token)
+            return {"success": True, **page}
         except Exception as e:
-            conn.rollback()
             return {"success": False, "error": str(e)}
         finally:
             conn.close()
 
-    # User CRUD
     @staticmethod
-    @log_call(log_args=True, log_result=False)
-    def fetch_all(active_only=True, limit=50, offset=0):
-        """Fetch all movies (optionally only active). Supports pagination."""
+    def count(active_only=True):
+        """Number of (optionally active) movies, counted in the database."""
         try:
             conn = connecting_db()
             cursor = conn.cursor(pymysql.cursors.DictCursor)
-            query = "SELECT * FROM movies"
-            if active_only:
-                query += " WHERE is_active=TRUE"
-            query += " LIMIT %s OFFSET %s"
-            cursor.execute(query, (limit, offset))
-            movies = cursor.fetchall()
-            return {"success": True, "data": movies}
+            where = " WHERE is_active=TRUE" if active_only else ""
+            cursor.execute("SELECT COUNT(*) AS n FROM movies" + where)
+            return {"success": True, "data": int(cursor.fetchone()["n"])}
         except Exception as e:
             return {"success": False, "error": str(e)}
         finally:
@@ -106,6 +107,25 @@ class Movie:
         finally:
             conn.close()
 
+    @staticmethod
+    @log_call(log_args=True, log_result=False)
+    def fetch_by_ids(movie_ids):
+        """Fetch several movies in one query, returned in the order of movie_ids (missing IDs skipped)."""
+        movie_ids = list(dict.fromkeys(int(mid) for mid in movie_ids))
+        if not movie_ids:
+            return {"success": True, "data": []}
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            placeholders = ", ".join(["%s"] * len(movie_ids))
+            cursor.execute(f"SELECT * FROM movies WHERE movieId IN ({placeholders})", tuple(movie_ids))
+            by_id = {int(row["movieId"]): row for row in cursor.fetchall()}
+            return {"success": True, "data": [by_id[mid] for mid in movie_ids if mid in by_id]}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
     @staticmethod
     @log_call(log_args=True, log_result=False)
     def search_by_title(keyword):
@@ -124,18 +144,14 @@ class Movie:
 
     @staticmethod
     @log_call(log_args=True, log_result=False)
-    def fetch_by_genre(genre: str, limit=20, offset=0, active_only=True):
-        """Fetch movies filtered by genre (supports pagination)."""
+    def fetch_by_genre(genre: str, limit=20, page_token=None, active_only=True):
+        """Fetch a page of movies filtered by genre in movieId order; keyset-paginated by page_token."""
         try:
             conn = connecting_db()
             cursor = conn.cursor(pymysql.cursors.DictCursor)
-            query = "SELECT * FROM movies WHERE genres LIKE %s"
-            if active_only:
-                query += " AND is_active=TRUE"
-            query += " LIMIT %s OFFSET %s"
-            cursor.execute(query, (f"%{genre}%", limit, offset))
-            movies = cursor.fetchall()
-            return {"success": True, "data": movies}
+            where = ["genres LIKE %s"] + (["is_active=TRUE"] if active_only else [])
+            page = paginate(cursor, "SELECT * FROM movies", where, [f"%{genre}%"], ["movieId"], limit, page_token)
+            return {"success": True, **page}
         except Exception as e:
             return {"success": False, "error": str(e)}
         finally:
@@ -236,10 +252,16 @@ class Movie:
 
     @staticmethod
     def delete_movie(movie_id):
-        """Permanently delete a movie from DB."""
+        """
+        Permanently delete a movie from DB.
+        Its ratings are deleted first in the same transaction: the ON DELETE CASCADE
+        would remove them without firing the ratings triggers, so no removal events
+        would reach the incremental neighbor updater.
+        """
         try:
             conn = connecting_db()
             cursor = conn.cursor()
+            cursor.execute("DELETE FROM ratings WHERE movieId=%s", (movie_id,))
             cursor.execute("DELETE FROM movies WHERE movieId=%s", (movie_id,))
             conn.commit()
             return {"success": True, "message": f"Movie {movie_id} permanently deleted"}
@@ -0,0 +1,101 @@
+"""
+Append-only log of rating changes, consumed by the incremental model updater.
+
+The triggers on ratings write one event per changed row (change_sql), so an
+event is committed (or rolled back) together with the rating change it
+describes. old_rating NULL means an insert, new_rating NULL a delete.
+"""
+
+from app.config.db_connection import connecting_db
+import pymysql.cursors
+
+
+class RatingEvent:
+    # Table setup
+    @staticmethod
+    def create_table():
+        """Create rating_events table if not exists."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            sql = """
+            CREATE TABLE IF NOT EXISTS rating_events (
+                event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                user_email VARCHAR(100) NOT NULL,
+                movieId INT NOT NULL,
+                old_rating FLOAT NULL,
+                new_rating FLOAT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_rating_events_created (created_at)
+            )
+            """
+            cursor.execute(sql)
+            conn.commit()
+            return {"success": True, "message": "Rating events table ready in database"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    # Write path (run by the ratings triggers, or on the caller's cursor)
+    @staticmethod
+    def change_sql(user_email, movieId, old="NULL", new="NULL"):
+        """INSERT of one event (all arguments are SQL expressions)."""
+        return f"""
+        INSERT INTO rating_events (user_email, movieId, old_rating, new_rating)
+        VALUES ({user_email}, {movieId}, {old}, {new})
+        """
+
+    @staticmethod
+    def record_many(cursor, changes):
+        """Log many (user_email, movieId, old, new) changes written outside the triggers; does not commit."""
+        rows = [change for change in changes if change[2] is not None or change[3] is not None]
+        if rows:
+            cursor.executemany(
+                "INSERT INTO rating_events (user_email, movieId, old_rating, new_rating) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    # Read path
+    @staticmethod
+    def fetch_since(event_id, limit=10000, include=()):
+        """
+        Events with event_id > event_id, oldest first, plus any of the ids in
+        include (earlier ids that were missing when last read and may have
+        committed since).
+        """
+        include = list(include)
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            extra = f" OR event_id IN ({', '.join(['%s'] * len(include))})" if include else ""
+            cursor.execute(
+                f"""
+                SELECT event_id, user_email, movieId, old_rating, new_rating
+                FROM rating_events
+                WHERE event_id > %s{extra}
+                ORDER BY event_id
+                LIMIT %s
+                """,
+                (event_id, *include, limit + len(include)),
+            )
+            return {"success": True, "data": cursor.fetchall()}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def prune(before_event_id):
+        """Delete events up to before_event_id (pass a cursor with no open gaps below it)."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM rating_events WHERE event_id <= %s", (before_event_id,))
+            deleted = cursor.rowcount
+            conn.commit()
+            return {"success": True, "message": f"Pruned {deleted} rating events"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
@@ -0,0 +1,185 @@
+"""
+Per-movie rating aggregates kept in step with the ratings table.
+
+The AFTER INSERT/UPDATE/DELETE triggers on ratings (see Rating.install_triggers)
+run change_sql() for every row written, so the aggregate changes commit (or roll
+back) with the rating itself. Run `python -m app.models.rating_stats` to
+backfill or repair drift.
+"""
+
+import math
+from app.config.db_connection import connecting_db
+import pymysql.cursors
+
+# half-star histogram: bucket b counts ratings that round to b / 2
+BUCKETS = 11
+HIST_COLUMNS = [f"hist_{b}" for b in range(BUCKETS)]
+
+
+class MovieRatingStats:
+    # Table setup
+    @staticmethod
+    def create_table():
+        """Create movie_rating_stats table if not exists."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            hist = ",\n".join(f"                {col} INT NOT NULL DEFAULT 0" for col in HIST_COLUMNS)
+            sql = f"""
+            CREATE TABLE IF NOT EXISTS movie_rating_stats (
+                movieId INT PRIMARY KEY,
+                rating_sum DOUBLE NOT NULL DEFAULT 0,
+                rating_count INT NOT NULL DEFAULT 0,
+                rating_sq_sum DOUBLE NOT NULL DEFAULT 0,
+{hist},
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (movieId) REFERENCES movies(movieId) ON DELETE CASCADE
+            )
+            """
+            cursor.execute(sql)
+            conn.commit()
+            return {"success": True, "message": "Movie rating stats table ready in database"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    # Write path (run by the ratings triggers)
+    @staticmethod
+    def change_expressions(old=None, new=None):
+        """
+        SQL increments of every aggregate column for one rating change; old/new are
+        SQL expressions for the previous and new rating (None: insert / delete).
+        Buckets use FLOOR(rating * 2 + 0.5), as rebuild() does.
+        """
+        def diff(term):
+            added = term(new) if new else "0"
+            return f"{added} - {term(old)}" if old else added
+
+        expressions = {
+            "rating_sum": diff(lambda r: r),
+            "rating_count": diff(lambda r: "1"),
+            "rating_sq_sum": diff(lambda r: f"{r} * {r}"),
+        }
+        for b, col in enumerate(HIST_COLUMNS):
+            expressions[col] = diff(lambda r, b=b: f"(FLOOR({r} * 2 + 0.5) = {b})")
+        return expressions
+
+    @staticmethod
+    def change_sql(movieId, old=None, new=None):
+        """Upsert folding one rating change into movie movieId's row (all arguments are SQL expressions)."""
+        expressions = MovieRatingStats.change_expressions(old, new)
+        columns = list(expressions)
+        return f"""
+        INSERT INTO movie_rating_stats (movieId, {", ".join(columns)})
+        VALUES ({movieId}, {", ".join(expressions.values())})
+        ON DUPLICATE KEY UPDATE {", ".join(f"{c} = {c} + VALUES({c})" for c in columns)}
+        """
+
+    # Read path
+    @staticmethod
+    def fetch(movieIds):
+        """Return {movieId: {avg_rating, rating_count, rating_stddev}} for the given movies."""
+        movieIds = list(dict.fromkeys(int(mid) for mid in movieIds))
+        if not movieIds:
+            return {"success": True, "data": {}}
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            placeholders = ", ".join(["%s"] * len(movieIds))
+            cursor.execute(
+                f"""
+                SELECT movieId, rating_sum, rating_count, rating_sq_sum
+                FROM movie_rating_stats
+                WHERE movieId IN ({placeholders}) AND rating_count > 0
+                """,
+                tuple(movieIds),
+            )
+            stats = {}
+            for row in cursor.fetchall():
+                count = row["rating_count"]
+                mean = row["rating_sum"] / count
+                variance = max(row["rating_sq_sum"] / count - mean * mean, 0.0)
+                stats[int(row["movieId"])] = {
+                    "movieId": int(row["movieId"]),
+                    "avg_rating": mean,
+                    "rating_count": count,
+                    "rating_stddev": math.sqrt(variance),
+                }
+            return {"success": True, "data": stats}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def top_rated(k=10, min_ratings=5):
+        """Movies with more than min_ratings ratings, best average first."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            query = """
+                SELECT m.movieId, m.title, s.rating_sum / s.rating_count AS avg_rating,
+                       s.rating_count AS total_ratings
+                FROM movie_rating_stats s
+                JOIN movies m ON s.movieId = m.movieId
+                WHERE s.rating_count > %s
+                ORDER BY avg_rating DESC
+                LIMIT %s
+            """
+            cursor.execute(query, (min_ratings, k))
+            return {"success": True, "data": cursor.fetchall()}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def distribution():
+        """Global rating histogram as [{rating, count}], lowest rating first."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            sums = ", ".join(f"COALESCE(SUM({col}), 0) AS {col}" for col in HIST_COLUMNS)
+            cursor.execute(f"SELECT {sums} FROM movie_rating_stats")
+            row = cursor.fetchone() or {}
+            data = [
+                {"rating": b / 2, "count": int(row.get(col) or 0)}
+                for b, col in enumerate(HIST_COLUMNS)
+                if row.get(col)
+            ]
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    # Backfill / drift repair
+    @staticmethod
+    def rebuild():
+        """Recompute every movie's aggregates from the ratings table in one transaction."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            hist = ", ".join(f"SUM(FLOOR(rating * 2 + 0.5) = {b})" for b in range(BUCKETS))
+            cursor.execute("DELETE FROM movie_rating_stats")
+            cursor.execute(f"""
+                INSERT INTO movie_rating_stats (movieId, rating_sum, rating_count, rating_sq_sum, {", ".join(HIST_COLUMNS)})
+                SELECT movieId, SUM(rating), COUNT(*), SUM(rating * rating), {hist}
+                FROM ratings
+                GROUP BY movieId
+            """)
+            rebuilt = cursor.rowcount
+            conn.commit()
+            return {"success": True, "message": f"Rating stats rebuilt for {rebuilt} movies"}
+        except Exception as e:
+            conn.rollback()
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    MovieRatingStats.create_table()
+    res = MovieRatingStats.rebuild()
+    print(res.get("message") or res.get("error"))
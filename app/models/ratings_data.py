@@ -2,6 +2,45 @@ from datetime import datetime
 from app.config.db_connection import connecting_db
 import pymysql.cursors
 from app.utils.logging_decorator import log_call
+from app.models.rating_stats import MovieRatingStats
+from app.models.rating_events import RatingEvent
+
+# ratings per lookup / multi-row upsert in Rating.save_many
+SAVE_BATCH_SIZE = 500
+
+
+def trigger_statements():
+    """
+    CREATE TRIGGER statements that fold every ratings write into movie_rating_stats
+    and rating_events within the writing statement, from the row's OLD/NEW values.
+    Rows are never re-keyed in place, so an update only changes the rating.
+    FK cascades do not fire triggers: delete a user's or movie's ratings
+    explicitly before the parent row.
+    """
+    def changes(user, movie, old=None, new=None):
+        stats = MovieRatingStats.change_sql(movie, old, new).strip()
+        event = RatingEvent.change_sql(user, movie, old or "NULL", new or "NULL").strip()
+        return f"{stats};\n    {event};"
+
+    return {
+        "ratings_after_insert": f"""
+CREATE TRIGGER ratings_after_insert AFTER INSERT ON ratings FOR EACH ROW
+BEGIN
+    {changes("NEW.user_email", "NEW.movieId", new="NEW.rating")}
+END""",
+        "ratings_after_update": f"""
+CREATE TRIGGER ratings_after_update AFTER UPDATE ON ratings FOR EACH ROW
+BEGIN
+  IF NOT (OLD.rating <=> NEW.rating) THEN
+    {changes("NEW.user_email", "NEW.movieId", old="OLD.rating", new="NEW.rating")}
+  END IF;
+END""",
+        "ratings_after_delete": f"""
+CREATE TRIGGER ratings_after_delete AFTER DELETE ON ratings FOR EACH ROW
+BEGIN
+    {changes("OLD.user_email", "OLD.movieId", old="OLD.rating")}
+END""",
+    }
 
 class Rating:
     def __init__(self, user_email, movieId, rating, timestamp=None):
@@ -27,6 +66,7 @@ class Rating:
                 movieId INT NOT NULL,
                 rating FLOAT NOT NULL CHECK (rating >= 0.0 AND rating <= 5.0),
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uq_ratings_user_movie (user_email, movieId),
                 FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE,
                 FOREIGN KEY (movieId) REFERENCES movies(movieId) ON DELETE CASCADE
             )
@@ -39,34 +79,106 @@ class Rating:
         finally:
             conn.close()
 
+    @staticmethod
+    def install_triggers(cursor):
+        """Create the stats/event triggers that do not exist yet; returns the names created."""
+        created = []
+        for name, sql in trigger_statements().items():
+            cursor.execute(
+                "SELECT 1 FROM information_schema.triggers WHERE trigger_schema = DATABASE() AND trigger_name = %s",
+                (name,),
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(sql)
+                created.append(name)
+        return created
+
+    @staticmethod
+    def create_triggers():
+        """Create the ratings triggers if not exists (needs ratings, movie_rating_stats and rating_events)."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor()
+            Rating.install_triggers(cursor)
+            conn.commit()
+            return {"success": True, "message": "Ratings triggers ready in database"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
     # User CRUD
     def save(self):
-        """Insert or update a rating."""
+        """
+        Insert or update a rating with one upsert on the (user_email, movieId) key;
+        the ratings triggers update movie_rating_stats and rating_events from the
+        row's old and new values in the same statement. data.status is "inserted"
+        or "updated".
+        """
         try:
             conn = connecting_db()
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             cursor.execute(
-                "SELECT rating_id FROM ratings WHERE user_email=%s AND movieId=%s",
-                (self.user_email, self.movieId),
-            )
-            existing = cursor.fetchone()
-            if existing:
-                sql = """
-                UPDATE ratings
-                SET rating=%s, timestamp=%s
-                WHERE rating_id=%s
                 """
-                cursor.execute(sql, (self.rating, self.timestamp, existing["rating_id"]))
-                conn.commit()
-                return {"success": True, "message": "Rating updated successfully"}
-            else:
-                sql = """
                 INSERT INTO ratings (user_email, movieId, rating, timestamp)
                 VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(sql, (self.user_email, self.movieId, self.rating, self.timestamp))
-                conn.commit()
-                return {"success": True, "message": "New rating added successfully"}
+                ON DUPLICATE KEY UPDATE rating = VALUES(rating), timestamp = VALUES(timestamp)
+                """,
+                (self.user_email, self.movieId, self.rating, self.timestamp),
+            )
+            # affected rows: 1 inserted, 2 updated, 0 updated to the same value
+            inserted = cursor.rowcount == 1
+            conn.commit()
+            status = "inserted" if inserted else "updated"
+            message = "New rating added successfully" if inserted else "Rating updated successfully"
+            return {"success": True, "message": message, "data": {"movieId": self.movieId, "status": status}}
+        except Exception as e:
+            conn.rollback()
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def save_many(ratings, batch_size=SAVE_BATCH_SIZE):
+        """
+        Upsert many Rating objects (e.g. a user's imported history) in one transaction
+        with multi-row upserts; the triggers keep stats and events in step. One plain
+        SELECT per batch tells inserts from updates for the report. A later duplicate
+        of the same (user, movie) wins. data is one {"user_email", "movieId", "status"} per pair.
+        """
+        latest = {}
+        for r in ratings:
+            latest.pop((r.user_email, r.movieId), None)
+            latest[(r.user_email, r.movieId)] = r
+        rows = list(latest.values())
+        if not rows:
+            return {"success": True, "message": "No ratings to save", "data": []}
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            existing = set()
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                keys = ", ".join(["(%s, %s)"] * len(batch))
+                cursor.execute(
+                    f"SELECT user_email, movieId FROM ratings WHERE (user_email, movieId) IN ({keys})",
+                    tuple(v for r in batch for v in (r.user_email, r.movieId)),
+                )
+                existing.update((row["user_email"], int(row["movieId"])) for row in cursor.fetchall())
+                cursor.executemany(
+                    """
+                    INSERT INTO ratings (user_email, movieId, rating, timestamp)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE rating = VALUES(rating), timestamp = VALUES(timestamp)
+                    """,
+                    [(r.user_email, r.movieId, r.rating, r.timestamp) for r in batch],
+                )
+            conn.commit()
+            data = [{"user_email": r.user_email, "movieId": r.movieId,
+                     "status": "updated" if (r.user_email, int(r.movieId)) in existing else "inserted"}
+                    for r in rows]
+            inserted = sum(1 for row in data if row["status"] == "inserted")
+            return {"success": True, "message": f"{inserted} ratings added, {len(data) - inserted} updated", "data": data}
         except Exception as e:
             conn.rollback()
             return {"success": False, "error": str(e)}
@@ -101,6 +213,12 @@ class Rating:
         finally:
             conn.close()
 
+    @staticmethod
+    @log_call(log_args=True, log_result=False)
+    def fetch_movie_stats(movieIds):
+        """Fetch average rating and rating count for several movies (point lookups on movie_rating_stats)."""
+        return MovieRatingStats.fetch(movieIds)
+
     @staticmethod
     @log_call(log_args=True, log_result=False)
     def fetch_user_movie_rating(user_email, movieId):
@@ -121,7 +239,7 @@ class Rating:
 
 
     def delete(self):
-        """User deletes their own rating."""
+        """User deletes their own rating (the delete trigger updates stats and events)."""
         try:
             conn = connecting_db()
             cursor = conn.cursor()
@@ -151,6 +269,19 @@ class Rating:
         finally:
             conn.close()
 
+    @staticmethod
+    def count():
+        """Number of ratings, counted in the database."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT COUNT(*) AS n FROM ratings")
+            return {"success": True, "data": int(cursor.fetchone()["n"])}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
     @staticmethod
     def delete_by_admin(rating_id):
         """Admin deletes a rating by ID."""
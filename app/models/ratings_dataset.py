@@ -4,8 +4,16 @@ Handles bulk loading of demo ratings dataset for recommendations.
 """
 
 from app.config.db_connection import connecting_db
+from app.models.bulk_loader import BulkLoader
+from app.models.migrations import add_index
+from app.utils.pagination import paginate
 import pandas as pd
 
+# (table, index name, columns), created after the bulk load by DemoRating.create_indexes()
+DEMO_INDEXES = [
+    ("demo_ratings", "idx_demo_ratings_user", "user_id, movie_id"),
+]
+
 class DemoRating:
     # Table setup
     @staticmethod
@@ -27,7 +35,7 @@ class DemoRating:
                 movie_id INT NOT NULL,
                 rating FLOAT NOT NULL CHECK (rating >= 0.0 AND rating <= 5.0),
                 timestamp TIMESTAMP,
-                FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE
+                FOREIGN KEY (movie_id) REFERENCES movies(movieId) ON DELETE CASCADE
             )
             """
             cursor.execute(sql_users)
@@ -39,52 +47,63 @@ class DemoRating:
         finally:
             conn.close()
 
-    # Bulk insert
     @staticmethod
-    def bulk_insert_from_csv(csv_path):
-        """Insert demo ratings from CSV (one-time setup)."""
+    def create_indexes():
+        """
+        Add the secondary indexes of the demo tables. Run after the bulk load:
+        building an index once over the loaded rows is cheaper than maintaining it per insert.
+        """
         try:
-            df = pd.read_csv(csv_path)
             conn = connecting_db()
             cursor = conn.cursor()
-            sql_user = "INSERT IGNORE INTO demo_users (user_id) VALUES (%s)"
-            sql_rating = """
-            INSERT INTO demo_ratings (user_id, movie_id, rating, timestamp)
-            VALUES (%s, %s, %s, %s)
-            """
-            inserted = 0
-            for _, row in df.iterrows():
-                if not (0.0 <= float(row["rating"]) <= 5.0):
-                    continue
-                cursor.execute(sql_user, (int(row["userId"]),))
-                cursor.execute(sql_rating, (
-                    int(row["userId"]),
-                    int(row["movieId"]),
-                    float(row["rating"]),
-                    row["datetime"],
-                ))
-                inserted += 1
-            conn.commit()
-            return {"success": True, "message": f"{inserted} demo ratings inserted"}
+            created = [name for table, name, columns in DEMO_INDEXES if add_index(cursor, table, name, columns)]
+            return {"success": True, "message": f"Demo indexes ready ({len(created)} created)"}
         except Exception as e:
-            conn.rollback()
             return {"success": False, "error": str(e)}
         finally:
             conn.close()
 
+    # Bulk insert
+    @staticmethod
+    def bulk_insert_users_from_csv(csv_path, **options):
+        """Load the distinct demo users of a ratings CSV (no movies needed, so it can run alongside the movie load)."""
+        def prepare(chunk):
+            return [("demo_users", pd.DataFrame({"user_id": chunk["userId"].drop_duplicates()}))]
+
+        return BulkLoader.load("demo_users", csv_path, prepare, usecols=["userId"], **options)
+
+    @staticmethod
+    def bulk_insert_from_csv(csv_path, with_users=True, **options):
+        """
+        Load demo ratings (and, with_users, their users) from CSV in committed chunks (resumable; one-time setup).
+        Ratings outside 0-5 are skipped; movies must be loaded first. options are passed to BulkLoader.load.
+        """
+        def prepare(chunk):
+            chunk = chunk[chunk["rating"].between(0.0, 5.0)]
+            ratings = pd.DataFrame({
+                "user_id": chunk["userId"],
+                "movie_id": chunk["movieId"],
+                "rating": chunk["rating"].astype(float),
+                "timestamp": chunk["datetime"],
+            })
+            if not with_users:
+                return [("demo_ratings", ratings)]
+            return [("demo_users", pd.DataFrame({"user_id": chunk["userId"].drop_duplicates()})), ("demo_ratings", ratings)]
+
+        return BulkLoader.load("demo_ratings", csv_path, prepare,
+                               usecols=["userId", "movieId", "rating", "datetime"], **options)
+
     # Admin CRUD
     @staticmethod
-    def fetch_all(limit=None, offset=0):
-        """Admin fetch all demo ratings with optional pagination."""
+    def fetch_all(limit=None, page_token=None):
+        """Admin fetch all demo ratings; with limit, one keyset page in rating_id order."""
         try:
             conn = connecting_db()
             cursor = conn.cursor()
-            sql = "SELECT * FROM demo_ratings"
             if limit:
-                sql += " LIMIT %s OFFSET %s"
-                cursor.execute(sql, (limit, offset))
-            else:
-                cursor.execute(sql)
+                page = paginate(cursor, "SELECT * FROM demo_ratings", [], [], ["rating_id"], limit, page_token)
+                return {"success": True, **page}
+            cursor.execute("SELECT * FROM demo_ratings")
             rows = cursor.fetchall()
             return {"success": True, "data": rows}
         except Exception as e:
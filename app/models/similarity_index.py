@@ -0,0 +1,238 @@
+"""
+Sparse item-item neighbor index used for serving recommendations.
+
+Only the top-N most similar movies per movie are kept, stored as CSR arrays:
+row p (movie item_ids[p]) owns indices[indptr[p]:indptr[p+1]] with similarities
+in the matching slice of data. Memory is O(n * N) instead of O(n^2).
+
+On disk an index is a directory of raw .npy arrays (indptr, indices, data) and
+a manifest.json with the movieId mapping, dtypes and training metadata,
+published as versions through VersionedModel.
+"""
+
+import os
+import json
+from datetime import datetime
+import numpy as np
+from app.models.model_versions import VersionedModel
+
+FORMAT_VERSION = 1
+
+
+class SimilarityIndex(VersionedModel):
+    def __init__(self, item_ids, indptr, indices, data):
+        """Wrap CSR neighbor arrays; item_ids maps row/column position -> movieId."""
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.manifest = None
+        self.version = None
+        self._positions = None
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    @property
+    def positions(self):
+        """movieId -> position lookup, built on first use."""
+        if self._positions is None:
+            self._positions = {mid: pos for pos, mid in enumerate(self.item_ids.tolist())}
+        return self._positions
+
+    @property
+    def top_n(self):
+        """Largest neighbor list length in the index."""
+        return int(np.diff(self.indptr).max()) if len(self) else 0
+
+    # Building
+    @staticmethod
+    def from_dense(matrix, top_n=50, block_size=1024):
+        """
+        Build the index from a dense movies x movies similarity DataFrame.
+        Keeps the top_n positive neighbors of every movie, excluding itself.
+        Rows are processed in blocks so the temporary arrays stay small.
+        """
+        item_ids = matrix.columns.to_numpy()
+        row_pos = matrix.index.get_indexer(item_ids)
+        if (row_pos < 0).any():
+            raise ValueError("Similarity matrix index and columns must contain the same movies")
+
+        # reorder rows once so row and column positions refer to the same movie
+        values = matrix.to_numpy(dtype=np.float32)[row_pos]
+        n = len(item_ids)
+        # column p holds the similarities of movie p to every other movie
+        blocks = ((start, values[:, start:start + block_size].T.copy()) for start in range(0, n, block_size))
+        return SimilarityIndex.from_blocks(item_ids, blocks, top_n=top_n)
+
+    @staticmethod
+    def from_blocks(item_ids, blocks, top_n=50):
+        """
+        Build the index from consecutive row blocks of a similarity matrix.
+        `blocks` yields (start, block) with block[p] the similarities of movie
+        item_ids[start + p] to every movie; blocks are modified in place.
+        """
+        return SimilarityIndex.from_neighbor_lists(
+            item_ids,
+            ((start, *SimilarityIndex.select_block(start, block, top_n)) for start, block in blocks),
+        )
+
+    @staticmethod
+    def select_block(start, block, top_n):
+        """
+        Top-N neighbor lists of one row block (rows start..start+len(block)):
+        drops NaNs and each movie's similarity to itself, keeps positive values.
+        Returns (indices list, sims list), one entry per row.
+        """
+        np.nan_to_num(block, copy=False, nan=-np.inf)
+        rows = np.arange(len(block))
+        block[rows, start + rows] = -np.inf
+        return SimilarityIndex._select_top_n(block, top_n)
+
+    @staticmethod
+    def from_neighbor_lists(item_ids, chunks):
+        """
+        Assemble the index from consecutive (start, indices list, sims list)
+        chunks, e.g. select_block() results streamed back from workers.
+        """
+        n = len(item_ids)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices, data = [], []
+        expected = 0
+        for start, block_indices, block_data in chunks:
+            if start != expected:
+                raise ValueError(f"Expected block starting at row {expected}, got {start}")
+            for p, (idx, sims) in enumerate(zip(block_indices, block_data)):
+                indices.append(idx)
+                data.append(sims)
+                indptr[start + p + 1] = indptr[start + p] + len(idx)
+            expected = start + len(block_indices)
+        if expected != n:
+            raise ValueError(f"Blocks covered {expected} of {n} rows")
+
+        return SimilarityIndex(
+            item_ids,
+            indptr,
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+            np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+        )
+
+    @staticmethod
+    def _select_top_n(block, top_n):
+        """Per row of a (rows x n) similarity block, return sorted positive top_n (indices, sims)."""
+        keep = min(top_n, block.shape[1])
+        if keep <= 0:
+            return [np.empty(0, dtype=np.int32)] * len(block), [np.empty(0, dtype=np.float32)] * len(block)
+        top = np.argpartition(-block, keep - 1, axis=1)[:, :keep]
+        top_sims = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        positive = top_sims > 0
+        return (
+            [row[mask].astype(np.int32) for row, mask in zip(top, positive)],
+            [row[mask].astype(np.float32) for row, mask in zip(top_sims, positive)],
+        )
+
+    # Persistence
+    def save(self, directory, metadata=None):
+        """
+        Write the index as raw .npy arrays plus a JSON manifest.
+        The manifest is written last, so a directory without one is incomplete.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {"indptr": self.indptr, "indices": self.indices, "data": self.data}
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+        manifest = {
+            "format": "item_neighbors",
+            "format_version": FORMAT_VERSION,
+            "n_items": len(self),
+            "nnz": int(len(self.data)),
+            "top_n": self.top_n,
+            "dtypes": {name: str(array.dtype) for name, array in arrays.items()},
+            "item_ids": self.item_ids.tolist(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "metadata": metadata or {},
+        }
+        tmp_path = os.path.join(directory, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+        return manifest
+
+    @staticmethod
+    def read_manifest(directory):
+        """Return the parsed manifest of an index directory."""
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != "item_neighbors":
+            raise ValueError(f"{directory} does not contain an item neighbor index")
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format version: {manifest.get('format_version')}")
+        return manifest
+
+    @staticmethod
+    def load(directory, mmap=True):
+        """
+        Open an index written by save().
+        With mmap=True the arrays are read-only views of the page cache, so every
+        process serving the same files shares one copy and nothing is parsed up front.
+        """
+        manifest = SimilarityIndex.read_manifest(directory)
+        arrays = {}
+        for name, dtype in manifest["dtypes"].items():
+            array = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            if str(array.dtype) != dtype:
+                raise ValueError(f"{name}.npy has dtype {array.dtype}, manifest says {dtype}")
+            arrays[name] = array
+        if len(arrays["indptr"]) != manifest["n_items"] + 1 or len(arrays["data"]) != manifest["nnz"]:
+            raise ValueError(f"Index arrays in {directory} do not match the manifest")
+
+        index = SimilarityIndex(manifest["item_ids"], arrays["indptr"], arrays["indices"], arrays["data"])
+        index.manifest = manifest
+        return index
+
+    def warm(self):
+        """Fault the memory-mapped arrays into the page cache and build the movieId lookup."""
+        for array in (self.item_ids, self.indptr, self.indices, self.data):
+            np.add.reduce(array, dtype=np.float64)
+        _ = self.positions
+        return self
+
+    # Scoring
+    def neighbors(self, movieId):
+        """Return (neighbor positions, similarities) of a movie, best first; empty if unknown."""
+        pos = self.positions.get(movieId)
+        if pos is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        start, stop = self.indptr[pos], self.indptr[pos + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    def score(self, movieIds, ratings):
+        """
+        Accumulate rating-weighted neighbor similarities for a set of rated movies.
+        Returns a float64 score per position; positions no rated movie reaches are -inf.
+        Unknown movieIds are ignored.
+        """
+        scores = np.full(len(self), -np.inf)
+        known = [(self.positions[m], float(r)) for m, r in zip(movieIds, ratings) if m in self.positions]
+        if not known:
+            return scores
+
+        rows = np.fromiter((p for p, _ in known), dtype=np.int64, count=len(known))
+        weights = np.fromiter((r for _, r in known), dtype=np.float64, count=len(known))
+        starts, stops = self.indptr[rows], self.indptr[rows + 1]
+        lengths = stops - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return scores
+
+        # positions of every neighbor slot of the rated rows, concatenated
+        slots = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        cols = self.indices[slots]
+        contrib = self.data[slots].astype(np.float64) * np.repeat(weights, lengths)
+        reached = np.bincount(cols, minlength=len(self)) > 0
+        scores[reached] = np.bincount(cols, weights=contrib, minlength=len(self))[reached]
+        return scores
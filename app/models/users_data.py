@@ -77,11 +77,23 @@ class User:
         conn.close()
         return users
 
+    @staticmethod
+    def count():
+        """Number of users and of active users, counted in the database."""
+        try:
+            conn = connecting_db()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT COUNT(*) AS total, COALESCE(SUM(is_active), 0) AS active FROM users")
+            row = cursor.fetchone()
+            return {"success": True, "data": {"total": int(row["total"]), "active": int(row["active"])}}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            conn.close()
+
     @staticmethod
     def update_profile(email, name=None, password=None):
         """Update user name and/or password."""
-        conn = connecting_db()
-        cursor = conn.cursor()
         updates = []
         values = []
 
@@ -100,6 +112,8 @@ class User:
         values.append(email)
 
         sql = f"UPDATE users SET {', '.join(updates)} WHERE email=%s"
+        conn = connecting_db()
+        cursor = conn.cursor()
         cursor.execute(sql, tuple(values))
         conn.commit()
         conn.close()
@@ -4,10 +4,8 @@ from datetime import datetime
 from app.view.auth import AuthService
 from app.view.user import UserService
 from app.view.movie import MovieService
-from app.view.recommendation import RecommendationService
-from app.view.watchlist import WatchlistService
 from app.models.users_data import User
-from app.models.ratings_data import Rating
+from app.templates import caching
 
 # Session validation
 def validate_admin_session():
@@ -21,23 +19,14 @@ def overview_section():
     st.title("System Overview")
     st.markdown("---")
 
-    users = User.fetch_all(active_only=False)
-    movies = MovieService.list_movies(limit=1000)
-    ratings = Rating.fetch_all()
-    watchlists = WatchlistService.get_all_watchlists()
-
-    total_users = len(users)
-    active_users = len([u for u in users if u["is_active"]])
-    total_movies = len(movies.get("data", []))
-    total_ratings = len(ratings.get("data", [])) if ratings["success"] else 0
-    total_watchlist = len(watchlists.get("data", [])) if watchlists["success"] else 0
+    counts = caching.overview_counts()
 
     c1, c2, c3, c4, c5 = st.columns(5)
-    c1.metric("Total Users", total_users)
-    c2.metric("Active Users", active_users)
-    c3.metric("Movies", total_movies)
-    c4.metric("Ratings", total_ratings)
-    c5.metric("Watchlist Entries", total_watchlist)
+    c1.metric("Total Users", counts["total_users"])
+    c2.metric("Active Users", counts["active_users"])
+    c3.metric("Movies", counts["total_movies"])
+    c4.metric("Ratings", counts["total_ratings"])
+    c5.metric("Watchlist Entries", counts["total_watchlist"])
 
     st.markdown(f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     st.markdown("---")
@@ -58,14 +47,17 @@ def user_management_section():
             new_role = st.selectbox("New Role", ["user", "admin"])
             if submit and email:
                 User.update_role(email, new_role)
+                caching.overview_counts.clear()
                 st.success(f"Role updated for {email} → {new_role}")
         elif action == "Deactivate":
             if submit and email:
                 User.deactivate(email)
+                caching.overview_counts.clear()
                 st.warning(f"User {email} deactivated")
         elif action == "Activate":
             if submit and email:
                 User.activate(email)
+                caching.overview_counts.clear()
                 st.success(f"User {email} activated")
     st.markdown("---")
 
@@ -133,7 +125,7 @@ def movie_management_section():
 # Watchlist manager
 def watchlist_manager_section():
     st.header("Watchlist Manager (All Users)")
-    res = WatchlistService.get_all_watchlists()
+    res = caching.all_watchlists()
     if res["success"] and res["data"]:
         st.info(f"Total Watchlist Entries: {len(res['data'])}")
         st.dataframe(res["data"])
@@ -159,7 +151,7 @@ def analytics_section():
 
     with col1:
         st.subheader("Top Rated Movies")
-        top_movies = RecommendationService.get_top_rated_movies(k=10)
+        top_movies = caching.top_rated_movies(k=10)
         if top_movies["success"]:
             titles = [m["title"] for m in top_movies["data"]]
             ratings = [m["avg_rating"] for m in top_movies["data"]]
@@ -171,7 +163,7 @@ def analytics_section():
 
     with col2:
         st.subheader("Most Active Users")
-        active_users = RecommendationService.get_most_active_users(k=10)
+        active_users = caching.most_active_users(k=10)
         if active_users["success"]:
             emails = [u["email"] for u in active_users["data"]]
             counts = [u["rating_count"] for u in active_users["data"]]
@@ -183,7 +175,7 @@ def analytics_section():
 
     st.markdown("---")
     st.subheader("Rating Distribution")
-    rating_dist = RecommendationService.get_rating_distribution()
+    rating_dist = caching.rating_distribution()
     if rating_dist["success"]:
         x = [r["rating"] for r in rating_dist["data"]]
         y = [r["count"] for r in rating_dist["data"]]
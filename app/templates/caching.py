@@ -0,0 +1,161 @@
+"""
+Streamlit caching for the templates.
+
+Global lists and admin analytics are wrapped in st.cache_data (shared by all
+sessions, expired by TTL), the model registry and DB pool are held with
+st.cache_resource. Like the service-level @cached layer, only successful
+results are stored: a {"success": False} result is returned to the caller but
+not kept, so one transient DB error is not replayed to every session. Writes
+clear the affected caches through the service-layer invalidation hooks in
+app.view.cache, so a rerun after a rating or admin write never shows stale
+data.
+"""
+
+import os
+import functools
+import streamlit as st
+from app.config.db_connection import get_pool
+from app.view.cache import on_invalidate, CATALOG_TAG
+from app.view.recommendation import RecommendationService
+from app.view.watchlist import WatchlistService
+from app.models.users_data import User
+from app.models.movies_data import Movie
+from app.models.ratings_data import Rating
+
+LIST_CACHE_TTL = int(os.getenv("LIST_CACHE_TTL", "300"))
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "600"))
+
+
+class _FailedResult(Exception):
+    """Carries a failed result out of a cached function so st.cache_data does not store it."""
+
+    def __init__(self, result):
+        super().__init__(result.get("error"))
+        self.result = result
+
+
+def cache_data(ttl):
+    """st.cache_data(ttl) that stores only successful results; keeps .clear()."""
+    def decorate(fn):
+        @st.cache_data(ttl=ttl, show_spinner=False)
+        @functools.wraps(fn)
+        def cached(*args, **kwargs):
+            res = fn(*args, **kwargs)
+            if not res.get("success", True):
+                raise _FailedResult(res)
+            return res
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            try:
+                return cached(*args, **kwargs)
+            except _FailedResult as failed:
+                return failed.result
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+# Resources (one per server process)
+@st.cache_resource(show_spinner="Loading recommendation model...")
+def model_registry():
+    """Load the model once and follow newly published versions from a background thread."""
+    registry = RecommendationService._model_registry()
+    registry.get()
+    registry.start_polling()
+    return registry
+
+
+@st.cache_resource
+def db_pool():
+    return get_pool()
+
+
+def warm_resources():
+    """Open the pool and load the model before the first page renders."""
+    try:
+        db_pool()
+        model_registry()
+    except Exception:
+        pass  # the services report the error on first use
+
+
+# Global lists
+@cache_data(ttl=LIST_CACHE_TTL)
+def popular_movies(k=10):
+    return RecommendationService.get_popular_movies(k=k)
+
+
+@cache_data(ttl=LIST_CACHE_TTL)
+def popular_movies_by_genre(genre, k=10):
+    return RecommendationService.get_popular_movies_by_genre(genre, k=k)
+
+
+@cache_data(ttl=LIST_CACHE_TTL)
+def trending_movies(k=10, by_activity=False):
+    return RecommendationService.get_trending_movies(k=k, by_activity=by_activity)
+
+
+# Admin analytics
+@cache_data(ttl=ANALYTICS_CACHE_TTL)
+def top_rated_movies(k=10):
+    return RecommendationService.get_top_rated_movies(k=k)
+
+
+@cache_data(ttl=ANALYTICS_CACHE_TTL)
+def most_active_users(k=10):
+    return RecommendationService.get_most_active_users(k=k)
+
+
+@cache_data(ttl=ANALYTICS_CACHE_TTL)
+def rating_distribution():
+    return RecommendationService.get_rating_distribution()
+
+
+@cache_data(ttl=ANALYTICS_CACHE_TTL)
+def all_watchlists():
+    return WatchlistService.get_all_watchlists()
+
+
+@cache_data(ttl=ANALYTICS_CACHE_TTL)
+def overview_counts():
+    """Counts for the admin overview metrics (a failed source counts 0 and is not cached)."""
+    users = User.count()
+    movies = Movie.count()
+    ratings = Rating.count()
+    watchlists = WatchlistService.get_all_watchlists()
+    errors = [res["error"] for res in (users, movies, ratings, watchlists) if not res["success"]]
+    return {
+        "success": not errors,
+        "error": "; ".join(errors),
+        "total_users": users["data"]["total"] if users["success"] else 0,
+        "active_users": users["data"]["active"] if users["success"] else 0,
+        "total_movies": movies["data"] if movies["success"] else 0,
+        "total_ratings": ratings["data"] if ratings["success"] else 0,
+        "total_watchlist": len(watchlists.get("data", [])) if watchlists["success"] else 0,
+    }
+
+LIST_CACHES = (popular_movies, popular_movies_by_genre, trending_movies)
+RATING_CACHES = (top_rated_movies, most_active_users, rating_distribution, overview_counts)
+
+
+def clear_lists():
+    for fn in LIST_CACHES:
+        fn.clear()
+
+
+def clear_analytics():
+    for fn in RATING_CACHES + (all_watchlists,):
+        fn.clear()
+
+
+@on_invalidate
+def _clear_on_write(tags):
+    """Service-layer invalidation hook: rating writes carry user tags, movie writes the catalog tag."""
+    if tags is None or CATALOG_TAG in tags:
+        clear_lists()
+        clear_analytics()
+    elif any(tag.startswith("user:") for tag in tags):
+        for fn in RATING_CACHES:
+            fn.clear()
@@ -3,6 +3,7 @@ from app.view.movie import MovieService
 from app.view.recommendation import RecommendationService
 from app.view.rating import RatingService
 from app.view.watchlist import WatchlistService
+from app.view.user_context import UserContext
 
 # Star rating component
 def star_rating_component(label, current_value=0, max_stars=5, key_prefix="rating"):
@@ -19,9 +20,13 @@ def star_rating_component(label, current_value=0, max_stars=5, key_prefix="ratin
 
 # Watchlist button
 def add_to_watchlist_button(user_email, movie):
-    if st.button(f"Add '{movie['title']}' to Watchlist", key=f"add_{movie['movieId']}_{user_email}"):
+    ctx = UserContext.current(user_email)
+    if ctx.in_watchlist(movie["movieId"]):
+        st.caption(f"'{movie['title']}' is in your Watchlist")
+    elif st.button(f"Add '{movie['title']}' to Watchlist", key=f"add_{movie['movieId']}_{user_email}"):
         res = WatchlistService.add_to_watchlist(user_email, movie["movieId"], status="not_watched")
         if res["success"]:
+            ctx.record_watchlist_change()
             st.success("Added to Watchlist!")
         else:
             st.error(res["error"])
@@ -35,15 +40,15 @@ def search_movies_view():
         res = MovieService.search_movies(keyword)
         if res["success"] and res["data"]:
             user_email = st.session_state.get("user_email")
+            if user_email:
+                ctx = UserContext.begin(user_email)
             for movie in res["data"]:
                 st.image(movie.get("poster_path"), width=120)
                 st.write(movie['title'])
                 st.write(f"Avg Rating: {movie.get('avg_rating', 0)}")
                 st.write(f"Release Date: {movie.get('release_date', 'N/A')}")
                 if user_email:
-                    user_ratings = RatingService.get_user_ratings(user_email)
-                    existing = next((r["rating"] for r in user_ratings.get("data", [])
-                                    if r["movieId"] == movie["movieId"]), 0)
+                    existing = ctx.rating_for(movie["movieId"])
                     new_rating = star_rating_component(
                         f"Rate '{movie['title']}'",
                         int(existing),
@@ -52,6 +57,7 @@ def search_movies_view():
                     if new_rating and new_rating != int(existing):
                         res_rate = RatingService.add_or_update_rating(user_email, movie["movieId"], new_rating)
                         if res_rate["success"]:
+                            ctx.record_rating(movie["movieId"], new_rating)
                             st.success("Rating saved!")
                         else:
                             st.error(res_rate["error"])
@@ -80,9 +86,8 @@ def movie_details_view():
             st.markdown("---")
             st.subheader("Rate This Movie")
             if user_email:
-                user_ratings = RatingService.get_user_ratings(user_email)
-                existing = next((r["rating"] for r in user_ratings.get("data", [])
-                                 if r["movieId"] == movie["movieId"]), 0)
+                ctx = UserContext.begin(user_email)
+                existing = ctx.rating_for(movie["movieId"])
                 new_rating = star_rating_component(
                     "Your Rating:",
                     int(existing),
@@ -91,6 +96,7 @@ def movie_details_view():
                 if new_rating and new_rating != int(existing):
                     res_rate = RatingService.add_or_update_rating(user_email, movie["movieId"], new_rating)
                     if res_rate["success"]:
+                        ctx.record_rating(movie["movieId"], new_rating)
                         st.success("Rating updated!")
                     else:
                         st.error(res_rate["error"])
@@ -116,44 +122,65 @@ def movie_details_view():
     if st.button("Go to Recommendation Page"):
         st.switch_page("app/templates/recommendation_template.py")
 
+# Page navigation (keyset tokens kept in session state)
+def page_buttons(state_key, res):
+    prev_col, next_col = st.columns(2)
+    if prev_col.button("Previous", key=f"{state_key}_prev", disabled=not res.get("prev_token")):
+        st.session_state[state_key] = res["prev_token"]
+        st.rerun()
+    if next_col.button("Next", key=f"{state_key}_next", disabled=not res.get("next_token")):
+        st.session_state[state_key] = res["next_token"]
+        st.rerun()
+
 # List movies view
 def list_movies_view():
     st.subheader("All Movies")
     limit = st.slider("Movies per page", min_value=5, max_value=50, value=10)
-    offset = st.number_input("Offset", min_value=0, step=limit)
-
-    if st.button("Load Movies"):
-        res = MovieService.list_movies(limit=limit, offset=offset)
-        if res["success"] and res["data"]:
-            user_email = st.session_state.get("user_email")
-            for movie in res["data"]:
-                st.image(movie.get("poster_path"), width=120)
-                st.write(f"{movie['title']}  Avg Rating: {movie.get('avg_rating', 0)}")
-                if user_email:
-                    add_to_watchlist_button(user_email, movie)
-                st.markdown("---")
-        else:
-            st.warning(res.get("error", "No movies found."))
+    if st.session_state.get("movies_page_limit") != limit:
+        st.session_state["movies_page_limit"] = limit
+        st.session_state["movies_page_token"] = None  # restart from the first page
+
+    res = MovieService.list_movies(limit=limit, page_token=st.session_state.get("movies_page_token"))
+    if res["success"] and res["data"]:
+        user_email = st.session_state.get("user_email")
+        if user_email:
+            UserContext.begin(user_email)
+        for movie in res["data"]:
+            st.image(movie.get("poster_path"), width=120)
+            st.write(f"{movie['title']}  Avg Rating: {movie.get('avg_rating', 0)}")
+            if user_email:
+                add_to_watchlist_button(user_email, movie)
+            st.markdown("---")
+    else:
+        st.warning(res.get("error", "No movies found."))
+    if res["success"]:
+        page_buttons("movies_page_token", res)
 
 # Browse by genre view
 def browse_movies_by_genre_view():
     st.subheader("Browse Movies by Genre")
     genres = ["Action", "Comedy", "Drama", "Romance", "Thriller", "Sci-Fi", "Animation", "Horror", "Fantasy"]
     selected = st.selectbox("Choose a Genre", genres)
-
-    if st.button("Show Movies"):
-        res = MovieService.get_movies_by_genre(selected, limit=20)
-        if res["success"] and res["data"]:
-            user_email = st.session_state.get("user_email")
-            for movie in res["data"]:
-                st.image(movie.get("poster_path"), width=120)
-                st.write(f"{movie['title']}  Avg Rating: {movie.get('avg_rating', 0)}")
-                st.write(f"Genres: {movie.get('genres', 'N/A')}")
-                if user_email:
-                    add_to_watchlist_button(user_email, movie)
-                st.markdown("---")
-        else:
-            st.warning(f"No movies found for genre: {selected}")
+    if st.session_state.get("genre_page_genre") != selected:
+        st.session_state["genre_page_genre"] = selected
+        st.session_state["genre_page_token"] = None
+
+    res = MovieService.get_movies_by_genre(selected, limit=20, page_token=st.session_state.get("genre_page_token"))
+    if res["success"] and res["data"]:
+        user_email = st.session_state.get("user_email")
+        if user_email:
+            UserContext.begin(user_email)
+        for movie in res["data"]:
+            st.image(movie.get("poster_path"), width=120)
+            st.write(f"{movie['title']}  Avg Rating: {movie.get('avg_rating', 0)}")
+            st.write(f"Genres: {movie.get('genres', 'N/A')}")
+            if user_email:
+                add_to_watchlist_button(user_email, movie)
+            st.markdown("---")
+    else:
+        st.warning(f"No movies found for genre: {selected}")
+    if res["success"]:
+        page_buttons("genre_page_token", res)
 
 # Admin movie management view
 def admin_movie_view():
@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
 from app.view.recommendation import RecommendationService
+from app.templates import caching
 
 def recommendation_view(user_email):
     """Display all recommendation sections for the logged-in user."""
@@ -43,7 +44,7 @@ def recommendation_view(user_email):
 
     # Popular Movies Section
     st.subheader("Popular Picks")
-    popular = RecommendationService.get_popular_movies(k=8)
+    popular = caching.popular_movies(k=8)
     if popular["success"] and popular["data"]:
         cols = st.columns(4)
         for i, m in enumerate(popular["data"]):
@@ -58,7 +59,7 @@ def recommendation_view(user_email):
 
     # Trending Movies Section
     st.subheader("Trending Now")
-    trending = RecommendationService.get_trending_movies(k=8)
+    trending = caching.trending_movies(k=8)
     if trending["success"] and trending["data"]:
         cols = st.columns(4)
         for i, m in enumerate(trending["data"]):
@@ -96,7 +97,7 @@ def recommendation_view(user_email):
 
     with col1:
         st.markdown("**Top Rated Movies**")
-        top = RecommendationService.get_top_rated_movies(k=5)
+        top = caching.top_rated_movies(k=5)
         if top["success"]:
             for t in top["data"]:
                 st.write(f"{t['title']} — Average Rating: {round(t['avg_rating'], 2)}   ({t['total_ratings']} ratings)")
@@ -105,7 +106,7 @@ def recommendation_view(user_email):
 
     with col2:
         st.markdown("**Most Active Users**")
-        active = RecommendationService.get_most_active_users(k=5)
+        active = caching.most_active_users(k=5)
         if active["success"]:
             for a in active["data"]:
                 st.write(f"{a['email']} — {a['rating_count']} ratings")
@@ -115,7 +116,7 @@ def recommendation_view(user_email):
     st.markdown("---")
 
     st.markdown("**Rating Distribution**")
-    dist = RecommendationService.get_rating_distribution()
+    dist = caching.rating_distribution()
     if dist["success"] and dist["data"]:
         df = pd.DataFrame(dist["data"])
         fig, ax = plt.subplots()
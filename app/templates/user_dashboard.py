@@ -6,6 +6,9 @@ from app.view.watchlist import WatchlistService
 from app.view.rating import RatingService
 from app.view.recommendation import RecommendationService
 from app.view.user import UserService
+from app.view.user_context import UserContext
+from app.templates import caching
+from app.config.model_config import TRENDING_BY_ACTIVITY
 
 # Custom CSS theme (no branding or emojis)
 st.markdown("""
@@ -83,6 +86,7 @@ def star_rating_component(label, current_value=0, max_stars=5, movie_id=None, us
             new_rating = i + 1
             res_rate = RatingService.add_or_update_rating(user_email, movie_id, new_rating)
             if res_rate["success"]:
+                UserContext.current(user_email).record_rating(movie_id, new_rating)
                 st.success("Rating saved!")
                 st.rerun()
             else:
@@ -120,14 +124,17 @@ def movie_card(movie, user_email, section_prefix=""):
                 overview_short = overview[:150] + "..." if len(overview) > 150 else overview
                 st.markdown(f"<p style='color: #B3B3B3; margin: 10px 0;'>{overview_short}</p>", unsafe_allow_html=True)
             btn_col1, btn_col2 = st.columns(2)
+            ctx = UserContext.current(user_email)
             with btn_col1:
-                user_ratings = RatingService.get_user_ratings(user_email)
-                existing = next((r["rating"] for r in user_ratings.get("data", []) if r["movieId"] == movie["movieId"]), 0)
+                existing = ctx.rating_for(movie["movieId"])
                 star_rating_component("Your Rating:", int(existing), movie_id=movie['movieId'], user_email=user_email)
             with btn_col2:
-                if st.button("Add to Watchlist", key=f"add_{section_prefix}_{movie['movieId']}_{user_email}"):
+                if ctx.in_watchlist(movie["movieId"]):
+                    st.button("In Watchlist", key=f"add_{section_prefix}_{movie['movieId']}_{user_email}", disabled=True)
+                elif st.button("Add to Watchlist", key=f"add_{section_prefix}_{movie['movieId']}_{user_email}"):
                     res = WatchlistService.add_to_watchlist(user_email, movie["movieId"], status="not_watched")
                     if res["success"]:
+                        ctx.record_watchlist_change()
                         st.success("Added to Watchlist!")
                     else:
                         st.error(res["error"])
@@ -137,27 +144,28 @@ def movie_card(movie, user_email, section_prefix=""):
 def header_and_stats(user_email):
     st.markdown("<h1 style='text-align: center; margin-bottom: 2rem;'>Your Pixel Experience</h1>", unsafe_allow_html=True)
     st.markdown(f"<p style='text-align: center; font-size: 1.2rem; color: #B3B3B3;'>Welcome back, <span style='color: #E50914; font-weight: 700;'>{user_email.split('@')[0]}</span></p>", unsafe_allow_html=True)
-    ratings = RatingService.get_user_ratings(user_email)
-    watchlist = WatchlistService.get_user_watchlist(user_email)
+    ctx = UserContext.current(user_email)
+    ratings = list(ctx.ratings.values())
+    watchlist = list(ctx.watchlist.values())
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Ratings Given", len(ratings.get("data", [])))
+        st.metric("Ratings Given", len(ratings))
     with col2:
-        st.metric("Watchlist", len(watchlist.get("data", [])))
+        st.metric("Watchlist", len(watchlist))
     with col3:
-        if ratings.get("data"):
-            avg_rating = sum(r["rating"] for r in ratings["data"]) / len(ratings["data"])
+        if ratings:
+            avg_rating = sum(r["rating"] for r in ratings) / len(ratings)
             st.metric("Avg Rating", f"{avg_rating:.1f}/5")
         else:
             st.metric("Avg Rating", "0/5")
     with col4:
-        watched_count = len([w for w in watchlist.get("data", []) if w.get("status") == "watched"])
+        watched_count = len([w for w in watchlist if w.get("status") == "watched"])
         st.metric("Watched", watched_count)
 
 def trending_section(user_email):
     st.markdown("<h2>Trending Now</h2>", unsafe_allow_html=True)
     st.markdown("<p style='color: #B3B3B3; margin-bottom: 20px;'>Hot picks everyone's watching</p>", unsafe_allow_html=True)
-    res = RecommendationService.get_trending_movies(k=6)
+    res = caching.trending_movies(k=6, by_activity=TRENDING_BY_ACTIVITY)
     if res["success"] and res["data"]:
         for movie in res["data"]:
             movie_card(movie, user_email, "trend")
@@ -180,11 +188,11 @@ def personalized_recs_section(user_email):
 
 def because_you_watched(user_email):
     st.markdown("<h2>Because You Watched...</h2>", unsafe_allow_html=True)
-    top_movies = RatingService.get_user_ratings(user_email)
-    if not top_movies["success"] or not top_movies["data"]:
+    top_movies = list(UserContext.current(user_email).ratings.values())
+    if not top_movies:
         st.info("Rate some movies to see personalized recommendations based on your favorites!")
         return
-    sorted_ratings = sorted(top_movies["data"], key=lambda x: x["rating"], reverse=True)
+    sorted_ratings = sorted(top_movies, key=lambda x: x["rating"], reverse=True)
     if not sorted_ratings:
         st.info("Start rating movies to get recommendations!")
         return
@@ -216,7 +224,7 @@ def genre_explorer(user_email):
         st.session_state.show_genre_results = True
     if st.session_state.get("show_genre_results") and st.session_state.get("current_genre"):
         st.markdown(f"<h3>Results for: {st.session_state.current_genre}</h3>", unsafe_allow_html=True)
-        res = RecommendationService.get_popular_movies_by_genre(st.session_state.current_genre, k=10)
+        res = caching.popular_movies_by_genre(st.session_state.current_genre, k=10)
         if res["success"] and res["data"]:
             for movie in res["data"]:
                 movie_card(movie, user_email, "genre")
@@ -315,9 +323,9 @@ def watchlist_section(user_email):
 def insights_section(user_email):
     st.markdown("<h2>Your Insights</h2>", unsafe_allow_html=True)
     st.markdown("<p style='color: #B3B3B3; margin-bottom: 20px;'>Your viewing statistics and preferences</p>", unsafe_allow_html=True)
-    res = RatingService.get_user_ratings(user_email)
-    if res["success"] and res["data"]:
-        ratings = [r["rating"] for r in res["data"]]
+    rows = UserContext.current(user_email).ratings.values()
+    if rows:
+        ratings = [r["rating"] for r in rows]
         col1, col2, col3, col4 = st.columns(4)
         with col1: st.metric("Total Ratings", len(ratings))
         with col2: st.metric("Average Rating", f"{sum(ratings)/len(ratings):.2f}/5")
@@ -353,6 +361,7 @@ def profile_section(user_email):
 
 def user_dashboard():
     user_email = validate_session()
+    UserContext.begin(user_email)
     st.sidebar.markdown("<h2 style='color: #E50914; text-align: center;'>Pixel</h2>", unsafe_allow_html=True)
     st.sidebar.markdown("<p style='text-align: center; color: #B3B3B3; font-size: 0.9rem;'>Movie Recommendation System</p>", unsafe_allow_html=True)
     st.sidebar.markdown("---")
@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Instead of LIMIT/OFFSET, which makes MySQL read and discard every skipped row,
+a page starts right after (or before) the key of the last row seen:
+
+    WHERE (k1, k2) > (last_k1, last_k2) ORDER BY k1, k2 LIMIT n
+
+written out as (k1 > %s OR (k1 = %s AND k2 > %s)) so the index on the key
+columns is used as a range. The key must be unique (end with the primary
+key as tie-breaker) and NOT NULL.
+
+The position travels between requests as an opaque token: URL-safe base64 of
+{"after": [...]} or {"before": [...]}. Model methods return next_token /
+prev_token next to "data".
+"""
+
+import base64
+import json
+
+
+class InvalidPageToken(ValueError):
+    """The page token could not be decoded."""
+
+
+def encode_token(direction, key):
+    payload = json.dumps({direction: list(key)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Return (direction, key) for a token; (None, None) for no token."""
+    if not token:
+        return None, None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        (direction, key), = payload.items()
+        if direction not in ("after", "before") or not isinstance(key, list):
+            raise ValueError(direction)
+        return direction, key
+    except Exception:
+        raise InvalidPageToken("Invalid page token")
+
+
+def keyset_clause(columns, key, direction):
+    """SQL condition and params selecting rows strictly after/before key in (columns) order."""
+    op = ">" if direction == "after" else "<"
+    terms, params = [], []
+    for i, column in enumerate(columns):
+        equal = [f"{c} = %s" for c in columns[:i]]
+        terms.append("(" + " AND ".join(equal + [f"{column} {op} %s"]) + ")")
+        params.extend(key[:i] + [key[i]])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def paginate(cursor, select, where, params, columns, limit, page_token=None):
+    """
+    Run one keyset page of `select` (a query without WHERE/ORDER BY/LIMIT).
+    where/params are the caller's filters (list of SQL conditions); rows are
+    ordered by columns. Returns {"data", "next_token", "prev_token"}.
+    """
+    direction, key = decode_token(page_token)
+    if key is not None and len(key) != len(columns):
+        raise InvalidPageToken("Invalid page token")
+    conditions, values = list(where), list(params)
+    if key is not None:
+        clause, clause_params = keyset_clause(columns, key, direction)
+        conditions.append(clause)
+        values.extend(clause_params)
+    order = "DESC" if direction == "before" else "ASC"
+    sql = select
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{c} {order}" for c in columns) + " LIMIT %s"
+    cursor.execute(sql, (*values, limit + 1))  # one extra row tells whether another page follows
+    rows = list(cursor.fetchall())
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "before":
+        rows.reverse()
+
+    def row_key(row):
+        return [row[c] for c in columns]
+
+    if not rows:
+        # stepped past either end: offer the way back only
+        back = None if key is None else encode_token("before" if direction == "after" else "after", key)
+        return {"data": [], "next_token": back if direction == "before" else None,
+                "prev_token": back if direction == "after" else None}
+    has_next = more if direction != "before" else True
+    has_prev = more if direction == "before" else key is not None
+    return {
+        "data": rows,
+        "next_token": encode_token("after", row_key(rows[-1])) if has_next else None,
+        "prev_token": encode_token("before", row_key(rows[0])) if has_prev else None,
+    }
@@ -0,0 +1,258 @@
+"""
+Result cache for recommendation/service calls.
+
+Entries carry tags ("user:<email>", "movie:<id>", "catalog") so writes can drop
+exactly the results they affect. The default backend is an in-process LRU with
+TTL; set REC_CACHE_BACKEND=redis (and REDIS_URL) to share results between
+processes. Only successful {"success": True, ...} responses are cached.
+"""
+
+import os
+import copy
+import time
+import pickle
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+
+REC_CACHE_BACKEND = os.getenv("REC_CACHE_BACKEND", "memory")
+REC_CACHE_TTL = float(os.getenv("REC_CACHE_TTL", "300"))
+REC_CACHE_MAXSIZE = int(os.getenv("REC_CACHE_MAXSIZE", "2048"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+CATALOG_TAG = "catalog"
+MODEL_TAG = "model"
+
+
+def user_tag(user_email):
+    return f"user:{user_email}"
+
+
+def movie_tag(movieId):
+    return f"movie:{int(movieId)}"
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache with per-entry TTL and tag invalidation."""
+
+    def __init__(self, maxsize=REC_CACHE_MAXSIZE, ttl=REC_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """Return (hit, value); expired entries count as misses."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, tags=(), ttl=None):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+            self._data[key] = (expires_at, copy.deepcopy(value), tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the tags; return how many were dropped."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """
+    Shared backend (optional `redis` dependency). Tags are versioned counters:
+    a key embeds the current version of each of its tags, so bumping a tag's
+    version makes all its entries unreachable and Redis expires them by TTL.
+    """
+
+    def __init__(self, url=REDIS_URL, ttl=REC_CACHE_TTL, prefix="rec"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("REC_CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = 0
+
+    def _versioned_key(self, key, tags):
+        versions = self._redis.mget([f"{self.prefix}:tag:{t}" for t in tags]) if tags else []
+        stamp = ",".join(f"{t}={int(v or 0)}" for t, v in zip(tags, versions))
+        return f"{self.prefix}:{key!r}|{stamp}"
+
+    def get(self, key, tags=()):
+        raw = self._redis.get(self._versioned_key(key, tags))
+        if raw is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, pickle.loads(raw)
+
+    def set(self, key, value, tags=(), ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._redis.set(self._versioned_key(key, tags), pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            self._redis.incr(f"{self.prefix}:tag:{tag}")
+        return None
+
+    def clear(self):
+        for key in self._redis.scan_iter(f"{self.prefix}:*"):
+            self._redis.delete(key)
+
+    def stats(self):
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_listeners = []
+
+
+def get_cache():
+    """Return the process-wide cache backend, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = RedisCache() if REC_CACHE_BACKEND == "redis" else TTLCache()
+    return _cache
+
+
+def set_cache(cache):
+    """Swap the backend (tests, or wiring a custom shared backend)."""
+    global _cache
+    _cache = cache
+
+
+def on_invalidate(listener):
+    """Register listener(tags) to be called after every invalidation (tags=None means everything)."""
+    _listeners.append(listener)
+    return listener
+
+
+def _notify(tags):
+    for listener in _listeners:
+        try:
+            listener(tags)
+        except Exception:
+            pass
+
+
+def invalidate_user(user_email):
+    """Drop cached results personalised for a user (call after their rating writes)."""
+    get_cache().invalidate_tags([user_tag(user_email)])
+    _notify([user_tag(user_email)])
+
+
+def invalidate_movie(movieId=None):
+    """Drop catalog-wide lists plus any result containing the movie (call after movie writes)."""
+    tags = [CATALOG_TAG] + ([movie_tag(movieId)] if movieId is not None else [])
+    get_cache().invalidate_tags(tags)
+    _notify(tags)
+
+
+def invalidate_model():
+    """Drop results computed from the similarity model (call after a new model version goes live)."""
+    get_cache().invalidate_tags([MODEL_TAG])
+    _notify([MODEL_TAG])
+
+
+def invalidate_all():
+    get_cache().clear()
+    _notify(None)
+
+
+def cache_stats():
+    return get_cache().stats()
+
+
+def cached(namespace, tags=None, ttl=None):
+    """
+    Memoize a service call. The key is the namespace plus the bound arguments
+    (defaults applied). tags(arguments, result) returns the entry's tags; with a
+    shared backend they must be computable from the arguments alone.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            key = (namespace, tuple(sorted(arguments.items())))
+            cache = get_cache()
+
+            if isinstance(cache, RedisCache):
+                entry_tags = list(tags(arguments, None)) if tags else []
+                hit, value = cache.get(key, entry_tags)
+            else:
+                entry_tags = None
+                hit, value = cache.get(key)
+            if hit:
+                return value
+
+            value = fn(*args, **kwargs)
+            if isinstance(value, dict) and value.get("success"):
+                if entry_tags is None:
+                    entry_tags = list(tags(arguments, value)) if tags else []
+                cache.set(key, value, tags=entry_tags, ttl=ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def result_movie_tags(result):
+    """movie:<id> tags for every movie in a service result."""
+    if not result:
+        return []
+    return [movie_tag(m["movieId"]) for m in result.get("data") or [] if m.get("movieId") is not None]
@@ -0,0 +1,119 @@
+"""
+Process-wide registry of a served model.
+
+Trained models are published as versions under a model root (see
+VersionedModel.publish) and the registry follows root/CURRENT. A new version
+is opened and warmed off to the side, then installed with a single reference
+assignment (read-copy-update): requests take the model once with get() and
+finish on it even if a swap happens meanwhile, so deploying a model needs no
+restart and never blocks readers.
+
+Changes are picked up by a background poller (start_polling) or, if it is
+not running, by get() itself every `interval` seconds.
+"""
+
+import threading
+import time
+from app.models.similarity_index import SimilarityIndex
+from app.view.cache import invalidate_model
+
+
+class ModelRegistry:
+    def __init__(self, root, interval=30.0, fallback=None, model_class=SimilarityIndex):
+        """
+        root: directory models are published to.
+        fallback: optional callable building a model when nothing is published yet.
+        model_class: VersionedModel subclass stored under root.
+        """
+        self.root = root
+        self.model_class = model_class
+        self.interval = interval
+        self.fallback = fallback
+        self._model = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._poller = None
+        self._stop = threading.Event()
+
+    @property
+    def version(self):
+        model = self._model
+        return model.version if model is not None else None
+
+    def get(self):
+        """The live model, loading it on first use."""
+        model = self._model
+        if model is not None and (self._poller is not None or time.monotonic() - self._checked_at < self.interval):
+            return model
+        try:
+            self.refresh()
+        except Exception:
+            if model is None:
+                raise
+            self._checked_at = time.monotonic()  # keep serving the old model, retry after interval
+        return self._model
+
+    def set(self, model):
+        """Install a model directly (tests, notebooks); None unloads it."""
+        with self._lock:
+            self._model = model
+            self._checked_at = time.monotonic() if model is not None else 0.0
+
+    def refresh(self):
+        """
+        Load the published version if it differs from the live one and swap it in.
+        Returns True if the model changed. Cached results made with the previous
+        version are left to expire with the result cache TTL, so a deploy does not
+        empty the cache all at once; each response carries the model_version it used.
+        """
+        with self._lock:
+            current = self._model
+            version = self.model_class.current_version(self.root)
+            changed = False
+            if current is None or (version is not None and version != current.version):
+                if self.model_class.exists(self.root):
+                    fresh = self.model_class.load_current(self.root)
+                elif self.fallback is not None:
+                    fresh = self.fallback()
+                else:
+                    raise FileNotFoundError(f"No {self.model_class.__name__} published in {self.root}")
+                self._model = fresh.warm()
+                changed = True
+            self._checked_at = time.monotonic()
+            return changed
+
+    def activate(self, version):
+        """
+        Roll the live model to an already published version. Unlike a routine
+        deploy this drops cached results immediately, since the model being
+        replaced is presumably bad.
+        """
+        self.model_class.activate(self.root, version)
+        self.refresh()
+        invalidate_model()
+        return {"success": True, "message": f"Serving {self.model_class.__name__} {version}"}
+
+    # Background reload
+    def start_polling(self, interval=None):
+        """Check root/CURRENT from a daemon thread; get() then never touches the filesystem."""
+        if self._poller is not None and self._poller.is_alive():
+            return self._poller
+        interval = self.interval if interval is None else interval
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    pass  # keep serving the current model; retried next round
+
+        self._poller = threading.Thread(target=poll, name="model-registry-poller", daemon=True)
+        self._poller.start()
+        return self._poller
+
+    def stop_polling(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
@@ -1,20 +1,31 @@
 from app.models.movies_data import Movie
 from app.models.ratings_data import Rating
-import statistics
+from app.view.popularity import PopularityIndex
+from app.view.cache import invalidate_movie
 
 
 class MovieService:
 
     #attach average rating
+    @staticmethod
+    def _attach_avg_ratings(movies: list) -> list:
+        """Attach average rating and count to each movie with one query (fallback to vote_average)."""
+        stats = Rating.fetch_movie_stats(m["movieId"] for m in movies)
+        stats = stats["data"] if stats["success"] else {}
+        for movie in movies:
+            row = stats.get(int(movie["movieId"]))
+            if row and row["rating_count"]:
+                movie["avg_rating"] = round(float(row["avg_rating"]), 2)
+                movie["rating_count"] = int(row["rating_count"])
+            else:
+                movie["avg_rating"] = movie.get("vote_average") or 0
+                movie["rating_count"] = 0
+        return movies
+
     @staticmethod
     def _attach_avg_rating(movie: dict) -> dict:
         """Attach average rating (from ratings table, fallback to vote_average)."""
-        ratings = Rating.fetch_movie_ratings(movie["movieId"])
-        if ratings["success"] and ratings["data"]:
-            movie["avg_rating"] = round(statistics.mean(r["rating"] for r in ratings["data"]), 2)
-        else:
-            movie["avg_rating"] = movie.get("vote_average") or 0
-        return movie
+        return MovieService._attach_avg_ratings([movie])[0]
 
     #user features
     @staticmethod
@@ -24,7 +35,7 @@ class MovieService:
         if not res["success"]:
             return {"success": False, "error": res["error"]}
 
-        movies = [MovieService._attach_avg_rating(m) for m in res["data"]]
+        movies = MovieService._attach_avg_ratings(res["data"])
         return {"success": True, "data": movies}
 
     @staticmethod
@@ -40,47 +51,55 @@ class MovieService:
         return {"success": True, "data": movie}
 
     @staticmethod
-    def list_movies(limit=50, offset=0):
-        """Fetch all movies with pagination, including avg rating."""
-        res = Movie.fetch_all(limit=limit, offset=offset)
+    def list_movies(limit=50, page_token=None):
+        """Fetch a page of movies, including avg rating; pass back next_token/prev_token to move between pages."""
+        res = Movie.fetch_all(limit=limit, page_token=page_token)
         if not res["success"]:
             return {"success": False, "error": res["error"]}
 
-        movies = [MovieService._attach_avg_rating(m) for m in res["data"]]
-        return {"success": True, "data": movies}
+        movies = MovieService._attach_avg_ratings(res["data"])
+        return {"success": True, "data": movies, "next_token": res["next_token"], "prev_token": res["prev_token"]}
 
     @staticmethod
-    def get_movies_by_genre(genre: str, limit=20, offset=0):
-        """Browse movies by genre (with rating aggregation)."""
-        res = Movie.fetch_by_genre(genre, limit=limit, offset=offset)
+    def get_movies_by_genre(genre: str, limit=20, page_token=None):
+        """Browse a page of movies by genre (with rating aggregation and next/prev page tokens)."""
+        res = Movie.fetch_by_genre(genre, limit=limit, page_token=page_token)
         if not res["success"]:
             return {"success": False, "error": res["error"]}
 
-        movies = [MovieService._attach_avg_rating(m) for m in res["data"]]
-        return {"success": True, "data": movies}
+        movies = MovieService._attach_avg_ratings(res["data"])
+        return {"success": True, "data": movies, "next_token": res["next_token"], "prev_token": res["prev_token"]}
 
     #admin features
+    @staticmethod
+    def _after_write(res, movieId=None):
+        """Refresh cached movie rankings and recommendation results after a successful admin write."""
+        if res.get("success"):
+            PopularityIndex.invalidate()
+            invalidate_movie(movieId)
+        return res
+
     @staticmethod
     def add_movie(**kwargs):
         """Admin: Add new movie."""
-        return Movie.add_movie(**kwargs)
+        return MovieService._after_write(Movie.add_movie(**kwargs))
 
     @staticmethod
     def update_movie(movieId, **kwargs):
         """Admin: Update existing movie."""
-        return Movie.update_movie(movieId, **kwargs)
+        return MovieService._after_write(Movie.update_movie(movieId, **kwargs), movieId)
 
     @staticmethod
     def deactivate_movie(movieId):
         """Admin: Soft delete movie."""
-        return Movie.deactivate(movieId)
+        return MovieService._after_write(Movie.deactivate(movieId), movieId)
 
     @staticmethod
     def activate_movie(movieId):
         """Admin: Reactivate movie."""
-        return Movie.activate(movieId)
+        return MovieService._after_write(Movie.activate(movieId), movieId)
 
     @staticmethod
     def delete_movie(movieId):
         """Admin: Permanently delete movie."""
-        return Movie.delete_movie(movieId)
+        return MovieService._after_write(Movie.delete_movie(movieId), movieId)
@@ -0,0 +1,153 @@
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pymysql
+from app.config.db_connection import connecting_db
+
+# how often (seconds) to check the movies table for writes made by other processes
+REFRESH_CHECK_INTERVAL = 60
+# orders kept for genre strings outside the catalog's own genres (free-form filters), least recently used dropped
+GENRE_ORDER_CACHE_SIZE = 32
+
+
+class PopularitySnapshot:
+    """
+    Active movies ranked by the IMDB weighted rating, computed once from one read
+    of the movies table:
+
+        score = v / (v + m) * R + m / (v + m) * C
+
+    with m the 80th percentile of vote_count and C the mean vote_average. The
+    global ranking uses catalog-wide m/C; each genre ranking uses m/C of that
+    genre's movies, all from the same snapshot.
+    """
+
+    def __init__(self, movies, fingerprint=None):
+        self.fingerprint = fingerprint
+        self.movies = []
+        for movie in movies:
+            movie = dict(movie)
+            try:
+                movie["movieId"] = int(movie["movieId"])
+            except Exception:
+                pass
+            self.movies.append(movie)
+
+        self._vote_count = self._column("vote_count")
+        self._vote_average = self._column("vote_average")
+        self._genres = [(m.get("genres") or "").lower() for m in self.movies]
+        self.m, self.C = self._weights(np.arange(len(self.movies)))
+        self.order = self._rank(np.arange(len(self.movies)), self.m, self.C)
+        self.scores = self._score(np.arange(len(self.movies)), self.m, self.C)
+        self._genre_orders = {}
+        for genre in {g for genres in self._genres for g in genres.split("|") if g}:
+            self._genre_orders[genre] = self._compute_genre_order(genre)
+        self._other_orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _column(self, name):
+        values = (m.get(name) for m in self.movies)
+        return np.fromiter((np.nan if v is None else float(v) for v in values), dtype=np.float64, count=len(self.movies))
+
+    def _weights(self, rows):
+        """(m, C) for a subset of movie rows."""
+        counts, averages = self._vote_count[rows], self._vote_average[rows]
+        counts = counts[~np.isnan(counts)]
+        averages = averages[~np.isnan(averages)]
+        m = float(np.quantile(counts, 0.80)) if len(counts) else 0.0
+        C = float(averages.mean()) if len(averages) else 0.0
+        return m, C
+
+    def _score(self, rows, m, C):
+        v, R = self._vote_count[rows], self._vote_average[rows]
+        denom = v + m
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(denom > 0, v / denom * R + m / denom * C, 0.0)
+        return np.nan_to_num(scores, nan=0.0)
+
+    def _rank(self, rows, m, C):
+        """Row positions sorted by descending weighted score (ties keep table order)."""
+        return rows[np.argsort(-self._score(rows, m, C), kind="stable")]
+
+    def _compute_genre_order(self, genre):
+        rows = np.array([i for i, g in enumerate(self._genres) if genre in g], dtype=np.int64)
+        m, C = self._weights(rows)
+        return self._rank(rows, m, C), dict(zip(rows.tolist(), self._score(rows, m, C).tolist()))
+
+    def _genre_order(self, genre):
+        """Catalog genres are precomputed; other strings share a small LRU."""
+        genre = genre.lower()
+        order = self._genre_orders.get(genre)
+        if order is not None:
+            return order
+        with self._lock:
+            order = self._other_orders.get(genre)
+            if order is not None:
+                self._other_orders.move_to_end(genre)
+                return order
+        order = self._compute_genre_order(genre)
+        with self._lock:
+            self._other_orders[genre] = order
+            while len(self._other_orders) > GENRE_ORDER_CACHE_SIZE:
+                self._other_orders.popitem(last=False)
+        return order
+
+    def top(self, k=10, genre=None):
+        """Top-k movies (copies, with popularity_score), globally or within a genre."""
+        if genre:
+            order, scores = self._genre_order(genre)
+        else:
+            order, scores = self.order, None
+        results = []
+        for pos in order[:k].tolist():
+            movie = dict(self.movies[pos])
+            movie["popularity_score"] = scores[pos] if scores is not None else float(self.scores[pos])
+            results.append(movie)
+        return results
+
+
+class PopularityIndex:
+    """Process-wide cached PopularitySnapshot, rebuilt when the movies table changes."""
+
+    _snapshot = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(cursor):
+        cursor.execute("SELECT COUNT(*) AS n, MAX(updated_at) AS last_update FROM movies")
+        row = cursor.fetchone()
+        return (row["n"], str(row["last_update"]))
+
+    @staticmethod
+    def get():
+        """Return the current snapshot, rebuilding it if it was invalidated or the table changed."""
+        snapshot = PopularityIndex._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - PopularityIndex._checked_at < REFRESH_CHECK_INTERVAL:
+            return snapshot
+
+        with PopularityIndex._lock:
+            snapshot = PopularityIndex._snapshot
+            if snapshot is not None and time.monotonic() - PopularityIndex._checked_at < REFRESH_CHECK_INTERVAL:
+                return snapshot
+            conn = connecting_db()
+            try:
+                cursor = conn.cursor(pymysql.cursors.DictCursor)
+                fingerprint = PopularityIndex._fingerprint(cursor)
+                if snapshot is None or snapshot.fingerprint != fingerprint:
+                    cursor.execute("SELECT * FROM movies WHERE is_active=TRUE")
+                    snapshot = PopularitySnapshot(cursor.fetchall(), fingerprint)
+                    PopularityIndex._snapshot = snapshot
+                PopularityIndex._checked_at = time.monotonic()
+            finally:
+                conn.close()
+            return snapshot
+
+    @staticmethod
+    def invalidate():
+        """Drop the snapshot; the next read rebuilds it (call after movie writes)."""
+        with PopularityIndex._lock:
+            PopularityIndex._snapshot = None
+            PopularityIndex._checked_at = 0.0
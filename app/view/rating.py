@@ -1,15 +1,35 @@
 from app.models.ratings_data import Rating
+from app.view.cache import invalidate_user, invalidate_all
 
 
 class RatingService:
 
+    @staticmethod
+    def _after_write(res, user_email=None):
+        """Drop cached recommendations affected by a successful rating write (all users if unknown)."""
+        if res.get("success"):
+            if user_email is None:
+                invalidate_all()
+            else:
+                invalidate_user(user_email)
+        return res
+
     #user features
     @staticmethod
     def add_or_update_rating(user_email: str, movieId: int, rating: float):
         """Add or update a rating for a movie by a user."""
         try:
             rating_obj = Rating(user_email=user_email, movieId=movieId, rating=rating)
-            return rating_obj.save()
+            return RatingService._after_write(rating_obj.save(), user_email)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def import_ratings(user_email: str, ratings):
+        """Add or update many ratings for a user at once; ratings is [(movieId, rating), ...]."""
+        try:
+            rating_objs = [Rating(user_email=user_email, movieId=movieId, rating=rating) for movieId, rating in ratings]
+            return RatingService._after_write(Rating.save_many(rating_objs), user_email)
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -18,7 +38,7 @@ class RatingService:
         """Delete a user's rating for a movie."""
         try:
             rating_obj = Rating(user_email=user_email, movieId=movieId, rating=0)  # rating ignored
-            return rating_obj.delete()
+            return RatingService._after_write(rating_obj.delete(), user_email)
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -47,4 +67,4 @@ class RatingService:
     @staticmethod
     def delete_rating_by_admin(rating_id: int):
         """Admin: Delete rating by ID."""
-        return Rating.delete_by_admin(rating_id)
+        return RatingService._after_write(Rating.delete_by_admin(rating_id))
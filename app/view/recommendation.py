@@ -1,219 +1,233 @@
-import pandas as pd
+import math
 import numpy as np
 import pickle
 import pymysql
 from app.config.db_connection import connecting_db
 from app.models.movies_data import Movie
-from app.models.ratings_data import Rating
-import datetime
+from app.models.rating_stats import MovieRatingStats
+from app.models.similarity_index import SimilarityIndex
+from app.models.factor_model import FactorModel
+from app.view.popularity import PopularityIndex
+from app.view.model_registry import ModelRegistry
+from app.view.cache import cached, user_tag, movie_tag, result_movie_tags, CATALOG_TAG, MODEL_TAG
+from app.config.model_config import (
+    SIMILARITY_INDEX_DIR, LEGACY_SIMILARITY_PKL, NEIGHBOR_TOP_N, MODEL_RELOAD_INTERVAL, RECOMMENDER_ENGINE, ALS_MODEL_DIR,
+)
 
 
 class RecommendationService:
-    _similarity_matrix = None 
+    _registry = ModelRegistry(
+        SIMILARITY_INDEX_DIR,
+        interval=MODEL_RELOAD_INTERVAL,
+        fallback=lambda: SimilarityIndex.from_dense(RecommendationService._load_similarity_matrix(), top_n=NEIGHBOR_TOP_N),
+    )
+    _als_registry = ModelRegistry(ALS_MODEL_DIR, interval=MODEL_RELOAD_INTERVAL, model_class=FactorModel)
 
     @staticmethod
     def _load_similarity_matrix():
-        """Load and cache collaborative filtering similarity matrix."""
-        if RecommendationService._similarity_matrix is None:
-            with open(r"D:\movie_recommendation_system\recommend_model\trained_models\item_similarity.pkl", "rb") as f:
-                RecommendationService._similarity_matrix = pickle.load(f)
-        return RecommendationService._similarity_matrix
+        """Load the legacy dense similarity matrix (movies x movies DataFrame)."""
+        with open(LEGACY_SIMILARITY_PKL, "rb") as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _load_similarity_index():
+        """
+        The live sparse top-N neighbor index from the model registry (memory-mapped,
+        hot-swapped when a new version is published). Falls back to building it from
+        the dense pickle if no neighbor artifact exists. Take it once per request so
+        the whole request is served by one model version.
+        """
+        return RecommendationService._registry.get()
+
+    @staticmethod
+    def _model_registry():
+        """Registry of the engine selected by RECOMMENDER_ENGINE ("neighbors" or "als")."""
+        if RECOMMENDER_ENGINE == "als":
+            return RecommendationService._als_registry
+        if RECOMMENDER_ENGINE != "neighbors":
+            raise ValueError(f"Unknown RECOMMENDER_ENGINE: {RECOMMENDER_ENGINE}")
+        return RecommendationService._registry
+
+    @staticmethod
+    def _load_model():
+        """
+        The live model of the selected engine. Both engines expose item_ids,
+        positions, score(movieIds, ratings) and neighbors(movieId).
+        """
+        return RecommendationService._model_registry().get()
+
+    @staticmethod
+    def _top_k(scores, k, exclude=None):
+        """Return positions of the k highest scores (descending), skipping excluded positions."""
+        scores = np.array(scores, dtype=np.float64)
+        if exclude is not None and len(exclude):
+            scores[exclude] = -np.inf
+        candidates = int(np.isfinite(scores).sum())
+        k = min(k, candidates)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    @staticmethod
+    def _score_user(user_ratings, k=10, index=None):
+        """
+        Score movies for a user from the movies they rated (neighbor lists, or an
+        ALS fold-in). Returns the k best unseen movieIds, or [] if none of the rated
+        movies are in the model.
+        """
+        if index is None:
+            index = RecommendationService._load_model()
+        rated_ids = [r["movieId"] for r in user_ratings]
+        ratings = [r["rating"] for r in user_ratings]
+        seen = [index.positions[m] for m in rated_ids if m in index.positions]
+        if isinstance(index, FactorModel):
+            top = index.recommend(rated_ids, ratings, k, exclude=seen)
+        else:
+            top = RecommendationService._top_k(index.score(rated_ids, ratings), k, exclude=seen)
+        return [int(mid) for mid in index.item_ids[top]]
+
+    @staticmethod
+    def _fetch_rows(sql, params=()):
+        """
+        Run one read on a pooled connection and return it before the rows are used,
+        so later model/service calls (which borrow their own) never hold two at once.
+        """
+        conn = connecting_db()
+        try:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
 
     @staticmethod
     def _fetch_movie_details(movieIds):
-        """Fetch movies from DB for given list of IDs."""
-        movies = []
-        for mid in movieIds:
-            res = Movie.fetch_by_id(mid)
-            if res["success"] and res["data"]:
-                movie = res["data"]
-                if "movieId" in movie:
-                    try:
-                        movie["movieId"] = int(movie["movieId"])
-                    except Exception:
-                        pass
-                movies.append(movie)
+        """Fetch movies from DB for given list of IDs in one query, keeping score order."""
+        res = Movie.fetch_by_ids(movieIds)
+        if not res["success"]:
+            raise RuntimeError(res["error"])
+        movies = res["data"]
+        for movie in movies:
+            if "movieId" in movie:
+                try:
+                    movie["movieId"] = int(movie["movieId"])
+                except Exception:
+                    pass
         return movies
 
     @staticmethod
+    @cached("recs:user", tags=lambda a, res: [user_tag(a["user_email"]), CATALOG_TAG, MODEL_TAG] + result_movie_tags(res))
     def get_recommendations_for_user(user_email, k=10):
         """
         Generate personalized recommendations for a user.
-        Uses collaborative filtering (item-item similarity).
+        Uses collaborative filtering (item-item neighbors or ALS, per RECOMMENDER_ENGINE).
         Fallback: popular movies for new users.
         """
-        conn = None
         try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-            #check if user exists
-            cursor.execute("SELECT email FROM users WHERE email=%s", (user_email,))
-
-
             #get all ratings by user
-            cursor.execute("SELECT movieId, rating FROM ratings WHERE user_email=%s", (user_email,))
-            user_ratings = cursor.fetchall()
+            user_ratings = RecommendationService._fetch_rows(
+                "SELECT movieId, rating FROM ratings WHERE user_email=%s", (user_email,)
+            )
             if not user_ratings or len(user_ratings) < 3:
                 #cold start or few ratings
-                return RecommendationService.get_popular_movies(k=k)
-
-            similarity_matrix = RecommendationService._load_similarity_matrix()
-            user_df = pd.DataFrame(user_ratings)
+                return dict(RecommendationService.get_popular_movies(k=k), model_version=None)
 
-            #Predict unseen movies
-            movie_scores = {}
-            for _, row in user_df.iterrows():
-                movieId, rating = row["movieId"], row["rating"]
-                
-                try:
-                    if movieId in similarity_matrix.index:
-                        sims = similarity_matrix[movieId].dropna()
-                        for sim_movie, sim_score in sims.items():
-                            if sim_movie not in user_df["movieId"].values:
-                                movie_scores[sim_movie] = movie_scores.get(sim_movie, 0) + sim_score * rating
-                except Exception:
-                    # skip movies not present in similarity matrix
-                    continue
-
-            if not movie_scores:
-                return RecommendationService.get_popular_movies(k=k)
+            #Predict unseen movies with one model version for the whole request
+            index = RecommendationService._load_model()
+            movieIds = RecommendationService._score_user(user_ratings, k=k, index=index)
+            if not movieIds:
+                return dict(RecommendationService.get_popular_movies(k=k), model_version=None)
 
-            #Sort by score and fetch details
-            top_movies = sorted(movie_scores.items(), key=lambda x: x[1], reverse=True)[:k]
-            movieIds = [m[0] for m in top_movies]
-
-            return {"success": True, "data": RecommendationService._fetch_movie_details(movieIds)}
+            data = RecommendationService._fetch_movie_details(movieIds)
+            return {"success": True, "data": data, "model_version": index.version}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
 
     @staticmethod
+    @cached("recs:similar", tags=lambda a, res: [movie_tag(a["movieId"]), CATALOG_TAG, MODEL_TAG] + result_movie_tags(res))
     def get_similar_movies(movieId, k=10):
-        """Return top K similar movies using similarity matrix."""
+        """Return top K similar movies (neighbor lists, or closest ALS item factors)."""
         try:
-            similarity_matrix = RecommendationService._load_similarity_matrix()
-            if movieId not in similarity_matrix.index:
+            index = RecommendationService._load_model()
+            if movieId not in index.positions:
                 return {"success": False, "error": "Movie not found in similarity model"}
 
-            similar_movies = similarity_matrix[movieId].sort_values(ascending=False).head(k).index.tolist()
+            #neighbor lists are stored best first
+            neighbors, _ = index.neighbors(movieId)
+            similar_movies = [int(mid) for mid in index.item_ids[neighbors[:k]]]
             data = RecommendationService._fetch_movie_details(similar_movies)
-            return {"success": True, "data": data}
+            return {"success": True, "data": data, "model_version": index.version}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
+    @cached("recs:popular", tags=lambda a, res: [CATALOG_TAG])
     def get_popular_movies(k=10):
-        """Fetch top movies based on weighted popularity score (IMDB formula)."""
-        conn = None
+        """Fetch top movies based on weighted popularity score (IMDB formula), served from the popularity index."""
         try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("SELECT * FROM movies WHERE is_active=TRUE")
-            movies = cursor.fetchall()
-
-            if not movies:
+            results = PopularityIndex.get().top(k)
+            if not results:
                 return {"success": False, "error": "No movies found"}
-
-            df = pd.DataFrame(movies)
-
-            # ensure numeric movieId
-            if "movieId" in df.columns:
-                try:
-                    df["movieId"] = df["movieId"].astype(int)
-                except Exception:
-                    pass
-
-            # fill missing numerical fields if any
-            if "vote_average" not in df.columns:
-                df["vote_average"] = 0.0
-            if "vote_count" not in df.columns:
-                df["vote_count"] = 0
-
-            C = df["vote_average"].mean() if not df["vote_average"].isna().all() else 0
-            m = df["vote_count"].quantile(0.80) if "vote_count" in df.columns else 0
-            # avoid division by zero
-            def pop_score(x):
-                try:
-                    return ((x["vote_count"] / (x["vote_count"] + m) * x["vote_average"]) +
-                            (m / (m + x["vote_count"]) * C))
-                except Exception:
-                    return 0
-
-            df["popularity_score"] = df.apply(pop_score, axis=1)
-            top_movies = df.sort_values("popularity_score", ascending=False).head(k)
-
-            # ensure records have expected types (esp. movieId)
-            results = top_movies.to_dict(orient="records")
-            for r in results:
-                if "movieId" in r:
-                    try:
-                        r["movieId"] = int(r["movieId"])
-                    except Exception:
-                        pass
             return {"success": True, "data": results}
-
         except Exception as e:
             return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
 
     @staticmethod
-    def get_trending_movies(k=10):
+    @cached("recs:trending", tags=lambda a, res: [CATALOG_TAG])
+    def get_trending_movies(k=10, by_activity=False, window_days=30, half_life_days=7):
         """
-        Fetch trending movies — recent releases.
-        Fallback: use popularity score if release_date invalid/missing.
+        Fetch trending movies — recent releases (ORDER BY release_date DESC LIMIT k).
+        With by_activity=True, movies are ranked by recently received ratings, each
+        rating weighted by exp(-age / tau) with tau set from half_life_days; remaining
+        slots are filled with recent releases.
+        Fallback: use popularity score if no release dates are available.
         """
-        conn = None
         try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("SELECT * FROM movies WHERE is_active=TRUE")
-            movies = cursor.fetchall()
-
-            df = pd.DataFrame(movies)
-            # Fallback if release_date is missing
-            if "release_date" not in df.columns or df["release_date"].isna().all():
+            results = []
+            if by_activity:
+                tau = half_life_days * 86400 / math.log(2)
+                rows = RecommendationService._fetch_rows(
+                    """
+                    SELECT movieId, SUM(EXP(-TIMESTAMPDIFF(SECOND, timestamp, NOW()) / %s)) AS trending_score
+                    FROM ratings
+                    WHERE timestamp >= NOW() - INTERVAL %s DAY
+                    GROUP BY movieId
+                    ORDER BY trending_score DESC
+                    LIMIT %s
+                    """,
+                    (tau, window_days, k * 2),
+                )
+                activity = {int(r["movieId"]): float(r["trending_score"]) for r in rows}
+                for movie in RecommendationService._fetch_movie_details(list(activity)):
+                    if movie.get("is_active"):
+                        movie["trending_score"] = activity[movie["movieId"]]
+                        results.append(movie)
+                results = results[:k]
+
+            if len(results) < k:
+                rows = RecommendationService._fetch_rows(
+                    """
+                    SELECT * FROM movies
+                    WHERE is_active=TRUE AND release_date IS NOT NULL
+                    ORDER BY release_date DESC
+                    LIMIT %s
+                    """,
+                    (k + len(results),),
+                )
+                seen = {m["movieId"] for m in results}
+                for movie in rows:
+                    movie["movieId"] = int(movie["movieId"])
+                    if movie["movieId"] not in seen and len(results) < k:
+                        results.append(movie)
+
+            if not results:
                 return RecommendationService.get_popular_movies(k=k)
-
-            # Handle missing/invalid dates
-            def safe_date(x):
-                try:
-                    return pd.to_datetime(x)
-                except Exception:
-                    return pd.NaT
-
-            df["release_date"] = df["release_date"].apply(safe_date)
-            df = df.dropna(subset=["release_date"])
-            if df.empty:
-                return RecommendationService.get_popular_movies(k=k)
-
-            # ensure numeric movieId
-            if "movieId" in df.columns:
-                try:
-                    df["movieId"] = df["movieId"].astype(int)
-                except Exception:
-                    pass
-
-            df = df.sort_values("release_date", ascending=False)
-            results = df.head(k).to_dict(orient="records")
-            for r in results:
-                if "movieId" in r:
-                    try:
-                        r["movieId"] = int(r["movieId"])
-                    except Exception:
-                        pass
             return {"success": True, "data": results}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
 
     #genre-based recommendations
     @staticmethod
@@ -224,55 +238,19 @@ class RecommendationService:
             return recs
 
         filtered = [m for m in recs["data"] if genre.lower() in (m.get("genres") or "").lower()]
-        return {"success": True, "data": filtered[:k]}
+        return {"success": True, "data": filtered[:k], "model_version": recs.get("model_version")}
 
     @staticmethod
+    @cached("recs:popular_genre", tags=lambda a, res: [CATALOG_TAG])
     def get_popular_movies_by_genre(genre, k=10):
-        """Fetch popular movies only within a given genre."""
-        conn = None
+        """Fetch popular movies only within a given genre (ranked with the genre's own m/C)."""
         try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            query = """
-                SELECT * FROM movies 
-                WHERE is_active=TRUE AND genres LIKE %s
-            """
-            cursor.execute(query, (f"%{genre}%",))
-            movies = cursor.fetchall()
-            if not movies:
+            results = PopularityIndex.get().top(k, genre=genre)
+            if not results:
                 return {"success": False, "error": "No movies found for this genre"}
-
-            df = pd.DataFrame(movies)
-            if "movieId" in df.columns:
-                try:
-                    df["movieId"] = df["movieId"].astype(int)
-                except Exception:
-                    pass
-
-            C = df["vote_average"].mean() if "vote_average" in df.columns else 0
-            m = df["vote_count"].quantile(0.80) if "vote_count" in df.columns else 0
-            def pop_score(x):
-                try:
-                    return ((x["vote_count"] / (x["vote_count"] + m) * x["vote_average"]) +
-                            (m / (m + x["vote_count"]) * C))
-                except Exception:
-                    return 0
-
-            df["popularity_score"] = df.apply(pop_score, axis=1)
-            top_movies = df.sort_values("popularity_score", ascending=False).head(k)
-            results = top_movies.to_dict(orient="records")
-            for r in results:
-                if "movieId" in r:
-                    try:
-                        r["movieId"] = int(r["movieId"])
-                    except Exception:
-                        pass
             return {"success": True, "data": results}
         except Exception as e:
             return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
 
     #admin analytics features
     @staticmethod
@@ -301,27 +279,8 @@ class RecommendationService:
 
     @staticmethod
     def get_top_rated_movies(k=10):
-        """Return top-rated movies globally (avg rating)."""
-        conn = None
-        try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            query = """
-                SELECT m.movieId, m.title, AVG(r.rating) as avg_rating, COUNT(r.rating) as total_ratings
-                FROM ratings r
-                JOIN movies m ON r.movieId = m.movieId
-                GROUP BY m.movieId, m.title
-                HAVING total_ratings > 5
-                ORDER BY avg_rating DESC
-                LIMIT %s
-            """
-            cursor.execute(query, (k,))
-            return {"success": True, "data": cursor.fetchall()}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
+        """Return top-rated movies globally (avg rating, from maintained rating stats)."""
+        return MovieRatingStats.top_rated(k=k, min_ratings=5)
 
     @staticmethod
     def get_most_active_users(k=10):
@@ -349,14 +308,4 @@ class RecommendationService:
     @staticmethod
     def get_rating_distribution():
         """Return distribution of all ratings (for histogram in dashboard)."""
-        conn = None
-        try:
-            conn = connecting_db()
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("SELECT rating, COUNT(*) as count FROM ratings GROUP BY rating ORDER BY rating ASC")
-            return {"success": True, "data": cursor.fetchall()}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
-        finally:
-            if conn:
-                conn.close()
+        return MovieRatingStats.distribution()
@@ -0,0 +1,74 @@
+import threading
+from app.view.rating import RatingService
+from app.view.watchlist import WatchlistService
+
+_local = threading.local()
+
+
+class UserContext:
+    """
+    Per-render snapshot of the logged-in user's ratings and watchlist.
+
+    Each is fetched at most once per render and indexed by movieId, so movie
+    cards look up "your rating" / "in watchlist" without touching the DB.
+    Streamlit runs each rerun on its own script thread; call begin() at the top
+    of a page and current() from any component below it.
+    """
+
+    def __init__(self, user_email):
+        self.user_email = user_email
+        self._ratings = None
+        self._watchlist = None
+
+    # lifecycle
+    @staticmethod
+    def begin(user_email):
+        """Start a fresh context for this render (drops whatever the thread held)."""
+        ctx = UserContext(user_email)
+        _local.context = ctx
+        return ctx
+
+    @staticmethod
+    def current(user_email):
+        """Context of the current render, starting one if none exists for this user."""
+        ctx = getattr(_local, "context", None)
+        if ctx is None or ctx.user_email != user_email:
+            ctx = UserContext.begin(user_email)
+        return ctx
+
+    # lazy loads
+    @property
+    def ratings(self):
+        """User's rating rows keyed by movieId."""
+        if self._ratings is None:
+            res = RatingService.get_user_ratings(self.user_email)
+            rows = res["data"] if res["success"] else []
+            self._ratings = {int(r["movieId"]): r for r in rows}
+        return self._ratings
+
+    @property
+    def watchlist(self):
+        """User's watchlist rows (with movie details) keyed by movieId, newest first."""
+        if self._watchlist is None:
+            res = WatchlistService.get_user_watchlist(self.user_email)
+            rows = res["data"] if res["success"] else []
+            self._watchlist = {int(w["movieId"]): w for w in rows}
+        return self._watchlist
+
+    # lookups
+    def rating_for(self, movieId):
+        """User's rating for a movie, 0 if unrated."""
+        row = self.ratings.get(int(movieId))
+        return row["rating"] if row else 0
+
+    def in_watchlist(self, movieId):
+        return int(movieId) in self.watchlist
+
+    # keep the snapshot in step with writes made during the same render
+    def record_rating(self, movieId, rating):
+        row = dict(self.ratings.get(int(movieId)) or {"user_email": self.user_email, "movieId": int(movieId)})
+        row["rating"] = rating
+        self.ratings[int(movieId)] = row
+
+    def record_watchlist_change(self):
+        self._watchlist = None  # reload (with movie details) on next read
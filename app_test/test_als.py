@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+import app.view.recommendation as recommendation
+from app.models.factor_model import FactorModel
+from app.view.recommendation import RecommendationService
+from recommend_model.scripts.train_als import explicit_half_step, implicit_half_step, row_chunks, train
+
+
+@pytest.fixture
+def low_rank_ratings():
+    """Ratings sampled from a rank-3 preference model, clipped to the 0.5-5 scale."""
+    rng = np.random.default_rng(5)
+    users, items = rng.normal(size=(60, 3)), rng.normal(size=(40, 3))
+    full = np.clip(3.0 + 0.5 * users @ items.T, 0.5, 5.0)
+    rows = [(f"u{u}", 100 + i, float(full[u, i])) for u in range(60) for i in range(40) if rng.random() < 0.5]
+    return pd.DataFrame(rows, columns=["userId", "movieId", "rating"])
+
+
+@pytest.fixture
+def sparse_problem():
+    rng = np.random.default_rng(1)
+    matrix = sp.random(30, 20, density=0.3, format="csr", random_state=2, data_rvs=lambda n: rng.integers(1, 6, n))
+    return matrix.astype(np.float64), rng.normal(size=(20, 4))
+
+
+def test_row_chunks_cover_every_row(sparse_problem):
+    matrix, _ = sparse_problem
+    bounds = row_chunks(matrix, chunk_ratings=7)
+    assert bounds[0][0] == 0 and bounds[-1][1] == matrix.shape[0]
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+
+
+def test_explicit_half_step_solves_normal_equations(sparse_problem):
+    matrix, fixed = sparse_problem
+    out = np.zeros((matrix.shape[0], 4))
+    explicit_half_step(matrix, fixed, out, reg=0.1, workers=2)
+    for row in range(matrix.shape[0]):
+        cols, r = matrix[row].indices, matrix[row].data
+        if len(cols) == 0:
+            assert not out[row].any()
+            continue
+        Y = fixed[cols]
+        expected = np.linalg.solve(Y.T @ Y + 0.1 * len(cols) * np.eye(4), Y.T @ r)
+        assert np.allclose(out[row], expected)
+
+
+def test_implicit_conjugate_gradient_converges_to_exact_solve(sparse_problem):
+    matrix, fixed = sparse_problem
+    out = np.zeros((matrix.shape[0], 4))
+    implicit_half_step(matrix, fixed, out, reg=0.5, alpha=2.0, cg_steps=10)
+    for row in range(matrix.shape[0]):
+        confidence = 1.0 + 2.0 * matrix[row].toarray().ravel()
+        A = fixed.T @ (fixed * confidence[:, None]) + 0.5 * np.eye(4)
+        b = fixed.T @ (confidence * (matrix[row].toarray().ravel() > 0))
+        assert np.allclose(out[row], np.linalg.solve(A, b), atol=1e-6)
+
+
+def test_explicit_als_fits_low_rank_ratings(low_rank_ratings):
+    model = train(low_rank_ratings, mode="explicit", factors=3, reg=0.01, iterations=20)
+    assert model.training_stats["train_rmse"] < 0.15
+
+    user = low_rank_ratings[low_rank_ratings.userId == "u0"]
+    scores = model.score(user.movieId.tolist(), user.rating.tolist())
+    predicted = scores[[model.positions[m] for m in user.movieId]]
+    assert np.sqrt(np.mean((predicted - user.rating.to_numpy()) ** 2)) < 0.3
+
+
+def test_implicit_als_ranks_rated_movies_first(low_rank_ratings):
+    model = train(low_rank_ratings, mode="implicit", factors=8, reg=0.1, alpha=5.0, iterations=10)
+    user = low_rank_ratings[low_rank_ratings.userId == "u1"]
+    scores = model.score(user.movieId.tolist(), user.rating.tolist())
+    rated = np.isin(model.item_ids, user.movieId.to_numpy())
+    assert scores[rated].mean() > scores[~rated].mean()
+
+
+def test_factor_model_publish_roundtrip(tmp_path, low_rank_ratings):
+    model = train(low_rank_ratings, mode="explicit", factors=3, iterations=5)
+    version = model.publish(tmp_path / "als")
+    loaded = FactorModel.load_current(tmp_path / "als")
+    assert loaded.version == version and loaded.mode == "explicit"
+    assert not loaded.item_factors.flags.writeable
+    assert np.allclose(loaded.score([100, 101], [4.0, 2.0]), model.score([100, 101], [4.0, 2.0]))
+
+    positions, sims = loaded.neighbors(100, top_n=5)
+    assert len(positions) <= 5 and 0 not in positions.tolist()
+    assert (np.diff(sims) <= 0).all() and (sims > 0).all()
+    assert loaded.score([999], [5.0]).max() == -np.inf
+
+
+def test_engine_selector_serves_als(monkeypatch, low_rank_ratings):
+    model = train(low_rank_ratings, mode="explicit", factors=3, iterations=5)
+    monkeypatch.setattr(recommendation, "RECOMMENDER_ENGINE", "als")
+    RecommendationService._als_registry.set(model)
+    try:
+        assert RecommendationService._load_model() is model
+        rated = [{"movieId": 100, "rating": 5.0}, {"movieId": 101, "rating": 1.0}]
+        recs = RecommendationService._score_user(rated, k=5)
+        assert len(recs) == 5 and not {100, 101} & set(recs)
+    finally:
+        RecommendationService._als_registry.set(None)
+
+    monkeypatch.setattr(recommendation, "RECOMMENDER_ENGINE", "bogus")
+    with pytest.raises(ValueError):
+        RecommendationService._model_registry()
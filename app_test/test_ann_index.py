@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.models import factor_model
+from app.models.ann_index import IVFIndex
+from app.models.factor_model import FactorModel
+
+
+@pytest.fixture
+def clustered_vectors():
+    rng = np.random.default_rng(4)
+    centers = rng.normal(size=(20, 16))
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 16))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_top(vectors, query, k, exclude):
+    scores = vectors @ query
+    scores[exclude] = -np.inf
+    return np.argsort(-scores, kind="stable")[:k]
+
+
+def test_partition_covers_every_item_once(clustered_vectors):
+    ivf = IVFIndex.build(clustered_vectors, n_lists=30)
+    assert ivf.n_lists == 30 and ivf.offsets[-1] == len(clustered_vectors)
+    assert sorted(ivf.order.tolist()) == list(range(len(clustered_vectors)))
+
+
+def test_probing_every_list_is_exact(clustered_vectors):
+    ivf = IVFIndex.build(clustered_vectors, n_lists=30)
+    for q in (0, 17, 999):
+        positions, scores = ivf.search(clustered_vectors[q], clustered_vectors, 10, nprobe=30, exclude=[q])
+        assert positions.tolist() == exact_top(clustered_vectors, clustered_vectors[q], 10, [q]).tolist()
+        assert q not in positions.tolist() and (np.diff(scores) <= 0).all()
+
+
+def test_few_probes_keep_high_recall(clustered_vectors):
+    ivf = IVFIndex.build(clustered_vectors, n_lists=40)
+    recall = []
+    for q in range(0, 2000, 20):
+        got = ivf.search(clustered_vectors[q], clustered_vectors, 10, nprobe=4, exclude=[q])[0]
+        recall.append(len(set(got.tolist()) & set(exact_top(clustered_vectors, clustered_vectors[q], 10, [q]).tolist())) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_factor_model_persists_and_uses_ann(tmp_path, monkeypatch, clustered_vectors):
+    model = FactorModel(np.arange(len(clustered_vectors)) + 1, clustered_vectors, mode="implicit")
+    model.build_ann(n_lists=25)
+    model.publish(tmp_path / "als")
+    loaded = FactorModel.load_current(tmp_path / "als")
+    assert loaded.ann.n_lists == 25 and np.array_equal(loaded.ann.order, model.ann.order)
+
+    exact = loaded.neighbors(1, top_n=10)
+    monkeypatch.setattr(factor_model, "ANN_MIN_ITEMS", 0)
+    assert loaded.use_ann()
+    approx = loaded.neighbors(1, top_n=10, nprobe=25)
+    assert approx[0].tolist() == exact[0].tolist()
+
+    recs = loaded.recommend([1, 2], [5.0, 4.0], k=10, exclude=[0, 1])
+    assert len(recs) == 10 and not {0, 1} & set(recs.tolist())
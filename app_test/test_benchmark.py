@@ -0,0 +1,47 @@
+import pytest
+
+import app.view.recommendation as recommendation
+from app.view.recommendation import RecommendationService
+from recommend_model.scripts.benchmark import MemoryDatabase, compare, memory_database, run, synthesize
+
+
+@pytest.fixture
+def catalog():
+    return synthesize(n_users=40, n_movies=60, ratings_per_user=12, seed=3)
+
+
+def test_benchmark_reports_every_operation(catalog):
+    movies, ratings = catalog
+    registry, connect = RecommendationService._registry, recommendation.connecting_db
+    report = run(movies, ratings, concurrency=(1, 2), histories=(5,), requests=10, k=5)
+
+    assert report["dataset"] == {"movies": 60, "users": 40, "ratings": 480}
+    assert report["model"]["load_seconds"] >= 0 and report["peak_rss_mb"] > 0
+    assert {(r["operation"], r["concurrency"]) for r in report["results"]} == {
+        (op, c) for op in ("recommendations", "similar", "popular", "trending") for c in (1, 2)
+    }
+    for result in report["results"]:
+        assert result["errors"] == 0 and result["qps"] > 0
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["p95"] <= result["latency_ms"]["p99"]
+    # the service is left as it was found
+    assert RecommendationService._registry is registry and recommendation.connecting_db is connect
+
+
+def test_memory_database_rejects_unknown_statements(catalog):
+    movies, ratings = catalog
+    with memory_database(MemoryDatabase(movies, ratings)) as db:
+        cursor = recommendation.connecting_db().cursor()
+        cursor.execute("SELECT movieId, rating FROM ratings WHERE user_email=%s", ("user0@example.com",))
+        assert len(cursor.fetchall()) == 12
+        with pytest.raises(NotImplementedError):
+            cursor.execute("DELETE FROM ratings")
+
+
+def test_compare_flags_regressions():
+    def report(p95, qps):
+        return {"results": [{"operation": "popular", "history": None, "concurrency": 1,
+                             "qps": qps, "latency_ms": {"p50": 1.0, "p95": p95}}]}
+
+    assert not compare(report(1.0, 100), report(1.1, 95), max_regression=0.2)[0]["regressed"]
+    assert compare(report(1.0, 100), report(1.5, 100), max_regression=0.2)[0]["regressed"]
+    assert compare(report(1.0, 100), report(1.0, 70), max_regression=0.2)[0]["regressed"]
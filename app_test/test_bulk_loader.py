@@ -0,0 +1,131 @@
+import pandas as pd
+import pymysql
+import pytest
+
+import app.models.bulk_loader as bulk_loader
+from app.models.movies_data import Movie
+from app.models.ratings_dataset import DemoRating
+
+
+class FakeDatabase:
+    """Committed rows per table plus the checkpoint table; a transaction is staged until commit()."""
+
+    def __init__(self, fail_after_commits=None, refuse_load_data=False):
+        self.tables = {}
+        self.checkpoints = {}
+        self.commits = 0
+        self.fail_after_commits = fail_after_commits
+        self.refuse_load_data = refuse_load_data
+        self.statements = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.staged_rows, self.staged_checkpoints = [], {}
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        db = self.db
+        if db.fail_after_commits is not None and db.commits >= db.fail_after_commits:
+            raise pymysql.err.OperationalError(2013, "Lost connection")
+        for table, row in self.staged_rows:
+            db.tables.setdefault(table, []).append(row)
+        db.checkpoints.update(self.staged_checkpoints)
+        self.staged_rows, self.staged_checkpoints = [], {}
+        db.commits += 1
+
+    def rollback(self):
+        self.staged_rows, self.staged_checkpoints = [], {}
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def execute(self, sql, params=()):
+        self.conn.db.statements.append(sql.split()[0])
+        if sql.startswith("SELECT signature"):
+            self.result = self.conn.db.checkpoints.get(params[0])
+        elif "bulk_load_checkpoints" in sql:
+            name, _, signature, done = params
+            completed = "TRUE)" in sql
+            self.conn.staged_checkpoints[name] = {"signature": signature, "rows_done": done, "completed": completed}
+        elif sql.startswith("LOAD DATA"):
+            raise pymysql.err.OperationalError(3948, "Loading local data is disabled")
+        return 1
+
+    def executemany(self, sql, rows):
+        self.conn.db.statements.append("executemany")
+        table = sql.split(" INTO ")[1].split()[0]
+        self.conn.staged_rows.extend((table, row) for row in rows)
+        return len(rows)
+
+    def fetchone(self):
+        return self.result
+
+
+@pytest.fixture
+def ratings_csv(tmp_path):
+    path = tmp_path / "ratings.csv"
+    pd.DataFrame({
+        "userId": [1, 1, 2, 2, 3, 3, 4],
+        "movieId": [10, 11, 10, 12, 11, 12, 10],
+        "rating": [4.0, 3.5, 9.0, 2.0, 5.0, 1.0, 4.5],
+        "datetime": ["2020-01-01 00:00:00"] * 7,
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_rows_are_batched_and_committed_per_chunk(monkeypatch, ratings_csv):
+    db = FakeDatabase()
+    monkeypatch.setattr(bulk_loader, "connecting_db", db.connect)
+    result = DemoRating.bulk_insert_from_csv(ratings_csv, chunk_rows=3, batch_size=2)
+
+    assert result["success"] and result["data"]["rows"] == 7
+    assert len(db.tables["demo_ratings"]) == 6  # the 9.0 rating is out of range
+    assert sorted(row[0] for row in db.tables["demo_users"]) == [1, 2, 3, 4]
+    assert "execute" not in db.statements and db.statements.count("executemany") >= 6
+    assert db.commits == 4  # three chunks plus the completion mark
+    assert db.checkpoints["demo_ratings"] == {"signature": bulk_loader.BulkLoader.signature(ratings_csv),
+                                              "rows_done": 7, "completed": True}
+
+    again = DemoRating.bulk_insert_from_csv(ratings_csv, chunk_rows=3)
+    assert again["success"] and again["data"]["rows"] == 0 and len(db.tables["demo_ratings"]) == 6
+
+
+def test_failed_load_resumes_after_last_committed_chunk(monkeypatch, ratings_csv):
+    db = FakeDatabase(fail_after_commits=1)
+    monkeypatch.setattr(bulk_loader, "connecting_db", db.connect)
+    failed = DemoRating.bulk_insert_from_csv(ratings_csv, chunk_rows=3)
+    assert not failed["success"] and db.checkpoints["demo_ratings"]["rows_done"] == 3
+
+    db.fail_after_commits = None
+    resumed = DemoRating.bulk_insert_from_csv(ratings_csv, chunk_rows=3)
+    assert resumed["success"] and resumed["data"]["resumed_from"] == 3 and resumed["data"]["rows"] == 4
+    # every CSV row written exactly once across both runs
+    assert sorted((r[0], r[1]) for r in db.tables["demo_ratings"]) == [
+        (1, 10), (1, 11), (2, 12), (3, 11), (3, 12), (4, 10)]
+
+
+def test_refused_load_data_falls_back_to_inserts(monkeypatch, tmp_path):
+    path = tmp_path / "movies.csv"
+    pd.DataFrame({"movieId": [1, 2], "title": ["A", "B"], "release_date": ["2001-01-01", None],
+                  "poster_path": [None, "b.jpg"]}).to_csv(path, index=False)
+    db = FakeDatabase()
+    monkeypatch.setattr(bulk_loader, "connecting_db", db.connect)
+    result = Movie.bulk_insert_from_csv(str(path), load_data=True)
+
+    assert result["success"] and "LOAD" in db.statements
+    rows = {row[0]: row for row in db.tables["movies"]}
+    assert rows[1][-1].startswith("https://via.placeholder.com") and rows[2][-1] == "b.jpg"
+    assert rows[2][4] is None and rows[1][-2] == "en"
@@ -0,0 +1,85 @@
+import pytest
+from app.view import cache as cache_module
+from app.view.cache import TTLCache, cached, set_cache, invalidate_user, invalidate_movie, user_tag, movie_tag
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fresh_cache(clock):
+    """Install an isolated in-memory cache for the test and restore the old one after."""
+    previous = cache_module._cache
+    cache = TTLCache(maxsize=8, ttl=10, clock=clock)
+    set_cache(cache)
+    yield cache
+    set_cache(previous)
+
+
+def test_ttl_expiry_and_counters(clock):
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == (True, 1)
+    clock.now = 11
+    assert cache.get("a") == (False, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 0)
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_tag_invalidation_and_copies(clock):
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("u1", {"data": [1]}, tags=["user:a"])
+    cache.set("u2", {"data": [2]}, tags=["user:b"])
+    hit, value = cache.get("u1")
+    value["data"].append(99)
+    assert cache.get("u1")[1] == {"data": [1]}
+    assert cache.invalidate_tags(["user:a"]) == 1
+    assert cache.get("u1") == (False, None)
+    assert cache.get("u2")[0]
+
+
+def test_cached_decorator_only_keeps_successes(fresh_cache):
+    calls = []
+
+    @cached("test:recs", tags=lambda a, res: [user_tag(a["user_email"])] + [movie_tag(m) for m in (res or {}).get("data", [])])
+    def recommend(user_email, k=10):
+        calls.append((user_email, k))
+        if user_email == "broken":
+            return {"success": False, "error": "boom"}
+        return {"success": True, "data": [1, 2][:k]}
+
+    assert recommend("a") == recommend("a", k=10) == recommend(user_email="a")
+    assert len(calls) == 1
+
+    recommend("broken")
+    recommend("broken")
+    assert calls.count(("broken", 10)) == 2
+
+    invalidate_user("a")
+    recommend("a")
+    assert len([c for c in calls if c[0] == "a"]) == 2
+
+    invalidate_movie(2)
+    recommend("a")
+    assert len([c for c in calls if c[0] == "a"]) == 3
@@ -0,0 +1,118 @@
+import pytest
+import threading
+import time
+
+from app.config.db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Minimal stand-in for a pymysql connection."""
+
+    def __init__(self, healthy=True):
+        self.open = True
+        self.healthy = healthy
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError("server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.open = False
+
+    def cursor(self):
+        return "cursor"
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+def make_pool(created, **kwargs):
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+    return ConnectionPool(connect=connect, **kwargs)
+
+
+def test_close_returns_connection_for_reuse(created):
+    pool = make_pool(created, size=2)
+    conn = pool.acquire()
+    assert conn.cursor() == "cursor"
+    conn.close()
+    conn.close()  # idempotent
+
+    with pool.connection() as again:
+        assert again._raw is created[0]
+    assert len(created) == 1
+    assert created[0].rollbacks == 2
+    assert pool.stats() == {"size": 2, "open": 1, "idle": 1}
+
+
+def test_pool_is_bounded(created):
+    pool = make_pool(created, size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    released = []
+    def waiter():
+        with pool.connection():
+            released.append(True)
+    t = threading.Thread(target=waiter)
+    pool.timeout = 5
+    t.start()
+    held.close()
+    t.join(timeout=5)
+    assert released == [True]
+    assert len(created) == 1
+
+
+def test_unhealthy_and_expired_connections_are_replaced(created):
+    pool = make_pool(created, size=2, ping_interval=0)
+    conn = pool.acquire()
+    conn.close()
+    created[0].healthy = False
+
+    with pool.connection() as fresh:
+        assert fresh._raw is created[1]
+    assert not created[0].open
+
+    pool.max_lifetime = 0
+    with pool.connection() as newest:
+        assert newest._raw is created[2]
+    assert pool.stats()["open"] == 0
+
+
+def test_dropped_connection_is_released(created):
+    pool = make_pool(created, size=1, timeout=0.05)
+    pool.acquire()  # never closed; reference dropped immediately
+    with pool.connection():
+        pass
+    assert len(created) == 1
+
+
+def test_get_pool_builds_one_pool_under_concurrent_first_use(monkeypatch):
+    from app.config import db_connection
+
+    built = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)  # widen the window between the None check and the assignment
+            built.append(self)
+
+    monkeypatch.setattr(db_connection, "ConnectionPool", SlowPool)
+    monkeypatch.setattr(db_connection, "_pool", None)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(db_connection.get_pool())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(built) == 1 and all(pool is built[0] for pool in pools)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommend_model.scripts.evaluator import evaluate, split_ratings
+from recommend_model.scripts.train_als import train as train_als
+from recommend_model.scripts.train_similarity import train as train_neighbors
+
+
+@pytest.fixture
+def split():
+    rng = np.random.default_rng(9)
+    rows = [(u, m, float(rng.integers(1, 11)) / 2)
+            for u in range(50) for m in range(1, 61) if rng.random() < 0.3]
+    return split_ratings(pd.DataFrame(rows, columns=["userId", "movieId", "rating"]), test_size=0.25)
+
+
+def loop_reference(index, train_df, test_df, k=10, threshold=4.0):
+    """Per-user, per-movie loops over the neighbor lists."""
+    sims = {}
+    for movieId in index.item_ids.tolist():
+        positions, values = index.neighbors(movieId)
+        sims[movieId] = dict(zip(index.item_ids[positions].tolist(), values.tolist()))
+
+    errors, precisions, recalls = [], [], []
+    for user, user_test in test_df.groupby("userId"):
+        history = dict(zip(train_df[train_df.userId == user].movieId, train_df[train_df.userId == user].rating))
+        if not history:
+            continue
+        scores = {}
+        for candidate in index.item_ids.tolist():
+            num = sum(r * sims[j].get(candidate, 0.0) for j, r in history.items() if j in sims)
+            den = sum(abs(sims[j].get(candidate, 0.0)) for j in history if j in sims)
+            if den > 0:
+                scores[candidate] = (num, num / den)
+        for movieId, rating in zip(user_test.movieId, user_test.rating):
+            if movieId in scores:
+                errors.append(scores[movieId][1] - rating)
+        liked = set(user_test[user_test.rating >= threshold].movieId)
+        if liked:
+            unseen = sorted((m for m in scores if m not in history), key=lambda m: -scores[m][0])[:k]
+            hits = len(liked & set(unseen))
+            precisions.append(hits / k)
+            recalls.append(hits / len(liked))
+    return np.sqrt(np.mean(np.square(errors))), np.mean(precisions), np.mean(recalls)
+
+
+def test_vectorized_metrics_match_loops(split):
+    train_df, test_df = split
+    index = train_neighbors(train_df, top_n=15)
+    results = evaluate(index, train_df, test_df, k=5, shard_size=16)
+    rmse, precision, recall = loop_reference(index, train_df, test_df, k=5)
+    assert results["rmse"] == pytest.approx(rmse, abs=1e-6)
+    assert results["precision@5"] == pytest.approx(precision, abs=1e-9)
+    assert results["recall@5"] == pytest.approx(recall, abs=1e-9)
+    assert 0 < results["ndcg@5"] <= 1 and 0 < results["coverage"] <= 1
+
+
+def test_parallel_shards_match_serial(split):
+    train_df, test_df = split
+    model = train_als(train_df, factors=4, iterations=5, ann=False)
+    serial = evaluate(model, train_df, test_df, shard_size=16)
+    parallel = evaluate(model, train_df, test_df, shard_size=16, workers=2)
+    for key in ("rmse", "mae", "coverage", "precision@10", "recall@10", "ndcg@10", "users"):
+        assert parallel[key] == pytest.approx(serial[key])
+
+
+def test_implicit_models_only_rank(split):
+    train_df, test_df = split
+    results = evaluate(train_als(train_df, mode="implicit", factors=4, iterations=3, ann=False), train_df, test_df)
+    assert results["rmse"] is None and results["mae"] is None
+    assert results["users"] > 0
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from recommend_model.scripts.incremental_update import EventCursor, IncrementalSimilarity
+from recommend_model.scripts.train_similarity import train
+
+
+@pytest.fixture
+def ratings():
+    rng = np.random.default_rng(3)
+    rows = [(f"u{u}@example.com", m, float(rng.integers(1, 11)) / 2)
+            for u in range(30) for m in range(1, 41) if rng.random() < 0.35]
+    return pd.DataFrame(rows, columns=["userId", "movieId", "rating"])
+
+
+def random_events(ratings, rng, n=25):
+    """Mix of updates, deletes, inserts, a new user and a new movie."""
+    existing = ratings.sample(n=n, random_state=int(rng.integers(1 << 30)))
+    events = []
+    for i, row in enumerate(existing.itertuples(index=False)):
+        new = None if i % 3 == 0 else float(rng.integers(1, 11)) / 2
+        events.append({"user_email": row.userId, "movieId": row.movieId, "old_rating": row.rating, "new_rating": new})
+    for m in rng.choice(np.arange(1, 41), size=6, replace=False):
+        events.append({"user_email": "u0@example.com", "movieId": int(m), "old_rating": None, "new_rating": 4.0})
+    events += [
+        {"user_email": "new@example.com", "movieId": 1, "old_rating": None, "new_rating": 5.0},
+        {"user_email": "new@example.com", "movieId": 99, "old_rating": None, "new_rating": 3.5},
+        {"user_email": "u1@example.com", "movieId": 99, "old_rating": None, "new_rating": 2.0},
+        {"user_email": "u2@example.com", "movieId": 99, "old_rating": None, "new_rating": 4.5},
+    ]
+    return events
+
+
+def replay(ratings, events):
+    state = {(r.userId, r.movieId): r.rating for r in ratings.itertuples(index=False)}
+    for e in events:
+        if e["new_rating"] is None:
+            state.pop((e["user_email"], e["movieId"]), None)
+        else:
+            state[(e["user_email"], e["movieId"])] = e["new_rating"]
+    return pd.DataFrame([(u, m, r) for (u, m), r in state.items()], columns=["userId", "movieId", "rating"])
+
+
+def assert_same_neighbors(model, reference):
+    index = model.to_index()
+    for movieId in reference.item_ids.tolist():
+        _, expected = reference.neighbors(movieId)
+        _, got = index.neighbors(movieId)
+        assert len(got) == len(expected), movieId
+        assert np.allclose(got, expected, atol=1e-4), movieId
+
+
+def test_incremental_updates_match_full_retrain(ratings):
+    rng = np.random.default_rng(11)
+    model = IncrementalSimilarity.from_ratings(ratings, top_n=6, block_size=8)
+    current = ratings
+    for _ in range(3):
+        events = random_events(current, rng)
+        summary = model.apply(events)
+        current = replay(current, events)
+        assert summary["changed_items"] > 0
+        assert_same_neighbors(model, train(current, top_n=6, block_size=8))
+
+
+def test_replayed_and_no_op_events_change_nothing(ratings):
+    model = IncrementalSimilarity.from_ratings(ratings, top_n=6)
+    row = ratings.iloc[0]
+    same = {"user_email": row.userId, "movieId": int(row.movieId), "old_rating": row.rating, "new_rating": row.rating}
+    assert model.apply([same])["changed_items"] == 0
+    assert model.apply([])["events"] == 0
+
+
+def test_event_cursor_waits_for_ids_that_commit_out_of_order():
+    cursor = EventCursor(watermark=2, grace=60, now=0)
+    first = cursor.accept([{"event_id": 3}, {"event_id": 6}, {"event_id": 4}], now=10)
+    assert [e["event_id"] for e in first] == [3, 4, 6]
+    assert cursor.gap_ids() == [5] and cursor.watermark == 4 and cursor.max_seen == 6
+
+    # id 5 commits late; 6 is read again and must not be applied twice
+    late = cursor.accept([{"event_id": 5}, {"event_id": 6}, {"event_id": 7}], now=20)
+    assert [e["event_id"] for e in late] == [5, 7]
+    assert cursor.gap_ids() == [] and cursor.watermark == 7
+
+    cursor.accept([{"event_id": 9}], now=30)
+    assert cursor.expire(now=60) == [] and cursor.watermark == 7
+    assert cursor.expire(now=90) == [8] and cursor.watermark == 9
+
+
+def test_late_event_reaches_the_model(ratings):
+    rng = np.random.default_rng(3)
+    events = [dict(e, event_id=i + 1) for i, e in enumerate(random_events(ratings, rng))]
+    # committed after every later id was read; row locks order events of one pair, so pick a pair seen once
+    keys = [(e["user_email"], e["movieId"]) for e in events]
+    held = next(e for e, key in zip(events[5:], keys[5:]) if keys.count(key) == 1)
+    model = IncrementalSimilarity.from_ratings(ratings, top_n=6)
+    cursor = EventCursor(grace=60, now=0)
+
+    model.apply(cursor.accept([e for e in events if e is not held], now=1))
+    assert cursor.gap_ids() == [held["event_id"]] and cursor.watermark == held["event_id"] - 1
+    model.apply(cursor.accept([held] + events[-3:], now=2))
+    assert cursor.watermark == len(events)
+    assert_same_neighbors(model, train(replay(ratings, events), top_n=6, block_size=8))
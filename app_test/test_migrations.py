@@ -0,0 +1,118 @@
+import app.models.migrations as migrations
+from app.models.migrations import Migrations, add_index
+from check_query_plans import plan_problems
+
+
+class FakeConnection:
+    """Records statements; knows which indexes and migration versions exist."""
+
+    def __init__(self, indexes=(), applied=(), duplicates=()):
+        self.indexes = set(indexes)
+        self.applied = list(applied)
+        self.duplicates = list(duplicates)
+        self.statements, self.batches = [], []
+        self.commits = 0
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.connection.statements.append(sql)
+        if "information_schema.statistics" in sql:
+            self.rows = [{"1": 1}] if tuple(params) in self.connection.indexes else []
+        elif sql.startswith("SELECT older.rating_id"):
+            self.rows = self.connection.duplicates
+        elif sql.startswith("SELECT version"):
+            self.rows = [{"version": v} for v in self.connection.applied]
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.connection.applied.append(params[0])
+        elif sql.startswith("CREATE"):
+            table, name = sql.split(" ON ")[1].split()[0], sql.split(" INDEX ")[1].split()[0]
+            self.connection.indexes.add((table, name))
+
+    def executemany(self, sql, rows):
+        self.connection.batches.append((" ".join(sql.split()), list(rows)))
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_add_index_skips_existing_indexes():
+    conn = FakeConnection(indexes={("ratings", "uq_ratings_user_movie")})
+    cursor = conn.cursor()
+    assert not add_index(cursor, "ratings", "uq_ratings_user_movie", "user_email, movieId", unique=True)
+    assert add_index(cursor, "watchlist", "idx_watchlist_added", "added_at")
+    assert conn.statements[-1] == "CREATE INDEX idx_watchlist_added ON watchlist (added_at)"
+
+
+def test_apply_runs_pending_migrations_in_order(monkeypatch):
+    conn = FakeConnection(applied=[1])
+    monkeypatch.setattr(migrations, "connecting_db", lambda: conn)
+    ran = []
+    steps = [(v, f"step {v}", lambda cursor, v=v: ran.append(v)) for v in (3, 1, 2, 4)]
+
+    result = Migrations.apply(target=3, migrations=steps)
+    assert result["success"] and result["data"] == [2, 3] and ran == [2, 3]
+    assert Migrations.apply(migrations=steps)["data"] == [4]
+
+
+def test_failed_migration_stops_and_is_not_recorded(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(migrations, "connecting_db", lambda: conn)
+
+    def broken(cursor):
+        raise RuntimeError("boom")
+
+    result = Migrations.apply(migrations=[(1, "ok", lambda cursor: None), (2, "broken", broken), (3, "later", lambda c: None)])
+    assert not result["success"] and "migration 2" in result["error"]
+    assert conn.applied == [1]
+
+
+def test_unique_rating_migration_dedupes_before_indexing(monkeypatch):
+    rebuilt = []
+    monkeypatch.setattr(migrations.MovieRatingStats, "rebuild", staticmethod(lambda: rebuilt.append(1)))
+    conn = FakeConnection(duplicates=[
+        {"rating_id": 3, "user_email": "a@example.com", "movieId": 7, "rating": 2.0, "kept_rating": 4.5},
+        {"rating_id": 5, "user_email": "a@example.com", "movieId": 7, "rating": 3.0, "kept_rating": 4.5},
+    ])
+    migrations._ratings_user_movie_unique(conn.cursor())
+
+    assert conn.statements[2] == "DELETE FROM ratings WHERE rating_id IN (%s, %s)"
+    # every removed row is logged for the incremental neighbor updater
+    sql, events = conn.batches[0]
+    assert sql.startswith("INSERT INTO rating_events")
+    assert events == [("a@example.com", 7, 2.0, 4.5), ("a@example.com", 7, 3.0, 4.5)]
+    assert rebuilt == [1]
+    assert conn.statements[-1] == "CREATE UNIQUE INDEX uq_ratings_user_movie ON ratings (user_email, movieId)"
+
+
+def test_plan_problems_flags_large_full_scans_and_filesorts():
+    plan = [
+        {"table": "ratings", "type": "ALL", "rows": 100000, "possible_keys": None, "Extra": "Using where"},
+        {"table": "movies", "type": "ALL", "rows": 10, "possible_keys": None, "Extra": ""},
+        {"table": "watchlist", "type": "ref", "rows": 5000, "possible_keys": "idx", "Extra": "Using filesort"},
+        {"table": "users", "type": "const", "rows": 1, "possible_keys": "PRIMARY", "Extra": ""},
+    ]
+    problems = plan_problems(plan, min_rows=1000)
+    assert len(problems) == 2
+    assert problems[0].startswith("full scan of ratings") and problems[1].startswith("filesort on watchlist")
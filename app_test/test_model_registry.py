@@ -0,0 +1,86 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.similarity_index import SimilarityIndex
+from app.view import cache
+from app.view.model_registry import ModelRegistry
+
+
+def make_index(top_n):
+    ids = [1, 2, 3, 5, 8]
+    rng = np.random.default_rng(top_n)
+    raw = rng.random((len(ids), len(ids)))
+    return SimilarityIndex.from_dense(pd.DataFrame((raw + raw.T) / 2, index=ids, columns=ids), top_n=top_n)
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "item_neighbors")
+
+
+def test_requests_keep_the_model_they_started_with(root):
+    v1 = make_index(2).publish(root)
+    registry = ModelRegistry(root, interval=0)
+    held = registry.get()
+    v2 = make_index(3).publish(root)
+
+    assert registry.get().version == v2
+    assert held.version == v1 and held.top_n == 2
+    assert held.neighbors(1)[0].size == 2
+
+
+def test_interval_limits_filesystem_checks(root):
+    v1 = make_index(2).publish(root)
+    registry = ModelRegistry(root, interval=3600)
+    assert registry.get().version == v1
+    make_index(3).publish(root)
+    assert registry.get().version == v1
+    assert registry.refresh() is True
+    assert registry.version != v1
+
+
+def test_background_poller_swaps_without_readers_checking(root):
+    make_index(2).publish(root)
+    registry = ModelRegistry(root, interval=0.01)
+    registry.get()
+    registry.start_polling()
+    try:
+        v2 = make_index(3).publish(root)
+        deadline = time.monotonic() + 5
+        while registry.version != v2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert registry.version == v2
+    finally:
+        registry.stop_polling()
+
+
+def test_swap_keeps_cached_results_but_rollback_drops_them(root, monkeypatch):
+    monkeypatch.setattr(cache, "_cache", cache.TTLCache(maxsize=16, ttl=60))
+    v1 = make_index(2).publish(root)
+    registry = ModelRegistry(root, interval=0)
+    registry.get()
+    cache.get_cache().set("recs:similar:1", {"success": True}, tags=[cache.MODEL_TAG])
+
+    make_index(3).publish(root)
+    registry.get()
+    assert cache.get_cache().get("recs:similar:1")[0]
+
+    registry.activate(v1)
+    assert registry.version == v1
+    assert SimilarityIndex.current_version(root) == v1
+    assert not cache.get_cache().get("recs:similar:1")[0]
+
+
+def test_activate_rejects_unknown_versions(root):
+    make_index(2).publish(root)
+    with pytest.raises(ValueError):
+        ModelRegistry(root).activate("19990101T000000-000")
+
+
+def test_fallback_used_until_a_model_is_published(root):
+    registry = ModelRegistry(root, interval=0, fallback=lambda: make_index(1))
+    assert registry.get().version is None and registry.get().top_n == 1
+    v1 = make_index(2).publish(root)
+    assert registry.get().version == v1
@@ -122,6 +122,30 @@ def test_movie_crud(sample_movie):
             except:
                 pass  # Ignore cleanup errors
 
+def test_movie_fetch_by_ids(sample_movie):
+    """Test bulk movie fetch keeps the requested order and skips unknown IDs"""
+    base_id = 900000000 + int(datetime.now().strftime("%H%M%S")) * 10
+    movie_ids = [base_id + 1, base_id + 2, base_id + 3]
+    try:
+        for i, movie_id in enumerate(movie_ids):
+            movie = dict(sample_movie, title=f"{sample_movie['title']} #{i}")
+            add_result = Movie.add_movie(movieId=movie_id, **movie)
+            assert add_result["success"], f"Failed to add movie: {add_result.get('error')}"
+
+        requested = [movie_ids[2], base_id + 9, movie_ids[0], movie_ids[2]]
+        result = Movie.fetch_by_ids(requested)
+        assert result["success"], f"Failed to fetch movies: {result.get('error')}"
+        assert [m["movieId"] for m in result["data"]] == [movie_ids[2], movie_ids[0]]
+
+        empty = Movie.fetch_by_ids([])
+        assert empty["success"] and empty["data"] == []
+    finally:
+        for movie_id in movie_ids:
+            try:
+                Movie.delete_movie(movie_id)
+            except:
+                pass
+
 def test_rating_crud(sample_user, sample_movie):
     """Test rating CRUD operations with dependencies"""
     movie_id = None
@@ -0,0 +1,55 @@
+import app.models.rating_stats as rating_stats
+from app.view.movie import MovieService
+
+# movieId -> (rating_sum, rating_count, rating_sq_sum) in movie_rating_stats
+STATS = {1: (9.0, 2, 40.5), 2: (4.0, 1, 16.0), 3: (0.0, 0, 0.0)}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.executed.append((" ".join(sql.split()), params))
+        self.rows = [{"movieId": m, "rating_sum": STATS[m][0], "rating_count": STATS[m][1], "rating_sq_sum": STATS[m][2]}
+                     for m in params if m in STATS and STATS[m][1] > 0]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_attach_avg_ratings_uses_one_grouped_lookup(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(rating_stats, "connecting_db", lambda: conn)
+    movies = [
+        {"movieId": 1, "vote_average": 7.1},
+        {"movieId": 2, "vote_average": None},
+        {"movieId": 3, "vote_average": 6.4},  # stats row with no ratings left
+        {"movieId": 4, "vote_average": 5.0},  # never rated
+        {"movieId": "1", "vote_average": 7.1},
+    ]
+    result = MovieService._attach_avg_ratings(movies)
+
+    assert len(conn.executed) == 1
+    sql, params = conn.executed[0]
+    assert sql.startswith("SELECT movieId, rating_sum") and params == (1, 2, 3, 4)
+    assert [(m["avg_rating"], m["rating_count"]) for m in result] == [(4.5, 2), (4.0, 1), (6.4, 0), (5.0, 0), (4.5, 2)]
+
+
+def test_attach_avg_ratings_without_movies_skips_the_query(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(rating_stats, "connecting_db", lambda: conn)
+    assert MovieService._attach_avg_ratings([]) == []
+    assert conn.executed == []
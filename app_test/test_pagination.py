@@ -0,0 +1,79 @@
+import pytest
+
+import app.models.movies_data as movies_data
+from app.models.movies_data import Movie
+from app.utils.pagination import InvalidPageToken, decode_token, encode_token, keyset_clause, paginate
+
+
+class FakeCursor:
+    """Serves `rows` (dicts) for keyset queries on movieId, honouring the after/before bound and order."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+        *bound, limit = params
+        rows = sorted(self.rows, key=lambda r: r["movieId"], reverse="DESC" in sql)
+        if bound:
+            key = bound[-1]
+            rows = [r for r in rows if (r["movieId"] > key if ">" in sql.split("WHERE")[1] else r["movieId"] < key)]
+        self.result = rows[:limit]
+
+    def fetchall(self):
+        return self.result
+
+
+def pages(cursor, limit, token=None, direction="next_token"):
+    while True:
+        page = paginate(cursor, "SELECT * FROM movies", [], [], ["movieId"], limit, token)
+        yield page
+        token = page[direction]
+        if not token:
+            return
+
+
+def test_token_round_trip_and_rejects_garbage():
+    token = encode_token("after", [42, "2024-01-01"])
+    assert decode_token(token) == ("after", [42, "2024-01-01"])
+    assert decode_token(None) == (None, None)
+    for bad in ("not-a-token", encode_token("sideways", [1])):
+        with pytest.raises(InvalidPageToken):
+            decode_token(bad)
+
+
+def test_keyset_clause_expands_row_comparison():
+    clause, params = keyset_clause(["release_date", "movieId"], ["2024-01-01", 7], "after")
+    assert clause == "((release_date > %s) OR (release_date = %s AND movieId > %s))"
+    assert params == ["2024-01-01", "2024-01-01", 7]
+
+
+def test_next_then_prev_walks_every_row_once():
+    cursor = FakeCursor([{"movieId": i} for i in range(1, 8)])
+    forward = list(pages(cursor, 3))
+    assert [[r["movieId"] for r in p["data"]] for p in forward] == [[1, 2, 3], [4, 5, 6], [7]]
+    assert forward[0]["prev_token"] is None and forward[-1]["next_token"] is None
+    assert all("OFFSET" not in sql for sql, _ in cursor.executed)
+
+    backward = list(pages(cursor, 3, forward[-1]["prev_token"], "prev_token"))
+    assert [[r["movieId"] for r in p["data"]] for p in backward] == [[4, 5, 6], [1, 2, 3]]
+    assert backward[-1]["next_token"] == forward[0]["next_token"]
+
+
+def test_movie_fetch_all_returns_tokens_and_reports_bad_token(monkeypatch):
+    class Conn:
+        def __init__(self):
+            self.cur = FakeCursor([{"movieId": i} for i in range(1, 4)])
+
+        def cursor(self, cursor_class=None):
+            return self.cur
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(movies_data, "connecting_db", Conn)
+    res = Movie.fetch_all(limit=2)
+    assert res["success"] and [m["movieId"] for m in res["data"]] == [1, 2] and res["next_token"]
+    assert [m["movieId"] for m in Movie.fetch_all(limit=2, page_token=res["next_token"])["data"]] == [3]
+    assert not Movie.fetch_all(limit=2, page_token="garbage")["success"]
@@ -0,0 +1,146 @@
+import math
+import re
+import numpy as np
+import pytest
+
+import app.models.rating_stats as rating_stats
+from app.models.rating_stats import HIST_COLUMNS, MovieRatingStats
+
+
+class StatsConnection:
+    """
+    movie_rating_stats held in a dict. change_sql() upserts (with literal
+    ratings in place of OLD/NEW) are evaluated and added to existing columns,
+    and rebuild's INSERT ... SELECT aggregates `ratings` (movieId -> list).
+    """
+
+    def __init__(self, ratings=None):
+        self.ratings = ratings or {}
+        self.table = {}
+
+    def cursor(self, cursor_class=None):
+        return StatsCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StatsCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.row = None
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        table = self.conn.table
+        if sql.startswith("INSERT INTO movie_rating_stats") and "SELECT" in sql:
+            table.clear()
+            for movieId, values in self.conn.ratings.items():
+                if values:
+                    row = {"rating_sum": sum(values), "rating_count": len(values),
+                           "rating_sq_sum": sum(v * v for v in values)}
+                    # FLOOR(rating * 2 + 0.5) = b, as in the SQL
+                    row.update({col: sum(math.floor(v * 2 + 0.5) == b for v in values) for b, col in enumerate(HIST_COLUMNS)})
+                    table[movieId] = row
+            self.rowcount = len(table)
+        elif sql.startswith("INSERT INTO movie_rating_stats"):
+            match = re.match(r"INSERT INTO movie_rating_stats \(movieId, (.*?)\) VALUES \((.*)\) ON DUPLICATE", sql)
+            columns = match.group(1).split(", ")
+            values = [sql_eval(expr) for expr in match.group(2).split(", ")]
+            self._add(values[0], dict(zip(columns, values[1:])))
+        elif sql.startswith("DELETE FROM movie_rating_stats"):
+            table.clear()
+        elif sql.startswith("SELECT COALESCE"):
+            self.row = {col: sum(row.get(col, 0) for row in table.values()) for col in HIST_COLUMNS}
+
+    def _add(self, movieId, deltas):
+        row = self.conn.table.setdefault(movieId, {})
+        for col, delta in deltas.items():
+            row[col] = row.get(col, 0) + delta
+
+    def fetchone(self):
+        return self.row
+
+
+def sql_eval(expr):
+    """Evaluate the arithmetic/FLOOR/comparison SQL that change_expressions() emits."""
+    return eval(expr.replace("FLOOR(", "floor(").replace(" = ", " == "), {"floor": math.floor})
+
+
+def literal(rating):
+    return None if rating is None else repr(rating)
+
+
+def fire(cursor, movieId, old=None, new=None):
+    """What the ratings triggers run for one row change (the update trigger skips unchanged ratings)."""
+    if old is not None and new is not None and old == new:
+        return
+    cursor.execute(MovieRatingStats.change_sql(repr(movieId), literal(old), literal(new)))
+
+
+def stats_of(table):
+    """Rows compared with floats rounded and zero histogram columns dropped."""
+    return {
+        movieId: {col: round(value, 6) for col, value in row.items() if value or not col.startswith("hist_")}
+        for movieId, row in table.items() if row.get("rating_count")
+    }
+
+
+@pytest.mark.parametrize("rating, bucket", [(0.0, 0), (0.5, 1), (0.74, 1), (0.75, 2), (3.5, 7), (4.99, 10), (5.0, 10)])
+def test_change_buckets_round_to_half_stars(rating, bucket):
+    values = {col: sql_eval(expr) for col, expr in MovieRatingStats.change_expressions(new=repr(rating)).items()}
+    assert [col for col in HIST_COLUMNS if values[col]] == [f"hist_{bucket}"]
+
+
+def test_change_expressions_for_insert_update_and_delete():
+    def evaluated(old=None, new=None):
+        expressions = MovieRatingStats.change_expressions(literal(old), literal(new))
+        return {col: value for col, value in ((c, sql_eval(e)) for c, e in expressions.items())
+                if value or not col.startswith("hist_")}
+
+    assert evaluated(None, 4.0) == {"rating_sum": 4.0, "rating_count": 1, "rating_sq_sum": 16.0, "hist_8": 1}
+    assert evaluated(4.0, 2.5) == {"rating_sum": -1.5, "rating_count": 0, "rating_sq_sum": -9.75, "hist_8": -1, "hist_5": 1}
+    assert evaluated(3.0, None) == {"rating_sum": -3.0, "rating_count": -1, "rating_sq_sum": -9.0, "hist_6": -1}
+    # same bucket: the histogram change cancels out
+    assert "hist_8" not in evaluated(4.0, 4.1)
+
+
+def test_trigger_changes_match_rebuild(monkeypatch):
+    rng = np.random.default_rng(11)
+    conn = StatsConnection()
+    cursor = conn.cursor()
+    current = {}  # (user, movie) -> rating
+    for _ in range(400):
+        key = (int(rng.integers(8)), int(rng.integers(1, 6)))
+        old = current.get(key)
+        new = None if old is not None and rng.random() < 0.3 else float(rng.integers(0, 11)) / 2
+        if new is None:
+            del current[key]
+        else:
+            current[key] = new
+        fire(cursor, key[1], old, new)
+    incremental = stats_of(conn.table)
+
+    ratings = {}
+    for (_, movieId), rating in current.items():
+        ratings.setdefault(movieId, []).append(rating)
+    rebuilt = StatsConnection(ratings)
+    monkeypatch.setattr(rating_stats, "connecting_db", lambda: rebuilt)
+    assert MovieRatingStats.rebuild()["success"]
+    assert incremental == stats_of(rebuilt.table)
+
+
+def test_distribution_lists_non_empty_buckets(monkeypatch):
+    conn = StatsConnection()
+    for movieId, rating in [(1, 4.0), (1, 4.0), (2, 4.0), (2, 0.5), (3, 5.0)]:
+        fire(conn.cursor(), movieId, new=rating)
+    monkeypatch.setattr(rating_stats, "connecting_db", lambda: conn)
+    res = MovieRatingStats.distribution()
+    assert res["success"] and res["data"] == [{"rating": 0.5, "count": 1}, {"rating": 4.0, "count": 3}, {"rating": 5.0, "count": 1}]
@@ -0,0 +1,174 @@
+import threading
+import time
+import pytest
+
+import app.models.movies_data as movies_data
+import app.models.ratings_data as ratings_data
+from app.models.movies_data import Movie
+from app.models.ratings_data import Rating, trigger_statements
+
+
+class RatingsTable:
+    """
+    ratings keyed by (user_email, movieId) with InnoDB-style row locks: an upsert
+    locks its row (new or existing) until the transaction ends, and a second
+    writer of the same row waits for it.
+    """
+
+    def __init__(self, existing=None):
+        self.rows = dict(existing or {})
+        self.owners = {}
+        self.cond = threading.Condition()
+
+    def upsert(self, txn, key, rating):
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.owners.get(key) in (None, txn), timeout=5):
+                raise RuntimeError("Lock wait timeout exceeded")
+            self.owners[key] = txn
+            old = self.rows.get(key)
+            self.rows[key] = rating
+        time.sleep(0.05)  # hold the lock long enough for a concurrent writer to queue on it
+        return 1 if old is None else (0 if old == rating else 2)
+
+    def release(self, txn):
+        with self.cond:
+            for key in [k for k, owner in self.owners.items() if owner is txn]:
+                del self.owners[key]
+            self.cond.notify_all()
+
+
+class FakeConnection:
+    """One transaction on a RatingsTable; records every statement."""
+
+    def __init__(self, table=None):
+        self.table = table or RatingsTable()
+        self.executed, self.batches = [], []
+        self.committed = self.rolled_back = False
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+        self.table.release(self)
+
+    def rollback(self):
+        self.rolled_back = True
+        self.table.release(self)
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.conn.executed.append((sql, params))
+        if sql.startswith("SELECT user_email, movieId FROM ratings"):
+            keys = list(zip(params[::2], params[1::2]))
+            self.rows = [{"user_email": e, "movieId": m} for e, m in keys if (e, m) in self.conn.table.rows]
+        elif sql.startswith("INSERT INTO ratings"):
+            self.rowcount = self.conn.table.upsert(self.conn, (params[0], params[1]), params[2])
+
+    def executemany(self, sql, rows):
+        self.conn.batches.append((" ".join(sql.split()), list(rows)))
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.mark.parametrize("existing, status", [({}, "inserted"), ({("a@example.com", 7): 3.0}, "updated"),
+                                              ({("a@example.com", 7): 4.5}, "updated")])
+def test_save_is_one_upsert_and_reports_status(monkeypatch, existing, status):
+    conn = FakeConnection(RatingsTable(existing))
+    monkeypatch.setattr(ratings_data, "connecting_db", lambda: conn)
+    result = Rating("a@example.com", 7, 4.5).save()
+
+    assert result["success"] and result["data"] == {"movieId": 7, "status": status} and conn.committed
+    # stats and events come from the triggers: no lookup, lock or follow-up write from the client
+    assert len(conn.executed) == 1
+    sql, _ = conn.executed[0]
+    assert sql.startswith("INSERT INTO ratings") and "ON DUPLICATE KEY UPDATE" in sql and "@" not in sql
+
+
+def test_concurrent_first_ratings_of_a_pair_queue_instead_of_deadlocking(monkeypatch):
+    table = RatingsTable()
+    monkeypatch.setattr(ratings_data, "connecting_db", lambda: FakeConnection(table))
+    start = threading.Barrier(2, timeout=5)
+    results = []
+
+    def rate(value):
+        start.wait()
+        results.append(Rating("a@example.com", 7, value).save())
+
+    threads = [threading.Thread(target=rate, args=(value,)) for value in (3.0, 4.0)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert all(res["success"] for res in results), results
+    assert sorted(res["data"]["status"] for res in results) == ["inserted", "updated"]
+    assert table.rows[("a@example.com", 7)] in (3.0, 4.0) and not table.owners
+
+
+def test_save_many_batches_and_reports_each_row(monkeypatch):
+    conn = FakeConnection(RatingsTable({("a@example.com", 2): 3.0}))
+    monkeypatch.setattr(ratings_data, "connecting_db", lambda: conn)
+    ratings = [Rating("a@example.com", 1, 4.0), Rating("a@example.com", 2, 5.0),
+               Rating("a@example.com", 3, 1.0), Rating("a@example.com", 1, 2.0)]
+    result = Rating.save_many(ratings, batch_size=2)
+
+    assert result["success"] and conn.committed
+    assert [(row["movieId"], row["status"]) for row in result["data"]] == [(2, "updated"), (3, "inserted"), (1, "inserted")]
+    assert not any("FOR UPDATE" in sql for sql, _ in conn.executed)
+    assert [sql.split(" (")[0] for sql, _ in conn.batches] == ["INSERT INTO ratings"] * 2
+    assert [len(rows) for _, rows in conn.batches] == [2, 1]
+    assert ("a@example.com", 1, 2.0) in [row[:3] for _, rows in conn.batches for row in rows]  # the later duplicate wins
+
+
+def test_delete_movie_deletes_its_ratings_first_so_the_triggers_log_them(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(movies_data, "connecting_db", lambda: conn)
+    assert Movie.delete_movie(7)["success"] and conn.committed
+    # one transaction, ratings before the movie: the cascade alone would bypass the delete trigger
+    assert conn.executed == [("DELETE FROM ratings WHERE movieId=%s", (7,)), ("DELETE FROM movies WHERE movieId=%s", (7,))]
+
+
+def test_triggers_write_stats_and_events_from_old_and_new_rows():
+    triggers = trigger_statements()
+    assert set(triggers) == {"ratings_after_insert", "ratings_after_update", "ratings_after_delete"}
+    for name, sql in triggers.items():
+        sql = " ".join(sql.split())
+        assert sql.startswith(f"CREATE TRIGGER {name} AFTER {name.split('_')[-1].upper()} ON ratings FOR EACH ROW")
+        assert "INSERT INTO movie_rating_stats" in sql and "INSERT INTO rating_events" in sql
+    insert, update, delete = (" ".join(triggers[f"ratings_after_{op}"].split()) for op in ("insert", "update", "delete"))
+    assert "OLD." not in insert and "VALUES (NEW.user_email, NEW.movieId, NULL, NEW.rating)" in insert
+    assert "IF NOT (OLD.rating <=> NEW.rating) THEN" in update
+    assert "VALUES (NEW.user_email, NEW.movieId, OLD.rating, NEW.rating)" in update
+    assert "NEW." not in delete and "VALUES (OLD.user_email, OLD.movieId, OLD.rating, NULL)" in delete
+
+
+def test_install_triggers_creates_only_missing_ones():
+    class Cursor:
+        def __init__(self):
+            self.created = []
+            self.found = None
+
+        def execute(self, sql, params=()):
+            if "information_schema.triggers" in sql:
+                self.found = {"1": 1} if params[0] == "ratings_after_insert" else None
+            else:
+                self.created.append(sql.split()[2])
+
+        def fetchone(self):
+            return self.found
+
+    cursor = Cursor()
+    assert Rating.install_triggers(cursor) == ["ratings_after_update", "ratings_after_delete"]
+    assert cursor.created == ["ratings_after_update", "ratings_after_delete"]
@@ -0,0 +1,260 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.models.similarity_index import SimilarityIndex
+from app.view.popularity import PopularitySnapshot
+from app.view.model_registry import ModelRegistry
+from app.view.recommendation import RecommendationService
+
+
+@pytest.fixture
+def similarity_matrix():
+    """Small symmetric item-item similarity matrix loaded into the service cache."""
+    rng = np.random.default_rng(7)
+    ids = [1, 2, 3, 5, 8, 13, 21, 34]
+    raw = rng.random((len(ids), len(ids)))
+    sims = (raw + raw.T) / 2
+    np.fill_diagonal(sims, 1.0)
+    matrix = pd.DataFrame(sims, index=ids, columns=ids)
+    RecommendationService._registry.set(SimilarityIndex.from_dense(matrix, top_n=len(ids)))
+    yield matrix
+    RecommendationService._registry.set(None)
+
+
+def _loop_scores(matrix, user_ratings):
+    """Reference implementation: the original per-row accumulation."""
+    rated = {r["movieId"] for r in user_ratings}
+    scores = {}
+    for r in user_ratings:
+        if r["movieId"] not in matrix.index:
+            continue
+        for sim_movie, sim_score in matrix[r["movieId"]].dropna().items():
+            if sim_movie not in rated:
+                scores[sim_movie] = scores.get(sim_movie, 0) + sim_score * r["rating"]
+    return scores
+
+
+def test_score_user_matches_loop(similarity_matrix):
+    """Vectorized scores rank unseen movies the same way as the original loop."""
+    user_ratings = [
+        {"movieId": 1, "rating": 4.0},
+        {"movieId": 8, "rating": 2.5},
+        {"movieId": 21, "rating": 5.0},
+    ]
+    expected = _loop_scores(similarity_matrix, user_ratings)
+    expected_top = [m for m, _ in sorted(expected.items(), key=lambda x: x[1], reverse=True)[:3]]
+
+    assert RecommendationService._score_user(user_ratings, k=3) == expected_top
+
+
+def test_score_user_excludes_seen_and_unknown(similarity_matrix):
+    """Rated movies never come back; movies outside the model are ignored."""
+    user_ratings = [
+        {"movieId": 2, "rating": 5.0},
+        {"movieId": 999, "rating": 1.0},
+    ]
+    recs = RecommendationService._score_user(user_ratings, k=100)
+    assert 2 not in recs
+    assert 999 not in recs
+    assert len(recs) == len(similarity_matrix) - 1
+
+
+def test_score_user_without_known_movies(similarity_matrix):
+    """No overlap with the model returns an empty list so the caller can fall back."""
+    assert RecommendationService._score_user([{"movieId": 999, "rating": 4.0}], k=5) == []
+
+
+def test_top_k_orders_descending():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert RecommendationService._top_k(scores, 2).tolist() == [1, 3]
+    assert RecommendationService._top_k(scores, 10, exclude=[1]).tolist() == [3, 2, 0]
+
+
+def test_from_dense_keeps_top_n_positive_neighbors():
+    """Each row keeps at most top_n neighbors, best first, without itself or non-positive scores."""
+    ids = [10, 20, 30, 40]
+    sims = np.array([
+        [1.0, 0.2, 0.9, -0.5],
+        [0.2, 1.0, 0.0, 0.4],
+        [0.9, 0.0, 1.0, 0.3],
+        [-0.5, 0.4, 0.3, 1.0],
+    ])
+    index = SimilarityIndex.from_dense(pd.DataFrame(sims, index=ids, columns=ids), top_n=3, block_size=3)
+
+    neighbors, data = index.neighbors(10)
+    assert index.item_ids[neighbors].tolist() == [30, 20]
+    assert np.allclose(data, [0.9, 0.2])
+    neighbors, _ = index.neighbors(20)
+    assert index.item_ids[neighbors].tolist() == [40, 10]
+
+    index = SimilarityIndex.from_dense(pd.DataFrame(sims, index=ids, columns=ids), top_n=1)
+    assert index.item_ids[index.neighbors(40)[0]].tolist() == [20]
+    assert index.neighbors(99)[0].size == 0
+    assert index.data.dtype == np.float32
+
+
+def test_similarity_index_roundtrip(tmp_path, similarity_matrix):
+    """Saved indexes reopen memory-mapped with the same contents and manifest metadata."""
+    index = RecommendationService._load_similarity_index()
+    directory = tmp_path / "item_neighbors"
+    index.save(directory, metadata={"similarity": "cosine"})
+
+    loaded = SimilarityIndex.load(directory)
+    assert loaded.manifest["metadata"] == {"similarity": "cosine"}
+    assert not loaded.data.flags.writeable
+    assert np.array_equal(loaded.item_ids, index.item_ids)
+    assert np.array_equal(loaded.indptr, index.indptr)
+    assert np.array_equal(loaded.indices, index.indices)
+    assert np.allclose(loaded.score([1, 5], [4.0, 2.0]), index.score([1, 5], [4.0, 2.0]))
+
+
+def test_similarity_index_rejects_unknown_version(tmp_path, similarity_matrix):
+    directory = tmp_path / "item_neighbors"
+    RecommendationService._load_similarity_index().save(directory)
+    manifest = SimilarityIndex.read_manifest(directory)
+    manifest["format_version"] = 99
+    (directory / "manifest.json").write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        SimilarityIndex.load(directory)
+
+
+def test_service_hot_swaps_published_versions(tmp_path, monkeypatch, similarity_matrix):
+    """A newly published version replaces the served index on the next check."""
+    root = tmp_path / "item_neighbors"
+    monkeypatch.setattr(RecommendationService, "_registry", ModelRegistry(str(root), interval=0))
+
+    first = SimilarityIndex.from_dense(similarity_matrix, top_n=2)
+    v1 = first.publish(root, keep=2)
+    assert RecommendationService._load_similarity_index().version == v1
+
+    v2 = SimilarityIndex.from_dense(similarity_matrix, top_n=1).publish(root, keep=2)
+    served = RecommendationService._load_similarity_index()
+    assert served.version == v2 and served.top_n == 1
+    assert SimilarityIndex.current_version(root) == v2
+
+    SimilarityIndex.from_dense(similarity_matrix, top_n=3).publish(root, keep=2)
+    assert len(SimilarityIndex.versions(root)) == 2
+
+
+def _pandas_popular(movies, k):
+    """Reference implementation: the original DataFrame.apply ranking."""
+    df = pd.DataFrame(movies)
+    C = df["vote_average"].mean()
+    m = df["vote_count"].quantile(0.80)
+    df["popularity_score"] = df.apply(
+        lambda x: x["vote_count"] / (x["vote_count"] + m) * x["vote_average"] + m / (m + x["vote_count"]) * C,
+        axis=1,
+    )
+    return df.sort_values("popularity_score", ascending=False, kind="stable").head(k)
+
+
+def test_popularity_snapshot_matches_pandas_ranking():
+    rng = np.random.default_rng(3)
+    movies = [
+        {
+            "movieId": i,
+            "title": f"Movie {i}",
+            "genres": "Action|Drama" if i % 2 else "Comedy",
+            "vote_average": round(float(rng.uniform(3, 9)), 1),
+            "vote_count": int(rng.integers(1, 5000)),
+        }
+        for i in range(1, 41)
+    ]
+    snapshot = PopularitySnapshot(movies)
+
+    expected = _pandas_popular(movies, 10)
+    top = snapshot.top(10)
+    assert [m["movieId"] for m in top] == expected["movieId"].tolist()
+    assert np.allclose([m["popularity_score"] for m in top], expected["popularity_score"])
+
+    comedies = [m for m in movies if m["genres"] == "Comedy"]
+    expected = _pandas_popular(comedies, 5)
+    assert [m["movieId"] for m in snapshot.top(5, genre="comedy")] == expected["movieId"].tolist()
+    assert snapshot.top(5, genre="Western") == []
+
+
+def test_popularity_genre_cache_is_bounded(monkeypatch):
+    import app.view.popularity as popularity
+
+    monkeypatch.setattr(popularity, "GENRE_ORDER_CACHE_SIZE", 3)
+    snapshot = PopularitySnapshot([
+        {"movieId": 1, "genres": "Action|Drama", "vote_average": 7.0, "vote_count": 10},
+        {"movieId": 2, "genres": "Comedy", "vote_average": 6.0, "vote_count": 20},
+    ])
+    assert set(snapshot._genre_orders) == {"action", "drama", "comedy"}
+    for query in ["act", "dra", "com", "act", "x1", "x2"]:
+        snapshot.top(5, genre=query)
+    # catalog genres stay precomputed; free-form strings keep only the most recently used
+    assert list(snapshot._other_orders) == ["act", "x1", "x2"]
+    assert [m["movieId"] for m in snapshot.top(5, genre="act")] == [1]
+    assert set(snapshot._genre_orders) == {"action", "drama", "comedy"}
+
+
+def test_popularity_snapshot_returns_copies():
+    snapshot = PopularitySnapshot([{"movieId": "7", "title": "Seven", "vote_average": 7.0, "vote_count": 10}])
+    first = snapshot.top(1)[0]
+    first["title"] = "changed"
+    assert snapshot.top(1)[0]["title"] == "Seven"
+    assert first["movieId"] == 7
+
+
+class _PooledRaw:
+    """Raw connection for a real ConnectionPool; each statement takes a moment so requests overlap."""
+
+    open = True
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+    def cursor(self, cursor_class=None):
+        return _PooledCursor()
+
+
+class _PooledCursor:
+    def execute(self, sql, params=()):
+        time.sleep(0.02)
+        if "FROM ratings WHERE user_email" in sql:
+            self.rows = [{"movieId": m, "rating": 4.0} for m in (1, 2, 3)]
+        elif "trending_score" in sql:
+            self.rows = [{"movieId": 5, "trending_score": 2.0}]
+        else:  # movie lookups by id, or the newest releases
+            ids = params[:-1] if "release_date" in sql else params
+            self.rows = [{"movieId": m, "title": f"Movie {m}", "is_active": True} for m in (ids or (8, 13))]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_requests_beyond_pool_size_do_not_exhaust_it(monkeypatch, similarity_matrix):
+    """Each request holds at most one pooled connection at a time, so 3x the pool size all complete."""
+    import app.models.movies_data as movies_data
+    import app.view.recommendation as recommendation
+    from app.config.db_pool import ConnectionPool
+    from app.view import cache as cache_module
+    from app.view.cache import TTLCache, set_cache
+
+    pool = ConnectionPool(size=2, timeout=2, connect=_PooledRaw)
+    monkeypatch.setattr(recommendation, "connecting_db", pool.acquire)
+    monkeypatch.setattr(movies_data, "connecting_db", pool.acquire)
+    monkeypatch.setattr(cache_module, "_cache", None)
+    set_cache(TTLCache())
+
+    def request(i):
+        if i % 2:
+            return RecommendationService.get_trending_movies(k=3, by_activity=True)
+        return RecommendationService.get_recommendations_for_user(f"user{i}@example.com", k=3)
+
+    with ThreadPoolExecutor(max_workers=3 * pool.size) as executor:
+        results = list(executor.map(request, range(3 * pool.size)))
+    assert all(res["success"] for res in results), [res.get("error") for res in results]
+    assert pool.stats()["open"] <= pool.size
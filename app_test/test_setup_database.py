@@ -0,0 +1,39 @@
+import threading
+import time
+
+from setup_database import run_graph
+
+
+def test_run_graph_respects_dependencies_and_runs_independent_tasks_together():
+    started, lock = {}, threading.Lock()
+    both_running = threading.Barrier(2, timeout=5)
+
+    def task(name, parallel=False):
+        def run():
+            with lock:
+                started[name] = len(started)
+            if parallel:
+                both_running.wait()  # deadlocks (times out) unless the two run concurrently
+            time.sleep(0.01)
+            return {"success": True}
+        return run
+
+    results = run_graph({
+        "ratings": (task("ratings"), ["users", "movies"]),
+        "users": (task("users", parallel=True), []),
+        "movies": (task("movies", parallel=True), []),
+    }, workers=4)
+    assert all(result["success"] for result, _ in results.values())
+    assert started["ratings"] == 2
+
+
+def test_run_graph_skips_dependents_of_failed_tasks():
+    results = run_graph({
+        "stats": (lambda: {"success": True}, ["ratings"]),
+        "ratings": (lambda: {"success": True}, ["movies"]),
+        "movies": (lambda: {"success": False, "error": "boom"}, []),
+        "users": (lambda: 1 / 0, []),
+    })
+    assert results["movies"][0]["error"] == "boom"
+    assert results["users"][0]["error"] == "division by zero"
+    assert "skipped" in results["ratings"][0]["error"] and "skipped" in results["stats"][0]["error"]
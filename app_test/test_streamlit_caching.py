@@ -0,0 +1,75 @@
+from app.templates import caching
+from app.view.cache import invalidate_user, invalidate_movie
+
+
+def test_list_caches_cleared_by_movie_writes(monkeypatch):
+    calls = []
+
+    def fake_popular(k=10):
+        calls.append(k)
+        return {"success": True, "data": [{"movieId": i} for i in range(k)]}
+
+    monkeypatch.setattr(caching.RecommendationService, "get_popular_movies", staticmethod(fake_popular))
+    caching.popular_movies.clear()
+
+    assert caching.popular_movies(k=3) == caching.popular_movies(k=3)
+    assert calls == [3]
+
+    invalidate_user("a@example.com")  # rating writes leave global lists to their TTL
+    caching.popular_movies(k=3)
+    assert calls == [3]
+
+    invalidate_movie(1)
+    caching.popular_movies(k=3)
+    assert calls == [3, 3]
+
+
+def test_analytics_cleared_by_rating_writes(monkeypatch):
+    calls = []
+
+    def fake_distribution():
+        calls.append(1)
+        return {"success": True, "data": [{"rating": 4.0, "count": len(calls)}]}
+
+    monkeypatch.setattr(caching.RecommendationService, "get_rating_distribution", staticmethod(fake_distribution))
+    caching.rating_distribution.clear()
+
+    caching.rating_distribution()
+    caching.rating_distribution()
+    assert len(calls) == 1
+
+    invalidate_user("a@example.com")
+    assert caching.rating_distribution()["data"][0]["count"] == 2
+
+
+def test_failed_results_are_not_cached(monkeypatch):
+    results = [{"success": False, "error": "Lost connection"}, {"success": True, "data": [{"movieId": 1}]}]
+    calls = []
+
+    def fake_trending(k=10, by_activity=False):
+        calls.append(k)
+        return results[len(calls) - 1]
+
+    monkeypatch.setattr(caching.RecommendationService, "get_trending_movies", staticmethod(fake_trending))
+    caching.trending_movies.clear()
+
+    assert caching.trending_movies(k=5)["error"] == "Lost connection"
+    assert caching.trending_movies(k=5)["success"]
+    assert caching.trending_movies(k=5)["success"] and calls == [5, 5]
+
+
+def test_overview_counts_come_from_count_queries_and_report_failures(monkeypatch):
+    monkeypatch.setattr(caching.User, "count", staticmethod(lambda: {"success": False, "error": "users down"}))
+    monkeypatch.setattr(caching.Movie, "count", staticmethod(lambda active_only=True: {"success": True, "data": 2500}))
+    monkeypatch.setattr(caching.Rating, "count", staticmethod(lambda: {"success": True, "data": 100000}))
+    monkeypatch.setattr(caching.WatchlistService, "get_all_watchlists", staticmethod(lambda: {"success": True, "data": [{}] * 3}))
+    caching.overview_counts.clear()
+
+    counts = caching.overview_counts()
+    assert not counts["success"] and counts["error"] == "users down"
+    assert (counts["total_users"], counts["active_users"]) == (0, 0)
+    assert (counts["total_movies"], counts["total_ratings"], counts["total_watchlist"]) == (2500, 100000, 3)
+
+    monkeypatch.setattr(caching.User, "count", staticmethod(lambda: {"success": True, "data": {"total": 7, "active": 5}}))
+    counts = caching.overview_counts()  # the failed result was not cached
+    assert counts["success"] and (counts["total_users"], counts["active_users"]) == (7, 5)
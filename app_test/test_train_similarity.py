@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from recommend_model.scripts.train_similarity import (
+    build_user_item_matrix, center_items, iter_similarity_blocks, train,
+)
+
+
+@pytest.fixture
+def ratings():
+    rng = np.random.default_rng(7)
+    rows = [(u, m, float(rng.integers(1, 11)) / 2)
+            for u in range(40) for m in range(100, 130) if rng.random() < 0.3]
+    return pd.DataFrame(rows, columns=["userId", "movieId", "rating"])
+
+
+def dense_pearson(ratings):
+    """Reference: dense pivot, item-mean centering on observed ratings, cosine of centered columns."""
+    pivot = ratings.pivot(index="userId", columns="movieId", values="rating")
+    centered = (pivot - pivot.mean()).fillna(0).to_numpy()
+    norms = np.linalg.norm(centered, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sims = centered.T @ centered / np.outer(norms, norms)
+    return pd.DataFrame(np.nan_to_num(sims), index=pivot.columns, columns=pivot.columns)
+
+
+def test_build_matrix_keeps_last_duplicate():
+    df = pd.DataFrame({"userId": [1, 1, 2], "movieId": [10, 10, 20], "rating": [2.0, 4.5, 3.0]})
+    matrix, user_ids, item_ids = build_user_item_matrix(df)
+    assert matrix.shape == (2, 2) and matrix.nnz == 2
+    assert matrix[0, 0] == 4.5
+    assert list(item_ids) == [10, 20]
+
+
+def test_sparse_pearson_matches_dense_reference(ratings):
+    matrix, _, item_ids = build_user_item_matrix(ratings)
+    centered, means = center_items(matrix)
+    sparse = np.vstack([block for _, block in iter_similarity_blocks(centered, block_size=7)])
+    expected = dense_pearson(ratings).loc[item_ids, item_ids].to_numpy()
+    assert np.allclose(sparse, expected, atol=1e-5)
+    assert np.allclose(means, ratings.groupby("movieId")["rating"].mean().loc[item_ids])
+
+
+def test_train_keeps_top_n_positive_neighbors(ratings):
+    index = train(ratings, top_n=5, block_size=8)
+    expected = dense_pearson(ratings)
+    assert index.top_n <= 5
+    for movieId in index.item_ids[:10]:
+        positions, sims = index.neighbors(int(movieId))
+        row = expected.loc[movieId].drop(movieId)
+        best = row[row > 0].sort_values(ascending=False).head(5)
+        assert np.allclose(sims, best.to_numpy(), atol=1e-5)
+        assert (np.diff(sims) <= 0).all()
+
+
+def test_parallel_training_matches_serial(ratings):
+    serial = train(ratings, top_n=5, block_size=8)
+    parallel = train(ratings, top_n=5, block_size=8, workers=2)
+    assert np.array_equal(serial.indptr, parallel.indptr)
+    assert np.array_equal(serial.indices, parallel.indices)
+    assert np.allclose(serial.data, parallel.data)
@@ -0,0 +1,94 @@
+import math
+import pytest
+
+import app.view.recommendation as recommendation
+from app.view import cache as cache_module
+from app.view.cache import TTLCache, set_cache
+from app.view.recommendation import RecommendationService
+
+CATALOG = {
+    1: {"movieId": 1, "title": "Old", "release_date": "1999-01-01", "is_active": True},
+    2: {"movieId": 2, "title": "Newest", "release_date": "2024-05-01", "is_active": True},
+    3: {"movieId": 3, "title": "Hidden", "release_date": "2024-06-01", "is_active": False},
+    4: {"movieId": 4, "title": "Newer", "release_date": "2024-03-01", "is_active": True},
+    5: {"movieId": 5, "title": "New", "release_date": "2023-01-01", "is_active": True},
+}
+
+
+class FakeConnection:
+    """Answers the activity aggregate from `activity` and the release list from CATALOG."""
+
+    def __init__(self, activity=()):
+        self.activity = list(activity)
+        self.executed = []
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.conn.executed.append((sql, params))
+        if "trending_score" in sql:
+            self.rows = [{"movieId": m, "trending_score": s} for m, s in self.conn.activity][:params[-1]]
+        elif sql.startswith("SELECT * FROM movies"):
+            released = sorted((m for m in CATALOG.values() if m["is_active"]), key=lambda m: m["release_date"], reverse=True)
+            self.rows = [dict(m) for m in released][:params[-1]]
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Isolated result cache, fake connection and catalog lookups."""
+    previous = cache_module._cache
+    set_cache(TTLCache())
+
+    def install(activity=()):
+        conn = FakeConnection(activity)
+        monkeypatch.setattr(recommendation, "connecting_db", lambda: conn)
+        return conn
+
+    monkeypatch.setattr(recommendation.Movie, "fetch_by_ids", staticmethod(
+        lambda ids: {"success": True, "data": [dict(CATALOG[m]) for m in ids if m in CATALOG]}))
+    yield install
+    set_cache(previous)
+
+
+def ids(res):
+    return [m["movieId"] for m in res["data"]]
+
+
+def test_default_is_newest_active_releases(db):
+    conn = db()
+    res = RecommendationService.get_trending_movies(k=3)
+    assert ids(res) == [2, 4, 5]
+    assert len(conn.executed) == 1 and "ORDER BY release_date DESC" in conn.executed[0][0]
+
+
+def test_activity_ranks_by_decayed_score_and_skips_inactive(db):
+    conn = db(activity=[(5, 9.0), (3, 8.0), (1, 4.5), (4, 1.0)])
+    res = RecommendationService.get_trending_movies(k=3, by_activity=True, window_days=14, half_life_days=7)
+    assert ids(res) == [5, 1, 4]
+    assert [m["trending_score"] for m in res["data"]] == [9.0, 4.5, 1.0]
+    tau, window, limit = conn.executed[0][1]
+    # a rating one half-life old counts half as much as one made now
+    assert math.exp(-7 * 86400 / tau) == pytest.approx(0.5)
+    assert window == 14 and limit == 6
+
+
+def test_activity_backfills_with_releases(db):
+    conn = db(activity=[(1, 2.0)])
+    res = RecommendationService.get_trending_movies(k=3, by_activity=True)
+    assert ids(res) == [1, 2, 4]
+    assert "trending_score" in res["data"][0] and "trending_score" not in res["data"][1]
+    assert "ORDER BY release_date DESC" in conn.executed[-1][0]
@@ -0,0 +1,50 @@
+import pytest
+from app.view import user_context
+from app.view.user_context import UserContext
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count service fetches; serve a small fixed history."""
+    calls = {"ratings": 0, "watchlist": 0}
+
+    def fake_ratings(user_email):
+        calls["ratings"] += 1
+        return {"success": True, "data": [{"user_email": user_email, "movieId": 1, "rating": 4.0},
+                                          {"user_email": user_email, "movieId": 2, "rating": 2.5}]}
+
+    def fake_watchlist(user_email):
+        calls["watchlist"] += 1
+        return {"success": True, "data": [{"movieId": 3, "status": "watched", "title": "C"}]}
+
+    monkeypatch.setattr(user_context.RatingService, "get_user_ratings", staticmethod(fake_ratings))
+    monkeypatch.setattr(user_context.WatchlistService, "get_user_watchlist", staticmethod(fake_watchlist))
+    return calls
+
+
+def test_lookups_fetch_once_per_render(calls):
+    ctx = UserContext.begin("a@example.com")
+    for _ in range(20):
+        assert UserContext.current("a@example.com").rating_for(1) == 4.0
+        assert UserContext.current("a@example.com").rating_for(99) == 0
+        assert ctx.in_watchlist(3) and not ctx.in_watchlist(1)
+    assert calls == {"ratings": 1, "watchlist": 1}
+
+    UserContext.begin("a@example.com").rating_for(1)
+    assert calls["ratings"] == 2
+
+
+def test_current_switches_user_and_records_writes(calls):
+    ctx = UserContext.begin("a@example.com")
+    ctx.record_rating(2, 5)
+    ctx.record_rating(7, 3)
+    assert ctx.rating_for(2) == 5 and ctx.rating_for(7) == 3
+    assert calls["ratings"] == 1
+
+    ctx.in_watchlist(3)
+    ctx.record_watchlist_change()
+    ctx.in_watchlist(3)
+    assert calls["watchlist"] == 2
+
+    other = UserContext.current("b@example.com")
+    assert other is not ctx and other.user_email == "b@example.com"
@@ -0,0 +1,155 @@
+# check_query_plans.py
+"""
+EXPLAIN the queries the models run on hot paths and flag full table scans.
+
+A plan row is flagged when MySQL reads a table with type=ALL (every row) and
+estimates at least --min-rows rows; "Using filesort" on such a table is
+reported too. Queries that must scan by design (leading-wildcard LIKE, whole
+catalog loads) are listed with allow_scan and only reported, not failed.
+Keep QUERIES in step with the SQL in app/models and app/view.
+
+Run against a database with realistic data (the optimizer happily scans tiny
+tables):
+    python check_query_plans.py
+    python check_query_plans.py --min-rows 100
+Exits 1 when an unexpected full scan is found.
+"""
+
+import sys
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pymysql.cursors
+from app.config.db_connection import connecting_db
+
+EMAIL = "user@example.com"
+
+# (name, SQL, params, allow_scan)
+QUERIES = [
+    ("users.fetch_by_email", "SELECT * FROM users WHERE email=%s", (EMAIL,), False),
+    ("ratings.fetch_user_movie_rating",
+     "SELECT rating FROM ratings WHERE user_email=%s AND movieId=%s", (EMAIL, 1), False),
+    ("ratings.save_many lookup",
+     "SELECT user_email, movieId FROM ratings WHERE (user_email, movieId) IN ((%s, %s), (%s, %s))",
+     (EMAIL, 1, EMAIL, 2), False),
+    ("ratings.fetch_user_ratings", "SELECT * FROM ratings WHERE user_email=%s", (EMAIL,), False),
+    ("ratings.fetch_movie_ratings", "SELECT * FROM ratings WHERE movieId=%s", (1,), False),
+    ("recommendations.user_ratings", "SELECT movieId, rating FROM ratings WHERE user_email=%s", (EMAIL,), False),
+    ("recommendations.trending_activity",
+     """
+     SELECT movieId, SUM(EXP(-TIMESTAMPDIFF(SECOND, timestamp, NOW()) / %s)) AS trending_score
+     FROM ratings
+     WHERE timestamp >= NOW() - INTERVAL %s DAY
+     GROUP BY movieId
+     ORDER BY trending_score DESC
+     LIMIT %s
+     """, (872542.0, 30, 20), False),
+    ("recommendations.trending_releases",
+     """
+     SELECT * FROM movies
+     WHERE is_active=TRUE AND release_date IS NOT NULL
+     ORDER BY release_date DESC
+     LIMIT %s
+     """, (10,), False),
+    ("recommendations.user_rating_history",
+     """
+     SELECT r.movieId, m.title, r.rating, m.genres, m.release_date
+     FROM ratings r
+     JOIN users u ON r.user_email = u.email
+     JOIN movies m ON r.movieId = m.movieId
+     WHERE u.email = %s
+     ORDER BY r.rating DESC
+     """, (EMAIL,), False),
+    ("movies.fetch_by_id", "SELECT * FROM movies WHERE movieId=%s", (1,), False),
+    ("movies.fetch_by_ids", "SELECT * FROM movies WHERE movieId IN (%s, %s, %s)", (1, 2, 3), False),
+    ("movies.fetch_all page",
+     "SELECT * FROM movies WHERE is_active=TRUE AND ((movieId > %s)) ORDER BY movieId ASC LIMIT %s", (1000, 51), False),
+    ("movies.fetch_by_genre page",
+     "SELECT * FROM movies WHERE genres LIKE %s AND is_active=TRUE AND ((movieId > %s)) ORDER BY movieId ASC LIMIT %s",
+     ("%Drama%", 1000, 21), False),
+    ("demo_ratings.fetch_all page",
+     "SELECT * FROM demo_ratings WHERE ((rating_id > %s)) ORDER BY rating_id ASC LIMIT %s", (1000, 101), False),
+    ("movies.search_by_title",
+     "SELECT * FROM movies WHERE title LIKE %s AND is_active=TRUE", ("%star%",), True),
+    ("popularity.fingerprint", "SELECT COUNT(*) AS n, MAX(updated_at) AS last_update FROM movies", (), False),
+    ("popularity.load", "SELECT * FROM movies WHERE is_active=TRUE", (), True),
+    ("rating_stats.fetch",
+     """
+     SELECT movieId, rating_sum, rating_count, rating_sq_sum
+     FROM movie_rating_stats
+     WHERE movieId IN (%s, %s, %s) AND rating_count > 0
+     """, (1, 2, 3), False),
+    ("rating_events.fetch_since",
+     """
+     SELECT event_id, user_email, movieId, old_rating, new_rating
+     FROM rating_events
+     WHERE event_id > %s
+     ORDER BY event_id
+     LIMIT %s
+     """, (0, 10000), False),
+    ("watchlist.fetch_user_watchlist",
+     """
+     SELECT w.watchlist_id, w.status, w.added_at, m.movieId, m.title, m.genres, m.poster_path
+     FROM watchlist w
+     JOIN movies m ON w.movieId = m.movieId
+     WHERE w.user_email=%s
+     ORDER BY w.added_at DESC
+     """, (EMAIL,), False),
+]
+
+
+def plan_problems(plan, min_rows=1000):
+    """Full scans (type=ALL) and filesorts on tables estimated at >= min_rows rows, from EXPLAIN rows."""
+    problems = []
+    for row in plan:
+        rows = int(row.get("rows") or 0)
+        if rows < min_rows:
+            continue
+        extra = row.get("Extra") or ""
+        if (row.get("type") or "").upper() == "ALL":
+            problems.append(f"full scan of {row.get('table')} (~{rows} rows, possible keys: {row.get('possible_keys')})")
+        elif "Using filesort" in extra:
+            problems.append(f"filesort on {row.get('table')} (~{rows} rows)")
+    return problems
+
+
+def check(queries=QUERIES, min_rows=1000):
+    """EXPLAIN every query; returns [(name, problems, allow_scan)] and the number of unexpected problems."""
+    conn = connecting_db()
+    report, failures = [], 0
+    try:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        for name, sql, params, allow_scan in queries:
+            try:
+                cursor.execute("EXPLAIN " + sql, params)
+                problems = plan_problems(cursor.fetchall(), min_rows)
+            except Exception as e:
+                problems = [f"EXPLAIN failed: {e}"]
+                allow_scan = False
+            report.append((name, problems, allow_scan))
+            if problems and not allow_scan:
+                failures += 1
+    finally:
+        conn.close()
+    return report, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag full table scans in the model queries' plans.")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore tables estimated smaller than this")
+    args = parser.parse_args(argv)
+
+    report, failures = check(min_rows=args.min_rows)
+    for name, problems, allow_scan in report:
+        status = "ok" if not problems else ("expected" if allow_scan else "FLAGGED")
+        print(f"{status:<9} {name}")
+        for problem in problems:
+            print(f"          - {problem}")
+    print(f"{failures} queries with unexpected full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+benchmark.py
+---------------------------------------
+Offline latency / throughput benchmark for RecommendationService.
+
+The MovieLens CSVs (or a synthetic catalog) are loaded into MemoryDatabase,
+an in-memory stand-in that answers the SQL the benchmarked service paths
+issue, and every app module's connecting_db is pointed at it for the run.
+The model is trained from the same ratings, published to a temporary
+directory and loaded through the model registry (timed as model load).
+
+Each operation (recommendations, similar, popular, trending) is driven from
+a thread pool at every requested concurrency; recommendations also run for
+benchmark users with each requested history size. The report is JSON with
+p50/p95/p99 latency, QPS, peak RSS and model load time, plus the git commit
+and parameters, so runs with the same arguments are comparable across
+commits (--compare flags regressions against a saved baseline).
+
+Usage:
+    python -m recommend_model.scripts.benchmark --out bench.json
+    python -m recommend_model.scripts.benchmark --synthetic 5000,20000,40 --concurrency 1,8 --history 10,200
+    python -m recommend_model.scripts.benchmark --compare bench.json --max-regression 0.2
+---------------------------------------
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import resource
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from app.config.logging_config import configure_logging
+from app.config.model_config import BASE_DIR
+from app.models.factor_model import FactorModel
+from app.models.similarity_index import SimilarityIndex
+from app.view import cache as result_cache
+from app.view import recommendation
+from app.view.model_registry import ModelRegistry
+from app.view.popularity import PopularityIndex
+from app.view.recommendation import RecommendationService
+from recommend_model.scripts.train_als import train as train_als
+from recommend_model.scripts.train_similarity import train as train_similarity
+
+DEFAULT_MOVIES_CSV = os.path.join(BASE_DIR, "recommend_model", "data", "processed", "movies_final.csv")
+DEFAULT_RATINGS_CSV = os.path.join(BASE_DIR, "recommend_model", "data", "processed", "ratings_final.csv")
+OPERATIONS = ("recommendations", "similar", "popular", "trending")
+
+
+# -------------------- In-memory database --------------------
+class MemoryDatabase:
+    """
+    Movies and ratings held in Python structures, with a cursor that answers the
+    statements on the benchmarked paths. Any other statement raises, so a new
+    query on a hot path shows up as an error in the report instead of silently
+    hitting a real database.
+    """
+
+    def __init__(self, movies, ratings):
+        """movies: list of dicts; ratings: DataFrame with userId, movieId, rating, timestamp."""
+        now = datetime.now()
+        self.movies = {}
+        for movie in movies:
+            movie = dict(movie, is_active=movie.get("is_active", True), updated_at=movie.get("updated_at", now))
+            self.movies[int(movie["movieId"])] = movie
+        self.by_release = sorted(
+            (m for m in self.movies.values() if m["is_active"] and m.get("release_date")),
+            key=lambda m: m["release_date"], reverse=True,
+        )
+        self.ratings = {}
+        for user, movieId, rating in ratings[["userId", "movieId", "rating"]].itertuples(index=False):
+            self.ratings.setdefault(user, []).append({"movieId": int(movieId), "rating": float(rating)})
+        # rating events sorted by time, so the trending window is a binary search plus a bincount
+        events = ratings.sort_values("timestamp")
+        self.event_times = events["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+        self.event_movies = events["movieId"].to_numpy(dtype=np.int64)
+        self.statements = [
+            (r"SELECT email FROM users WHERE email=%s", self._user),
+            (r"SELECT movieId, rating FROM ratings WHERE user_email=%s", self._user_ratings),
+            (r"SELECT \* FROM movies WHERE movieId IN \(.*\)", self._movies_by_ids),
+            (r"SELECT COUNT\(\*\) AS n, MAX\(updated_at\) AS last_update FROM movies", self._fingerprint),
+            (r"SELECT \* FROM movies WHERE is_active=TRUE", self._active_movies),
+            (r"SELECT \* FROM movies WHERE is_active=TRUE AND release_date IS NOT NULL ORDER BY release_date DESC LIMIT %s",
+             self._recent_releases),
+            (r"SELECT movieId, SUM\(EXP\(.*\)\) AS trending_score FROM ratings WHERE timestamp >= .* LIMIT %s",
+             self._trending_activity),
+        ]
+        self.statements = [(re.compile(pattern + r"$"), handler) for pattern, handler in self.statements]
+
+    def connect(self):
+        return MemoryConnection(self)
+
+    def add_user(self, user, ratings):
+        """Add a user and their ratings (not counted as trending activity)."""
+        self.ratings[user] = [{"movieId": int(m), "rating": float(r)} for m, r in ratings]
+
+    # statement handlers: params -> rows
+    def _user(self, params):
+        return [{"email": params[0]}] if params[0] in self.ratings else []
+
+    def _user_ratings(self, params):
+        return [{"movieId": r["movieId"], "rating": r["rating"]} for r in self.ratings.get(params[0], [])]
+
+    def _movies_by_ids(self, params):
+        return [dict(self.movies[int(mid)]) for mid in params if int(mid) in self.movies]
+
+    def _fingerprint(self, params):
+        return [{"n": len(self.movies), "last_update": max((m["updated_at"] for m in self.movies.values()), default=None)}]
+
+    def _active_movies(self, params):
+        return [dict(m) for m in self.movies.values() if m["is_active"]]
+
+    def _recent_releases(self, params):
+        return [dict(m) for m in self.by_release[:params[0]]]
+
+    def _trending_activity(self, params):
+        tau, window_days, limit = params
+        now = pd.Timestamp.now().value / 1e9  # same naive clock as the event times
+        start = np.searchsorted(self.event_times, now - window_days * 86400)
+        weights = np.exp(-(now - self.event_times[start:]) / tau)
+        movieIds, inverse = np.unique(self.event_movies[start:], return_inverse=True)
+        scores = np.bincount(inverse, weights=weights, minlength=len(movieIds))
+        ranked = np.argsort(-scores, kind="stable")[:limit]
+        return [{"movieId": int(movieIds[i]), "trending_score": float(scores[i])} for i in ranked]
+
+
+class MemoryConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, cursor_class=None):
+        return MemoryCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        statement = " ".join(sql.split())
+        for pattern, handler in self.db.statements:
+            if pattern.match(statement):
+                self.rows = handler(tuple(params or ()))
+                return len(self.rows)
+        raise NotImplementedError(f"MemoryDatabase does not support: {statement}")
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def memory_database(db):
+    """Point every loaded app module's connecting_db at the in-memory database."""
+    patched = []
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and module is not None and hasattr(module, "connecting_db"):
+            patched.append((module, module.connecting_db))
+            module.connecting_db = db.connect
+    try:
+        yield db
+    finally:
+        for module, original in patched:
+            module.connecting_db = original
+
+
+# -------------------- Data --------------------
+def load_movielens(movies_csv=DEFAULT_MOVIES_CSV, ratings_csv=DEFAULT_RATINGS_CSV):
+    """Return (movies as dicts, ratings DataFrame) with rating timestamps shifted to end now."""
+    movies = pd.read_csv(movies_csv)
+    columns = [c for c in ("movieId", "title", "genres", "overview", "release_date", "runtime", "popularity",
+                           "vote_average", "vote_count", "poster_path") if c in movies.columns]
+    movies = movies[columns].astype(object).where(movies[columns].notna(), None)
+    ratings = pd.read_csv(ratings_csv, usecols=["userId", "movieId", "rating", "timestamp"])
+    ratings["timestamp"] = pd.to_datetime(ratings["timestamp"], unit="s")
+    ratings["timestamp"] += pd.Timestamp.now() - ratings["timestamp"].max()
+    return movies.to_dict("records"), ratings
+
+
+def synthesize(n_users, n_movies, ratings_per_user, seed=0):
+    """Random catalog and ratings with a Zipf-like movie popularity, for sizes beyond MovieLens."""
+    rng = np.random.default_rng(seed)
+    genres = ["Action", "Comedy", "Drama", "Thriller", "Romance", "Sci-Fi", "Animation", "Horror"]
+    release = pd.Timestamp("1990-01-01") + pd.to_timedelta(rng.integers(0, 12000, n_movies), unit="D")
+    movies = [{
+        "movieId": i + 1,
+        "title": f"Movie {i + 1}",
+        "genres": "|".join(rng.choice(genres, size=2, replace=False)),
+        "release_date": release[i].date(),
+        "vote_average": round(float(rng.uniform(3, 9)), 1),
+        "vote_count": int(rng.zipf(1.5) % 20000),
+    } for i in range(n_movies)]
+    weights = 1.0 / np.arange(1, n_movies + 1) ** 0.8
+    weights /= weights.sum()
+    rows = []
+    for user in range(n_users):
+        for movieId in rng.choice(n_movies, size=min(ratings_per_user, n_movies), replace=False, p=weights) + 1:
+            rows.append((f"user{user}@example.com", int(movieId), float(rng.integers(1, 11)) / 2))
+    ratings = pd.DataFrame(rows, columns=["userId", "movieId", "rating"])
+    ratings["timestamp"] = pd.Timestamp.now() - pd.to_timedelta(rng.integers(0, 90 * 86400, len(ratings)), unit="s")
+    return movies, ratings
+
+
+def add_benchmark_users(db, item_ids, popularity, histories, users_per_history=20, seed=0):
+    """Create users with exactly h ratings (sampled by popularity) for every h; returns {h: [emails]}."""
+    rng = np.random.default_rng(seed)
+    p = popularity / popularity.sum()
+    users = {}
+    for h in histories:
+        users[h] = []
+        for i in range(users_per_history):
+            email = f"bench-h{h}-{i}@example.com"
+            picks = rng.choice(item_ids, size=min(h, len(item_ids)), replace=False, p=p)
+            db.add_user(email, [(m, float(rng.integers(1, 11)) / 2) for m in picks])
+            users[h].append(email)
+    return users
+
+
+# -------------------- Measurement --------------------
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_load(call, requests, concurrency):
+    """Issue `requests` calls from `concurrency` threads; returns latency percentiles and QPS."""
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            ok = bool(call(i).get("success"))
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - started
+    latencies = np.array([s for s, _ in samples]) * 1000
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in samples if not ok),
+        "qps": round(requests / wall, 1) if wall > 0 else None,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "mean": round(float(latencies.mean()), 3),
+            "max": round(float(latencies.max()), 3),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+# -------------------- Benchmark --------------------
+def train_model(engine, ratings):
+    train = train_als if engine == "als" else train_similarity
+    return train(ratings[["userId", "movieId", "rating"]])
+
+
+def run(movies, ratings, engine="neighbors", operations=OPERATIONS, concurrency=(1, 4), histories=(10, 100),
+        requests=200, k=10, cache=False, seed=0):
+    """Run the benchmark against the given data and return the JSON-ready report."""
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {"engine": engine, "operations": list(operations), "concurrency": list(concurrency),
+                   "histories": list(histories), "requests": requests, "k": k, "cache": cache, "seed": seed},
+        "dataset": {"movies": len(movies), "users": int(ratings["userId"].nunique()), "ratings": len(ratings)},
+    }
+
+    started = time.perf_counter()
+    model = train_model(engine, ratings)
+    train_seconds = time.perf_counter() - started
+    model_class = FactorModel if engine == "als" else SimilarityIndex
+
+    db = MemoryDatabase(movies, ratings)
+    positions = ratings["movieId"].map(model.positions).dropna().to_numpy(dtype=np.int64)
+    popularity = np.bincount(positions, minlength=len(model))
+    bench_users = add_benchmark_users(db, model.item_ids, popularity.astype(np.float64) + 1.0, histories, seed=seed)
+
+    saved = (RecommendationService._registry, RecommendationService._als_registry,
+             recommendation.RECOMMENDER_ENGINE, result_cache._cache)
+    with tempfile.TemporaryDirectory() as root, memory_database(db):
+        model.publish(root)
+        registry = ModelRegistry(root, model_class=model_class)
+        started = time.perf_counter()
+        registry.get()
+        load_seconds = time.perf_counter() - started
+        report["model"] = {"engine": engine, "version": registry.version, "items": len(model),
+                           "train_seconds": round(train_seconds, 3), "load_seconds": round(load_seconds, 4),
+                           "peak_rss_mb_after_load": peak_rss_mb()}
+        try:
+            RecommendationService._registry = RecommendationService._als_registry = registry
+            recommendation.RECOMMENDER_ENGINE = engine
+            result_cache.set_cache(result_cache.TTLCache() if cache else result_cache.TTLCache(maxsize=0))
+            PopularityIndex.invalidate()
+
+            rng = random.Random(seed)
+            movie_ids = model.item_ids.tolist()
+            calls = {
+                "similar": [(None, lambda i, ids=[rng.choice(movie_ids) for _ in range(requests)]:
+                             RecommendationService.get_similar_movies(ids[i], k=k))],
+                "popular": [(None, lambda i: RecommendationService.get_popular_movies(k=k))],
+                "trending": [(None, lambda i: RecommendationService.get_trending_movies(k=k, by_activity=True))],
+                "recommendations": [
+                    (h, lambda i, users=users: RecommendationService.get_recommendations_for_user(users[i % len(users)], k=k))
+                    for h, users in bench_users.items()
+                ],
+            }
+            results = []
+            for operation in operations:
+                for history, call in calls[operation]:
+                    call(0)  # warm-up: lazy snapshots, first-touch pages
+                    for level in concurrency:
+                        results.append({"operation": operation, "history": history, "concurrency": level,
+                                        **run_load(call, requests, level)})
+            report["results"] = results
+        finally:
+            (RecommendationService._registry, RecommendationService._als_registry,
+             recommendation.RECOMMENDER_ENGINE, result_cache._cache) = saved
+            PopularityIndex.invalidate()
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def result_key(result):
+    return f"{result['operation']}|h={result['history']}|c={result['concurrency']}"
+
+
+def compare(baseline, current, max_regression=0.2):
+    """
+    Compare p50/p95 latency and QPS of matching results; a result regresses when
+    p95 grows or QPS drops by more than max_regression (fraction).
+    """
+    base = {result_key(r): r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        before = base.get(result_key(result))
+        if before is None:
+            continue
+        p95_ratio = result["latency_ms"]["p95"] / before["latency_ms"]["p95"] if before["latency_ms"]["p95"] else None
+        qps_ratio = result["qps"] / before["qps"] if before["qps"] else None
+        rows.append({
+            "key": result_key(result),
+            "p50_ratio": round(result["latency_ms"]["p50"] / before["latency_ms"]["p50"], 3) if before["latency_ms"]["p50"] else None,
+            "p95_ratio": round(p95_ratio, 3) if p95_ratio else None,
+            "qps_ratio": round(qps_ratio, 3) if qps_ratio else None,
+            "regressed": bool((p95_ratio and p95_ratio > 1 + max_regression) or
+                              (qps_ratio and qps_ratio < 1 - max_regression)),
+        })
+    return rows
+
+
+# -------------------- CLI --------------------
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark RecommendationService latency and throughput.")
+    parser.add_argument("--movies", default=DEFAULT_MOVIES_CSV)
+    parser.add_argument("--ratings", default=DEFAULT_RATINGS_CSV)
+    parser.add_argument("--synthetic", default=None, metavar="USERS,MOVIES,PER_USER",
+                        help="generate a catalog instead of reading the CSVs")
+    parser.add_argument("--engine", choices=["neighbors", "als"], default="neighbors")
+    parser.add_argument("--operations", default=",".join(OPERATIONS))
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4])
+    parser.add_argument("--history", type=_int_list, default=[10, 100], help="ratings per benchmark user")
+    parser.add_argument("--requests", type=int, default=200, help="requests per operation and concurrency level")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--cache", action="store_true", help="keep the result cache on (measures hits)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING",
+                        help="app log level during the run (INFO logs every model call to console and file)")
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    logging.getLogger().setLevel(args.log_level.upper())
+    operations = [op for op in args.operations.split(",") if op]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+
+    if args.synthetic:
+        users, n_movies, per_user = _int_list(args.synthetic)
+        movies, ratings = synthesize(users, n_movies, per_user, seed=args.seed)
+    else:
+        movies, ratings = load_movielens(args.movies, args.ratings)
+
+    report = run(movies, ratings, engine=args.engine, operations=operations, concurrency=args.concurrency,
+                 histories=args.history, requests=args.requests, k=args.k, cache=args.cache, seed=args.seed)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != report["params"] or baseline.get("dataset") != report["dataset"]:
+            print("Warning: baseline was run with different parameters or data; ratios are not comparable",
+                  file=sys.stderr)
+        report["comparison"] = compare(baseline, report, args.max_regression)
+        regressions = [row["key"] for row in report["comparison"] if row["regressed"]]
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if regressions:
+        print(f"Regressions over {args.max_regression:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+evaluator.py
+---------------------------------------
+Offline evaluation of the recommendation engines.
+
+Train ratings are grouped by user once into a sparse users x movies matrix
+whose columns follow the model's movie order. Users are then scored in
+shards of rows with matrix products against the whole catalog:
+
+  neighbors  predicted rating = sum_j r_j S[j, m] / sum_j |S[j, m]| over the
+             user's rated movies j (the top-N neighbor lists); ranking uses
+             the serving score sum_j r_j S[j, m].
+  als        fold each user in (the same solve the service runs), then
+             U @ Y^T; explicit models predict ratings, implicit ones only rank.
+
+Metrics: RMSE and MAE over the test ratings the model can predict (coverage
+is the share of all test ratings that got a prediction), and
+Precision/Recall/NDCG@K with every unseen movie in the catalog as a
+candidate, a test rating >= relevance threshold counting as relevant. Shards
+are evaluated in a process pool; each worker receives the model and the
+matrices once.
+---------------------------------------
+"""
+
+import time
+from multiprocessing import get_context
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split
+
+from app.models.factor_model import FactorModel
+
+
+# -------------------- Data --------------------
+def split_ratings(ratings, test_size=0.2, seed=42):
+    """Random train/test split of a (userId, movieId, rating) frame."""
+    return train_test_split(ratings, test_size=test_size, random_state=seed)
+
+
+def user_item_matrix(ratings, user_ids, positions, n_items):
+    """
+    users x movies CSR of ratings with rows in user_ids order and columns at the
+    model's positions; ratings for movies outside the model are dropped.
+    Repeated (user, movie) pairs keep the last rating.
+    """
+    ratings = ratings.drop_duplicates(subset=["userId", "movieId"], keep="last")
+    rows = pd.Index(user_ids).get_indexer(ratings["userId"])
+    cols = ratings["movieId"].map(positions).to_numpy(dtype=np.float64)
+    keep = (rows >= 0) & ~np.isnan(cols)
+    return sp.csr_matrix(
+        (ratings["rating"].to_numpy(dtype=np.float64)[keep], (rows[keep], cols[keep].astype(np.int64))),
+        shape=(len(user_ids), n_items),
+    )
+
+
+# -------------------- Scoring --------------------
+def neighbor_matrix(index):
+    """The neighbor index as a movies x movies CSR matrix S[j, m] (copied: scipy may sort indices in place)."""
+    n = len(index)
+    return sp.csr_matrix((np.array(index.data, dtype=np.float64), np.array(index.indices), np.array(index.indptr)),
+                         shape=(n, n))
+
+
+def score_shard(model, train):
+    """
+    Return (predicted ratings, ranking scores) as dense users x movies arrays for
+    the rows of `train`. Predictions are NaN where the model has no estimate.
+    """
+    if isinstance(model, FactorModel):
+        users = np.zeros((train.shape[0], model.factors))
+        for row in range(train.shape[0]):
+            start, stop = train.indptr[row], train.indptr[row + 1]
+            if stop > start:
+                movieIds = model.item_ids[train.indices[start:stop]]
+                users[row] = model.fold_in(movieIds.tolist(), train.data[start:stop].tolist())
+        scores = users @ np.asarray(model.item_factors, dtype=np.float64).T
+        if model.mode == "explicit":
+            scores += model.global_mean
+            return scores, scores
+        return np.full(scores.shape, np.nan), scores
+
+    S = neighbor_matrix(model)
+    numerator = (train @ S).toarray()
+    rated = train.copy()
+    rated.data = np.ones_like(rated.data)
+    denominator = (rated @ abs(S)).toarray()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        predictions = np.where(denominator > 0, numerator / denominator, np.nan)
+    ranking = np.where(denominator > 0, numerator, -np.inf)
+    return predictions, ranking
+
+
+def evaluate_shard(model, train, test, k=10, threshold=4.0):
+    """
+    Accumulate metric sums for one shard of users (rows of train/test).
+    Returns a dict of sums and counts, combined by evaluate().
+    """
+    predictions, ranking = score_shard(model, train)
+    totals = {"sq_err": 0.0, "abs_err": 0.0, "predicted": 0,
+              "precision": 0.0, "recall": 0.0, "ndcg": 0.0, "ranked_users": 0}
+
+    test_coo = test.tocoo()
+    predicted = predictions[test_coo.row, test_coo.col]
+    known = ~np.isnan(predicted)
+    errors = predicted[known] - test_coo.data[known]
+    totals["sq_err"] = float(np.sum(errors ** 2))
+    totals["abs_err"] = float(np.sum(np.abs(errors)))
+    totals["predicted"] = int(known.sum())
+
+    # rank every unseen movie: push train items below everything
+    seen = train.tocoo()
+    ranking[seen.row, seen.col] = -np.inf
+    relevant = test.copy()
+    relevant.data = np.where(relevant.data >= threshold, relevant.data, 0.0)
+    relevant.eliminate_zeros()
+    k = min(k, ranking.shape[1])
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    top = np.argpartition(-ranking, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(ranking, top, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    for row in range(train.shape[0]):
+        liked = relevant.indices[relevant.indptr[row]:relevant.indptr[row + 1]]
+        if train.indptr[row + 1] == train.indptr[row] or len(liked) == 0:
+            continue
+        recommended = top[row][np.isfinite(ranking[row, top[row]])]
+        hit = np.isin(recommended, liked)
+        hits = int(hit.sum())
+        totals["precision"] += hits / k
+        totals["recall"] += hits / len(liked)
+        ideal = discounts[:min(len(liked), k)].sum()
+        totals["ndcg"] += float(discounts[:len(hit)][hit].sum() / ideal)
+        totals["ranked_users"] += 1
+    return totals
+
+
+# -------------------- Parallel driver --------------------
+_worker = {}
+
+
+def _init_worker(model, train, test, k, threshold):
+    _worker.update(model=model, train=train, test=test, k=k, threshold=threshold)
+
+
+def _evaluate_bounds(bounds):
+    start, stop = bounds
+    w = _worker
+    return evaluate_shard(w["model"], w["train"][start:stop], w["test"][start:stop], w["k"], w["threshold"])
+
+
+def evaluate(model, train_df, test_df, k=10, threshold=4.0, workers=1, shard_size=256):
+    """
+    Evaluate a SimilarityIndex or FactorModel on a train/test split of ratings.
+    Returns {"rmse", "mae", "coverage", "precision@k", "recall@k", "ndcg@k",
+    "users", "seconds"}; RMSE/MAE are None for models that do not predict ratings.
+    """
+    started = time.perf_counter()
+    user_ids = np.unique(np.concatenate([train_df["userId"].to_numpy(), test_df["userId"].to_numpy()]))
+    train = user_item_matrix(train_df, user_ids, model.positions, len(model))
+    test = user_item_matrix(test_df, user_ids, model.positions, len(model))
+    bounds = [(start, min(start + shard_size, len(user_ids))) for start in range(0, len(user_ids), shard_size)]
+
+    if workers and workers > 1 and len(bounds) > 1:
+        with get_context("spawn").Pool(workers, initializer=_init_worker,
+                                       initargs=(model, train, test, k, threshold)) as pool:
+            shards = pool.map(_evaluate_bounds, bounds)
+    else:
+        shards = [evaluate_shard(model, train[a:b], test[a:b], k, threshold) for a, b in bounds]
+
+    totals = {key: sum(shard[key] for shard in shards) for key in shards[0]} if shards else {}
+    predicted, users = totals.get("predicted", 0), totals.get("ranked_users", 0)
+    return {
+        "rmse": float(np.sqrt(totals["sq_err"] / predicted)) if predicted else None,
+        "mae": totals["abs_err"] / predicted if predicted else None,
+        "coverage": predicted / len(test_df) if len(test_df) else 0.0,
+        f"precision@{k}": totals["precision"] / users if users else 0.0,
+        f"recall@{k}": totals["recall"] / users if users else 0.0,
+        f"ndcg@{k}": totals["ndcg"] / users if users else 0.0,
+        "users": users,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,366 @@
+"""
+incremental_update.py
+---------------------------------------
+Keep the published neighbor index current from the rating_events delta log
+without a full retrain.
+
+State kept in memory:
+  - the users x movies rating matrix (CSC)
+  - per-movie rating count, sum and sum of squares, from which the Pearson
+    mean and norm follow: mean = sum / n, norm^2 = sumsq - n * mean^2
+  - the top-N neighbor list of every movie
+
+A batch of events changes a set of movies. Their similarity rows are
+recomputed exactly from co-rating dot products on the raw matrix,
+
+    dot(i, j) = S_ij - mean_j * A_ij - mean_i * A_ji + mean_i * mean_j * C_ij
+
+(S: sum of r_ui * r_uj, A_ij: sum of r_ui, C: count, all over users who rated
+both), so no re-centering of the matrix is needed. Every other movie only sees
+its similarity to the changed movies move; its list is patched in place and
+recomputed only if the patch can't prove the result is still its top-N.
+Each batch is published as a new model version that the app hot-swaps.
+
+Event ids are AUTO_INCREMENT values handed out at insert time, so a lower id
+can commit after a higher one has been read. EventCursor remembers the ids it
+skipped over and asks for them again until they arrive or a grace period
+passes; only the id below the oldest open gap is published and pruned.
+
+Usage:
+    python -m recommend_model.scripts.incremental_update --interval 60
+    python -m recommend_model.scripts.incremental_update --once
+---------------------------------------
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from app.config.model_config import SIMILARITY_INDEX_DIR, NEIGHBOR_TOP_N, MODEL_KEEP_VERSIONS, EVENT_GAP_GRACE
+from app.models.similarity_index import SimilarityIndex
+from recommend_model.scripts.train_similarity import build_user_item_matrix, train
+
+
+class IncrementalSimilarity:
+    def __init__(self, matrix, user_ids, item_ids, index, top_n=NEIGHBOR_TOP_N, block_size=1024):
+        """
+        matrix: users x movies ratings (rows/columns in user_ids/item_ids order);
+        index: the SimilarityIndex trained on exactly that matrix.
+        """
+        self.top_n = top_n
+        self.block_size = block_size
+        self.R = sp.csc_matrix(matrix, dtype=np.float64)
+        self.user_pos = {u: p for p, u in enumerate(np.asarray(user_ids).tolist())}
+        self.item_ids = [int(m) for m in item_ids]
+        self.item_pos = {m: p for p, m in enumerate(self.item_ids)}
+        if [int(m) for m in index.item_ids] != self.item_ids:
+            raise ValueError("Index movies do not match the rating matrix columns")
+
+        squared = self.R.multiply(self.R)
+        self.count = np.diff(self.R.indptr).astype(np.float64)
+        self.total = np.asarray(self.R.sum(axis=0)).ravel()
+        self.sumsq = np.asarray(squared.sum(axis=0)).ravel()
+
+        self.neighbors = []
+        for p in range(len(self.item_ids)):
+            start, stop = index.indptr[p], index.indptr[p + 1]
+            self.neighbors.append((np.array(index.indices[start:stop]), np.array(index.data[start:stop])))
+
+    @staticmethod
+    def from_ratings(ratings, top_n=NEIGHBOR_TOP_N, block_size=1024, workers=1):
+        """Full train on a (userId, movieId, rating) DataFrame, keeping the state for updates."""
+        matrix, user_ids, item_ids = build_user_item_matrix(ratings)
+        index = train(ratings, top_n=top_n, block_size=block_size, workers=workers)
+        return IncrementalSimilarity(matrix, user_ids, item_ids, index, top_n=top_n, block_size=block_size)
+
+    # -------------------- Statistics --------------------
+    def _means_and_inv_norms(self):
+        means = np.divide(self.total, self.count, out=np.zeros_like(self.total), where=self.count > 0)
+        norms = np.sqrt(np.maximum(self.sumsq - self.count * means * means, 0.0))
+        # tiny norms are rounding noise from items whose ratings are all equal
+        inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 1e-9)
+        return means, inv_norms
+
+    def _binary(self, matrix):
+        binary = matrix.copy()
+        binary.data = np.ones_like(binary.data)
+        return binary
+
+    def similarity_rows(self, rows):
+        """Dense Pearson similarity of the given movie positions to every movie (float32)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        means, inv_norms = self._means_and_inv_norms()
+        B = self._binary(self.R)
+        out = np.empty((len(rows), len(self.item_ids)), dtype=np.float32)
+        for start in range(0, len(rows), self.block_size):
+            chunk = rows[start:start + self.block_size]
+            Rt, Bt = self.R[:, chunk].T.tocsr(), B[:, chunk].T.tocsr()
+            S = (Rt @ self.R).toarray()
+            A = (Rt @ B).toarray()
+            At = (Bt @ self.R).toarray()
+            C = (Bt @ B).toarray()
+            mi, mj = means[chunk, None], means[None, :]
+            dot = S - mj * A - mi * At + mi * mj * C
+            out[start:start + len(chunk)] = dot * inv_norms[chunk, None] * inv_norms[None, :]
+        return out
+
+    def _co_rated(self, rows, matrix):
+        """Positions of movies sharing at least one rater with any of the given movies."""
+        B = self._binary(matrix)
+        co = B[:, rows].T.tocsr() @ B
+        return np.unique(co.indices)
+
+    # -------------------- Updates --------------------
+    def _ensure_ids(self, users, movies):
+        new_users = [u for u in dict.fromkeys(users) if u not in self.user_pos]
+        new_items = [m for m in dict.fromkeys(movies) if m not in self.item_pos]
+        for u in new_users:
+            self.user_pos[u] = len(self.user_pos)
+        for m in new_items:
+            self.item_pos[m] = len(self.item_ids)
+            self.item_ids.append(m)
+            self.neighbors.append((np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)))
+        if new_users or new_items:
+            self.R.resize((len(self.user_pos), len(self.item_ids)))
+            grow = len(new_items)
+            self.count = np.concatenate([self.count, np.zeros(grow)])
+            self.total = np.concatenate([self.total, np.zeros(grow)])
+            self.sumsq = np.concatenate([self.sumsq, np.zeros(grow)])
+
+    def apply(self, events):
+        """
+        Fold rating events (dicts with user_email, movieId, new_rating; None = deleted)
+        into the model. The current matrix value is taken as the old rating, so
+        re-applying the latest event of a pair is harmless, but an older one would
+        roll the pair back: feed each event once (see EventCursor). Returns a
+        summary of the work done.
+        """
+        final = {}
+        for e in events:
+            final[(e["user_email"], int(e["movieId"]))] = None if e.get("new_rating") is None else float(e["new_rating"])
+        if not final:
+            return {"events": 0, "changed_items": 0, "patched_rows": 0, "recomputed_rows": 0}
+
+        self._ensure_ids([u for u, _ in final], [m for _, m in final])
+        rows, cols, deltas = [], [], []
+        R = self.R.tocsr()
+        for (user, movie), new in final.items():
+            u, i = self.user_pos[user], self.item_pos[movie]
+            old = R[u, i] or None
+            if old == new:
+                continue
+            rows.append(u)
+            cols.append(i)
+            deltas.append((new or 0.0) - (old or 0.0))
+            self.count[i] += (new is not None) - (old is not None)
+            self.total[i] += (new or 0.0) - (old or 0.0)
+            self.sumsq[i] += (new or 0.0) ** 2 - (old or 0.0) ** 2
+        if not rows:
+            return {"events": len(events), "changed_items": 0, "patched_rows": 0, "recomputed_rows": 0}
+
+        changed = np.unique(cols)
+        before = self._co_rated(changed, self.R)
+        self.R = (self.R + sp.csc_matrix((deltas, (rows, cols)), shape=self.R.shape)).tocsc()
+        self.R.eliminate_zeros()
+        candidates = np.union1d(before, self._co_rated(changed, self.R))
+
+        sims = self.similarity_rows(changed)
+        for row, i in enumerate(changed):
+            idx, data = SimilarityIndex.select_block(int(i), sims[row:row + 1].copy(), self.top_n)
+            self.neighbors[i] = (idx[0], data[0])
+
+        others = np.setdiff1d(candidates, changed)
+        is_changed = np.zeros(len(self.item_ids), dtype=bool)
+        is_changed[changed] = True
+        recompute = [j for j in others.tolist() if not self._patch_row(j, changed, is_changed, sims[:, j])]
+        if recompute:
+            full = self.similarity_rows(recompute)
+            for row, j in enumerate(recompute):
+                idx, data = SimilarityIndex.select_block(int(j), full[row:row + 1], self.top_n)
+                self.neighbors[j] = (idx[0], data[0])
+
+        return {
+            "events": len(events),
+            "changed_items": int(len(changed)),
+            "patched_rows": int(len(others) - len(recompute)),
+            "recomputed_rows": len(recompute),
+        }
+
+    def _patch_row(self, j, changed, is_changed, values):
+        """
+        Replace row j's similarities to the changed movies. Returns False when the
+        patched list can't be proven to be j's top-N (the caller then recomputes it).
+        """
+        idx, data = self.neighbors[j]
+        was_full = len(idx) >= self.top_n
+        floor = data[-1] if len(data) else np.inf
+        keep = ~is_changed[idx]
+        add = np.isfinite(values) & (values > 0)
+        idx = np.concatenate([idx[keep], changed[add].astype(np.int32)])
+        data = np.concatenate([data[keep], values[add].astype(np.float32)])
+        order = np.argsort(-data, kind="stable")[:self.top_n]
+        idx, data = idx[order], data[order]
+        # movies outside the old full list score at most its last value, so the
+        # patched list is exact only if it is still full and nothing fell below that
+        if was_full and (len(idx) < self.top_n or data[-1] < floor):
+            return False
+        self.neighbors[j] = (idx, data)
+        return True
+
+    def to_index(self):
+        """Snapshot the neighbor lists as a SimilarityIndex."""
+        indices = [idx for idx, _ in self.neighbors]
+        data = [sims for _, sims in self.neighbors]
+        return SimilarityIndex.from_neighbor_lists(np.array(self.item_ids, dtype=np.int64), [(0, indices, data)])
+
+
+# -------------------- Event cursor --------------------
+class EventCursor:
+    """
+    Position in rating_events that tolerates ids committing out of order.
+
+    Ids below the highest one seen that have not been read yet are open gaps:
+    they are fetched again on every poll, and dropped as rolled back once they
+    have been missing for `grace` seconds. `watermark` is the highest id with
+    no open gap at or below it.
+    """
+
+    def __init__(self, watermark=0, seen=(), grace=EVENT_GAP_GRACE, now=None):
+        """watermark: every id <= it is already applied; seen: applied ids above it."""
+        self.grace = grace
+        self.max_seen = int(watermark)
+        self.gaps = {}  # missing id -> time it was first found missing
+        self.accept([{"event_id": event_id} for event_id in seen], now)
+
+    def gap_ids(self):
+        return sorted(self.gaps)
+
+    @property
+    def watermark(self):
+        return min(self.gaps) - 1 if self.gaps else self.max_seen
+
+    def accept(self, events, now=None):
+        """Record fetched events; returns those not applied before, in id order."""
+        now = time.time() if now is None else now
+        fresh = []
+        for e in sorted(events, key=lambda e: int(e["event_id"])):
+            event_id = int(e["event_id"])
+            if event_id in self.gaps:
+                del self.gaps[event_id]
+            elif event_id <= self.max_seen:
+                continue  # read again, already applied
+            else:
+                for missing in range(self.max_seen + 1, event_id):
+                    self.gaps[missing] = now
+                self.max_seen = event_id
+            fresh.append(e)
+        return fresh
+
+    def expire(self, now=None):
+        """Give up on gaps missing for longer than grace; returns their ids."""
+        now = time.time() if now is None else now
+        expired = sorted(event_id for event_id, since in self.gaps.items() if now - since >= self.grace)
+        for event_id in expired:
+            del self.gaps[event_id]
+        return expired
+
+
+# -------------------- DB runner --------------------
+def load_snapshot(grace=EVENT_GAP_GRACE):
+    """
+    Read all ratings plus an EventCursor from one consistent snapshot. Events
+    newer than grace may still have uncommitted neighbors, so their visible ids
+    are listed individually instead of folded into the watermark.
+    """
+    import pymysql
+    from app.config.db_connection import connecting_db
+
+    conn = connecting_db()
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        cursor.execute(
+            """
+            SELECT event_id FROM rating_events
+            WHERE created_at < NOW() - INTERVAL %s SECOND
+            ORDER BY created_at DESC, event_id DESC
+            LIMIT 1
+            """,
+            (grace,),
+        )
+        row = cursor.fetchone()
+        watermark = int(row[0]) if row else 0
+        cursor.execute("SELECT event_id FROM rating_events WHERE event_id > %s", (watermark,))
+        seen = [int(r[0]) for r in cursor.fetchall()]
+        cursor.execute("SELECT user_email, movieId, rating FROM ratings")
+        frames = []
+        while True:
+            rows = cursor.fetchmany(50000)
+            if not rows:
+                break
+            frames.append(pd.DataFrame(rows, columns=["userId", "movieId", "rating"]))
+        conn.commit()
+    finally:
+        conn.close()
+    ratings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["userId", "movieId", "rating"])
+    return ratings, EventCursor(watermark, seen, grace=grace)
+
+
+def main(argv=None):
+    from app.models.rating_events import RatingEvent
+
+    parser = argparse.ArgumentParser(description="Apply new ratings to the neighbor index incrementally.")
+    parser.add_argument("--out", default=SIMILARITY_INDEX_DIR, help="model root to publish versions under")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between polls of rating_events")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--top-n", type=int, default=NEIGHBOR_TOP_N)
+    parser.add_argument("--workers", type=int, default=1, help="processes for the initial full train")
+    parser.add_argument("--prune", action="store_true", help="delete events once published")
+    parser.add_argument("--gap-grace", type=float, default=EVENT_GAP_GRACE,
+                        help="seconds to wait for a missing event id before treating it as rolled back")
+    parser.add_argument("--once", action="store_true", help="bootstrap, apply pending events and exit")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    ratings, events_cursor = load_snapshot(grace=args.gap_grace)
+    model = IncrementalSimilarity.from_ratings(ratings, top_n=args.top_n, workers=args.workers)
+    version = model.to_index().publish(args.out, keep=MODEL_KEEP_VERSIONS, metadata={
+        "similarity": "pearson", "source": "db", "last_event_id": events_cursor.watermark,
+        "train_seconds": round(time.perf_counter() - started, 2),
+    })
+    print(f" Bootstrapped from {len(ratings)} ratings, published {version} (events <= {events_cursor.watermark})")
+
+    pruned = 0
+    while True:
+        res = RatingEvent.fetch_since(events_cursor.max_seen, limit=args.batch_size, include=events_cursor.gap_ids())
+        if not res["success"]:
+            print(f" Could not read rating events: {res['error']}")
+        else:
+            events = events_cursor.accept(res["data"])
+            expired = events_cursor.expire()
+            if expired:
+                print(f" Gave up on {len(expired)} event ids missing for over {args.gap_grace}s: {expired[:10]}")
+            if events:
+                started = time.perf_counter()
+                summary = model.apply(events)
+                elapsed = round(time.perf_counter() - started, 3)
+                version = model.to_index().publish(args.out, keep=MODEL_KEEP_VERSIONS, metadata={
+                    "similarity": "pearson", "source": "db", "last_event_id": events_cursor.watermark,
+                    "max_event_id": events_cursor.max_seen, "update_seconds": elapsed, **summary,
+                })
+                print(f" Applied {summary} in {elapsed}s, published {version}")
+            if args.prune and events_cursor.watermark > pruned:
+                # never past an open gap: a late commit there must still be readable
+                RatingEvent.prune(events_cursor.watermark)
+                pruned = events_cursor.watermark
+            if len(res["data"]) >= args.batch_size:
+                continue
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+train_als.py
+---------------------------------------
+Train the matrix-factorization (ALS) engine from ratings.
+
+Alternating least squares fixes the item factors and solves every user's
+k x k normal equations, then the reverse, for a number of iterations:
+
+  explicit  minimise sum (r - mean - x_u . y_i)^2 + reg * (n_u |x_u|^2 + n_i |y_i|^2)
+            over observed ratings; each row is an exact Cholesky solve.
+  implicit  every rating is a positive preference p = 1 with confidence
+            c = 1 + alpha * r, unobserved pairs are p = 0, c = 1 (Hu, Koren &
+            Volinsky). Each row is updated with a few conjugate-gradient steps
+            warm-started from the previous factors; the Y^T Y term is shared,
+            so a row costs O(n_u k + k^2) per step instead of O(n_u k^2 + k^3).
+
+Rows are split into chunks with a bounded number of ratings and solved on a
+thread pool (the heavy numpy/scipy kernels release the GIL). Only the item
+factors, and an IVF partition of them for approximate search, are published;
+users are folded in at serving time.
+
+Usage:
+    python -m recommend_model.scripts.train_als --source csv --ratings recommend_model/data/raw/ratings_d.csv
+    python -m recommend_model.scripts.train_als --source db --mode implicit --workers 8
+---------------------------------------
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import cho_factor, cho_solve
+
+from app.config.model_config import ALS_MODEL_DIR, ALS_FACTORS, MODEL_KEEP_VERSIONS
+from app.models.factor_model import FactorModel
+from recommend_model.scripts.train_similarity import (
+    DEFAULT_RATINGS_CSV, load_ratings_csv, load_ratings_db, build_user_item_matrix,
+)
+
+# ratings per chunk of rows handed to a worker thread
+CHUNK_RATINGS = 8192
+
+
+# -------------------- Row chunks --------------------
+def row_chunks(matrix, chunk_ratings=CHUNK_RATINGS):
+    """Split the rows of a CSR matrix into (start, stop) ranges holding about chunk_ratings ratings each."""
+    n = matrix.shape[0]
+    bounds, start = [], 0
+    while start < n:
+        target = matrix.indptr[start] + chunk_ratings
+        stop = int(np.searchsorted(matrix.indptr, target, side="right")) - 1
+        stop = min(max(stop, start + 1), n)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _solve_chunks(solve, matrix, workers):
+    bounds = row_chunks(matrix)
+    if workers and workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(lambda b: solve(*b), bounds))
+    else:
+        for b in bounds:
+            solve(*b)
+
+
+# -------------------- Explicit --------------------
+def explicit_half_step(matrix, fixed, out, reg, workers=1):
+    """
+    Solve every row of `out` against the fixed factors with a Cholesky
+    factorization of (Y_I^T Y_I + reg * n I) x = Y_I^T r, r the ratings of that row.
+    matrix is CSR with rows matching `out` and columns matching `fixed`.
+    """
+    k = fixed.shape[1]
+    diagonal = np.arange(k)
+
+    def solve(start, stop):
+        for row in range(start, stop):
+            lo, hi = matrix.indptr[row], matrix.indptr[row + 1]
+            if hi == lo:
+                out[row] = 0.0
+                continue
+            Y = fixed[matrix.indices[lo:hi]]
+            A = Y.T @ Y
+            A[diagonal, diagonal] += reg * (hi - lo)
+            out[row] = cho_solve(cho_factor(A, check_finite=False), Y.T @ matrix.data[lo:hi], check_finite=False)
+
+    _solve_chunks(solve, matrix, workers)
+
+
+# -------------------- Implicit --------------------
+def implicit_half_step(matrix, fixed, out, reg, alpha, cg_steps=3, workers=1):
+    """
+    Update every row of `out` with cg_steps conjugate-gradient iterations on
+    (Y^T Y + Y_I^T (C - I) Y_I + reg I) x = Y_I^T C p, starting from its current value.
+    """
+    gram = fixed.T @ fixed
+    n_fixed = fixed.shape[0]
+
+    def solve(start, stop):
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        indices = matrix.indices[lo:hi]
+        indptr = matrix.indptr[start:stop + 1] - lo
+        rows = np.repeat(np.arange(stop - start), np.diff(indptr))
+        extra = alpha * matrix.data[lo:hi]  # c - 1
+        Y = fixed[indices]
+
+        def weighted(values):
+            return sp.csr_matrix((values, indices, indptr), shape=(stop - start, n_fixed)) @ fixed
+
+        def apply(p):
+            return p @ gram + reg * p + weighted(extra * np.einsum("nk,nk->n", Y, p[rows]))
+
+        x = out[start:stop].astype(np.float64)
+        r = weighted(1.0 + extra) - apply(x)
+        p = r.copy()
+        rs = np.einsum("uk,uk->u", r, r)
+        for _ in range(cg_steps):
+            Ap = apply(p)
+            pAp = np.einsum("uk,uk->u", p, Ap)
+            step = np.divide(rs, pAp, out=np.zeros_like(rs), where=pAp > 0)
+            x += step[:, None] * p
+            r -= step[:, None] * Ap
+            rs_new = np.einsum("uk,uk->u", r, r)
+            beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+            p = r + beta[:, None] * p
+            rs = rs_new
+        out[start:stop] = x
+
+    _solve_chunks(solve, matrix, workers)
+
+
+# -------------------- Training --------------------
+def explicit_rmse(matrix, users, items, global_mean):
+    """Root mean squared error of the model on the observed ratings."""
+    coo = matrix.tocoo()
+    pred = np.einsum("nk,nk->n", users[coo.row], items[coo.col]) + global_mean
+    return float(np.sqrt(np.mean((coo.data - pred) ** 2))) if coo.nnz else 0.0
+
+
+def als(matrix, mode="explicit", factors=ALS_FACTORS, reg=0.1, alpha=40.0, iterations=15,
+        cg_steps=3, workers=1, seed=0):
+    """
+    Factorize a users x movies CSR rating matrix.
+    Returns (user_factors, item_factors, global_mean); global_mean is 0 in implicit mode.
+    """
+    matrix = matrix.tocsr().astype(np.float64)
+    rng = np.random.default_rng(seed)
+    users = rng.normal(scale=0.01, size=(matrix.shape[0], factors))
+    items = rng.normal(scale=0.01, size=(matrix.shape[1], factors))
+
+    global_mean = 0.0
+    if mode == "explicit":
+        global_mean = float(matrix.data.mean()) if matrix.nnz else 0.0
+        matrix.data -= global_mean
+    by_item = matrix.T.tocsr()
+
+    for _ in range(iterations):
+        if mode == "explicit":
+            explicit_half_step(matrix, items, users, reg, workers)
+            explicit_half_step(by_item, users, items, reg, workers)
+        else:
+            implicit_half_step(matrix, items, users, reg, alpha, cg_steps, workers)
+            implicit_half_step(by_item, users, items, reg, alpha, cg_steps, workers)
+    return users, items, global_mean
+
+
+def train(ratings, mode="explicit", factors=ALS_FACTORS, reg=0.1, alpha=40.0, iterations=15,
+          cg_steps=3, workers=1, seed=0, ann=True, ann_lists=None):
+    """
+    Train a FactorModel from a ratings DataFrame (userId, movieId, rating).
+    With ann=True an IVF index over the item factors is built as well.
+    """
+    matrix, user_ids, item_ids = build_user_item_matrix(ratings)
+    users, items, global_mean = als(matrix, mode, factors, reg, alpha, iterations, cg_steps, workers, seed)
+    model = FactorModel(item_ids, items, mode=mode, reg=reg, alpha=alpha, global_mean=global_mean)
+    model.training_stats = {
+        "n_users": int(len(user_ids)),
+        "n_items": int(len(item_ids)),
+        "n_ratings": int(matrix.nnz),
+    }
+    if ann:
+        model.build_ann(n_lists=ann_lists)
+        model.training_stats["ann_lists"] = model.ann.n_lists
+    if mode == "explicit":
+        model.training_stats["train_rmse"] = round(explicit_rmse(matrix, users, items, global_mean), 4)
+    return model
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the ALS matrix-factorization engine.")
+    parser.add_argument("--source", choices=["csv", "db"], default="csv")
+    parser.add_argument("--ratings", default=DEFAULT_RATINGS_CSV, help="ratings CSV (with --source csv)")
+    parser.add_argument("--out", default=ALS_MODEL_DIR, help="model root; a new version is published under it")
+    parser.add_argument("--mode", choices=["explicit", "implicit"], default="explicit")
+    parser.add_argument("--factors", type=int, default=ALS_FACTORS)
+    parser.add_argument("--reg", type=float, default=0.1)
+    parser.add_argument("--alpha", type=float, default=40.0, help="implicit confidence scale")
+    parser.add_argument("--iterations", type=int, default=15)
+    parser.add_argument("--cg-steps", type=int, default=3, help="conjugate-gradient steps per implicit update")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="threads solving row chunks")
+    parser.add_argument("--ann-lists", type=int, default=None, help="IVF clusters (default ~sqrt(movies))")
+    parser.add_argument("--no-ann", action="store_true", help="do not build the IVF search index")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    ratings = load_ratings_csv(args.ratings) if args.source == "csv" else load_ratings_db()
+    print(f" Ratings loaded: {len(ratings)} rows")
+
+    model = train(ratings, mode=args.mode, factors=args.factors, reg=args.reg, alpha=args.alpha,
+                  iterations=args.iterations, cg_steps=args.cg_steps, workers=args.workers,
+                  ann=not args.no_ann, ann_lists=args.ann_lists)
+    elapsed = time.perf_counter() - started
+    print(f" ALS model trained: {len(model)} movies x {model.factors} factors in {elapsed:.1f}s")
+
+    version = model.publish(args.out, keep=MODEL_KEEP_VERSIONS, metadata={
+        "source": args.ratings if args.source == "csv" else "db",
+        "iterations": args.iterations,
+        "train_seconds": round(elapsed, 2),
+        "workers": args.workers,
+        **model.training_stats,
+    })
+    print(f" ALS model published at: {args.out} (version {version})")
+    return model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+train_similarity.py
+---------------------------------------
+Train the item-item neighbor index from ratings without a dense pivot.
+
+The user x movie matrix is a scipy.sparse CSR matrix, so memory grows with
+the number of ratings, not users x movies. Similarity is Pearson correlation
+with item-mean centering: each observed rating has its movie's mean rating
+subtracted, and the centered item vectors are compared with cosine. Similarity
+rows are computed one block of movies at a time with sparse dot products and
+only the top-N neighbors per movie are kept.
+
+With --workers > 1 the blocks are computed in a process pool. The centered
+matrix is placed in shared memory once and every worker maps it without
+copying; workers return only each block's top-N lists, which are streamed
+into the index in order. Peak memory per worker is one dense block
+(block_size x movies floats).
+
+Usage:
+    python -m recommend_model.scripts.train_similarity --source csv --ratings recommend_model/data/raw/ratings_d.csv
+    python -m recommend_model.scripts.train_similarity --source db --workers 8
+---------------------------------------
+"""
+
+import os
+import time
+import argparse
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from app.config.model_config import BASE_DIR, SIMILARITY_INDEX_DIR, NEIGHBOR_TOP_N, MODEL_KEEP_VERSIONS
+from app.models.similarity_index import SimilarityIndex
+
+DEFAULT_RATINGS_CSV = os.path.join(BASE_DIR, "recommend_model", "data", "processed", "ratings_final.csv")
+
+
+# -------------------- Loading --------------------
+def load_ratings_csv(path=DEFAULT_RATINGS_CSV):
+    """Read (userId, movieId, rating) from a ratings CSV."""
+    return pd.read_csv(path, usecols=["userId", "movieId", "rating"])
+
+
+def load_ratings_db(chunk_size=50000):
+    """Stream (userId, movieId, rating) from the ratings table; userId is the user's email."""
+    import pymysql
+    from app.config.db_connection import connecting_db
+
+    conn = connecting_db()
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute("SELECT user_email, movieId, rating FROM ratings")
+        frames = []
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            frames.append(pd.DataFrame(rows, columns=["userId", "movieId", "rating"]))
+        cursor.close()
+    finally:
+        conn.close()
+    if not frames:
+        return pd.DataFrame(columns=["userId", "movieId", "rating"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# -------------------- Matrix building --------------------
+def build_user_item_matrix(ratings):
+    """
+    Return (matrix, user_ids, item_ids): a users x movies CSR matrix of ratings
+    with rows/columns in user_ids/item_ids order. Repeated (user, movie) pairs
+    keep the last rating.
+    """
+    ratings = ratings.drop_duplicates(subset=["userId", "movieId"], keep="last")
+    user_ids, rows = np.unique(ratings["userId"].to_numpy(), return_inverse=True)
+    item_ids, cols = np.unique(ratings["movieId"].to_numpy(dtype=np.int64), return_inverse=True)
+    matrix = sp.csr_matrix(
+        (ratings["rating"].to_numpy(dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(item_ids)),
+    )
+    return matrix, user_ids, item_ids
+
+
+def center_items(matrix):
+    """
+    Subtract each movie's mean rating from its observed ratings (missing stays 0).
+    Returns (centered matrix as CSC, item means).
+    """
+    csc = matrix.tocsc(copy=True)
+    counts = np.diff(csc.indptr)
+    sums = np.asarray(csc.sum(axis=0)).ravel()
+    means = np.divide(sums, counts, out=np.zeros_like(sums, dtype=np.float64), where=counts > 0)
+    csc.data = csc.data - np.repeat(means, counts).astype(csc.data.dtype)
+    return csc, means
+
+
+# -------------------- Similarity --------------------
+def prepare_similarity(centered):
+    """
+    Return (items, users_by_item, inv_norms): the centered matrix as movies x users
+    CSR and users x movies CSC (int32 indices), plus 1 / ||item|| (0 for empty items).
+    """
+    items = centered.T.tocsr()
+    items.indices = items.indices.astype(np.int32, copy=False)
+    items.indptr = items.indptr.astype(np.int32, copy=False)
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel()).astype(np.float32)
+    inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    users_by_item = items.T.tocsc()
+    return items, users_by_item, inv_norms
+
+
+def similarity_block(items, users_by_item, inv_norms, start, stop):
+    """Dense Pearson similarity of movies start..stop to every movie (float32)."""
+    block = (items[start:stop] @ users_by_item).toarray().astype(np.float32, copy=False)
+    block *= inv_norms[start:stop, None]
+    block *= inv_norms[None, :]
+    return block
+
+
+def iter_similarity_blocks(centered, block_size=1024):
+    """
+    Yield (start, block) where block is the dense (rows x movies) Pearson
+    similarity of movies start..start+rows to every movie.
+    """
+    items, users_by_item, inv_norms = prepare_similarity(centered)
+    n = items.shape[0]
+    for start in range(0, n, block_size):
+        yield start, similarity_block(items, users_by_item, inv_norms, start, min(start + block_size, n))
+
+
+# -------------------- Shared-memory workers --------------------
+class SharedArrays:
+    """Named numpy arrays copied once into shared memory; `spec` is what workers receive to map them."""
+
+    def __init__(self, arrays):
+        self._segments = []
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            self._segments.append(shm)
+            self.spec[name] = (shm.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(spec):
+        """Map the arrays in a worker; returns (arrays, segments to keep alive)."""
+        arrays, segments = {}, []
+        for name, (shm_name, shape, dtype) in spec.items():
+            shm = SharedMemory(name=shm_name)
+            segments.append(shm)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        return arrays, segments
+
+    def close(self):
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+
+_worker = {}
+
+
+def _init_worker(spec, shapes, top_n):
+    arrays, segments = SharedArrays.attach(spec)
+    n_items, n_users = shapes
+    _worker.update(
+        segments=segments,
+        top_n=top_n,
+        inv_norms=arrays["inv_norms"],
+        # scipy wraps the shared buffers as-is (dtypes already match), no copy
+        items=sp.csr_matrix((arrays["items_data"], arrays["items_indices"], arrays["items_indptr"]),
+                            shape=(n_items, n_users), copy=False),
+        users_by_item=sp.csc_matrix((arrays["items_data"], arrays["items_indices"], arrays["items_indptr"]),
+                                    shape=(n_users, n_items), copy=False),
+    )
+
+
+def _top_n_block(bounds):
+    start, stop = bounds
+    block = similarity_block(_worker["items"], _worker["users_by_item"], _worker["inv_norms"], start, stop)
+    return (start, *SimilarityIndex.select_block(start, block, _worker["top_n"]))
+
+
+def parallel_neighbor_lists(centered, top_n, block_size=1024, workers=None):
+    """
+    Yield (start, indices list, sims list) per row block, computed in a process
+    pool over a shared-memory copy of the matrix, in row order.
+    """
+    items, _, inv_norms = prepare_similarity(centered)
+    n_items, n_users = items.shape
+    # a movies x users CSR has the same arrays as the users x movies CSC, so one copy serves both
+    shared = SharedArrays({
+        "items_data": items.data.astype(np.float32, copy=False),
+        "items_indices": items.indices,
+        "items_indptr": items.indptr,
+        "inv_norms": inv_norms,
+    })
+    try:
+        bounds = [(start, min(start + block_size, n_items)) for start in range(0, n_items, block_size)]
+        with get_context("spawn").Pool(workers, initializer=_init_worker,
+                                       initargs=(shared.spec, (n_items, n_users), top_n)) as pool:
+            yield from pool.imap(_top_n_block, bounds)
+    finally:
+        shared.close()
+
+
+def train(ratings, top_n=NEIGHBOR_TOP_N, block_size=1024, workers=1):
+    """Build the top-N Pearson neighbor index from a ratings DataFrame (workers > 1: process pool)."""
+    matrix, user_ids, item_ids = build_user_item_matrix(ratings)
+    centered, _ = center_items(matrix)
+    if workers and workers > 1:
+        index = SimilarityIndex.from_neighbor_lists(
+            item_ids, parallel_neighbor_lists(centered, top_n, block_size, workers)
+        )
+    else:
+        index = SimilarityIndex.from_blocks(item_ids, iter_similarity_blocks(centered, block_size), top_n=top_n)
+    index.training_stats = {
+        "n_users": int(len(user_ids)),
+        "n_items": int(len(item_ids)),
+        "n_ratings": int(matrix.nnz),
+    }
+    return index
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the item-item neighbor index (sparse Pearson).")
+    parser.add_argument("--source", choices=["csv", "db"], default="csv")
+    parser.add_argument("--ratings", default=DEFAULT_RATINGS_CSV, help="ratings CSV (with --source csv)")
+    parser.add_argument("--out", default=SIMILARITY_INDEX_DIR, help="model root; a new version is published under it")
+    parser.add_argument("--top-n", type=int, default=NEIGHBOR_TOP_N)
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes computing similarity blocks (1 = in-process)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    ratings = load_ratings_csv(args.ratings) if args.source == "csv" else load_ratings_db()
+    print(f" Ratings loaded: {len(ratings)} rows")
+
+    index = train(ratings, top_n=args.top_n, block_size=args.block_size, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    print(f" Neighbor index built: {len(index)} movies, {len(index.data)} entries in {elapsed:.1f}s")
+
+    version = index.publish(args.out, keep=MODEL_KEEP_VERSIONS, metadata={
+        "similarity": "pearson",
+        "source": args.ratings if args.source == "csv" else "db",
+        "top_n": args.top_n,
+        "train_seconds": round(elapsed, 2),
+        "workers": args.workers,
+        **index.training_stats,
+    })
+    print(f" Neighbor index published at: {args.out} (version {version})")
+    return index
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # setup_database.py
-import os, bcrypt
+import os, time, bcrypt
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,6 +9,11 @@ from app.models.users_data import User
 from app.models.movies_data import Movie
 from app.models.ratings_data import Rating
 from app.models.watchlist_data import Watchlist
+from app.models.rating_stats import MovieRatingStats
+from app.models.rating_events import RatingEvent
+from app.models.ratings_dataset import DemoRating
+from app.models.bulk_loader import BulkLoader
+from app.models.migrations import Migrations
 from app.config.db_connection import connecting_db
 
 
@@ -16,14 +22,84 @@ ADMIN_EMAIL = os.getenv("DEFAULT_ADMIN_EMAIL")
 ADMIN_PW = os.getenv("DEFAULT_ADMIN_PASSWORD")
 MOVIES_CSV = "recommend_model/data/processed/movies_with_posters_withId.csv" 
 DEMO_RATINGS_CSV = "recommend_model/data/processed/ratings_final_fixed.csv"
+# concurrent setup tasks; each holds one pooled connection (keep <= DB_POOL_SIZE)
+SETUP_WORKERS = int(os.getenv("SETUP_WORKERS", "4"))
+
+# table -> (create function, tables it references); independent tables are created concurrently
+TABLES = {
+    "users": (User.create_table, []),
+    "movies": (Movie.create_table, []),
+    "ratings": (Rating.create_table, ["users", "movies"]),
+    "watchlist": (Watchlist.create_table, ["users", "movies"]),
+    "movie_rating_stats": (MovieRatingStats.create_table, ["movies"]),
+    "rating_events": (RatingEvent.create_table, []),
+    "ratings triggers": (Rating.create_triggers, ["ratings", "movie_rating_stats", "rating_events"]),
+    "bulk_load_checkpoints": (BulkLoader.create_table, []),
+    "schema_migrations": (Migrations.create_table, []),
+    "demo_tables": (DemoRating.create_tables, ["movies"]),
+}
+
+# seed load -> (loader, CSV, loads it must wait for); demo ratings reference movies
+SEED_LOADS = {
+    "movies": (Movie.bulk_insert_from_csv, MOVIES_CSV, []),
+    "demo users": (DemoRating.bulk_insert_users_from_csv, DEMO_RATINGS_CSV, []),
+    "demo ratings": (lambda path: DemoRating.bulk_insert_from_csv(path, with_users=False), DEMO_RATINGS_CSV,
+                     ["movies"]),
+}
+
+
+def run_graph(tasks, workers=SETUP_WORKERS):
+    """
+    Run {name: (fn, dependencies)} on a thread pool, starting each task once all of
+    its dependencies have finished. Each task uses its own pooled connection.
+    Returns {name: (result, seconds)}; tasks whose dependencies failed are skipped.
+    """
+    results, running = {}, {}
+    pending = dict(tasks)
+    with ThreadPoolExecutor(workers) as pool:
+        while pending or running:
+            scheduled = True
+            while scheduled:  # skipping a task can unblock (skip) its dependents in the same pass
+                scheduled = False
+                for name, (fn, deps) in list(pending.items()):
+                    if any(d in results and not results[d][0].get("success") for d in deps):
+                        results[name] = ({"success": False, "error": "skipped: a dependency failed"}, 0.0)
+                    elif all(d in results for d in deps):
+                        running[pool.submit(_timed, fn)] = name
+                    else:
+                        continue
+                    del pending[name]
+                    scheduled = True
+            if not running:
+                if pending:
+                    raise ValueError(f"Unknown or circular dependencies: {', '.join(pending)}")
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    return result, time.perf_counter() - started
+
+
+def _report(phase, results, started):
+    for name, (result, seconds) in results.items():
+        status = result.get("message", "ok") if result.get("success") else f"FAILED: {result.get('error')}"
+        print(f"  {name:<24} {seconds:7.2f}s  {status}")
+    print(f"{phase} done in {time.perf_counter() - started:.2f}s")
+
 
 def setup_database():
+    started = time.perf_counter()
     print("Creating tables...")
-    User.create_table()
-    Movie.create_table()
-    Rating.create_table()
-    Watchlist.create_table()
-   
+    _report("Tables", run_graph(TABLES), started)
 
     # create default admin (DEV only)
     if DEV_MODE and ADMIN_EMAIL and ADMIN_PW:
@@ -35,14 +111,28 @@ def setup_database():
         else:
             print("Admin already exists, skipping.")
 
-        # Bulk insert movies (only if CSV exists)
-        if os.path.exists(MOVIES_CSV):
-            print("Bulk inserting movies (may take a while)...")
-            Movie.bulk_insert_from_csv(MOVIES_CSV)
-            print("Movies inserted.")
-        else:
-            print("Movies CSV not found, skipping movie bulk insert.")
+        # Bulk load seed data (only if the CSVs exist); interrupted loads resume where they stopped
+        phase = time.perf_counter()
+        print("Loading seed data...")
+        loads = {}
+        for name, (loader, csv_path, deps) in SEED_LOADS.items():
+            if os.path.exists(csv_path):
+                loads[name] = (lambda loader=loader, csv_path=csv_path: loader(csv_path), deps)
+            else:
+                print(f"  {name}: {csv_path} not found, skipping")
+                loads[name] = (lambda: {"success": False, "error": "CSV not found"}, [])
+        _report("Seed data", run_graph(loads), phase)
+
+    # Indexes and aggregates are built once over the loaded rows rather than maintained per insert
+    phase = time.perf_counter()
+    print("Building indexes and rating stats...")
+    _report("Indexes", run_graph({
+        "schema migrations": (Migrations.apply, []),
+        "demo indexes": (DemoRating.create_indexes, []),
+        "rating stats": (MovieRatingStats.rebuild, ["schema migrations"]),
+    }), phase)
+    print(f"Database setup finished in {time.perf_counter() - started:.2f}s")
+
 
-    
 if __name__ == "__main__":
     setup_database()